@@ -0,0 +1,97 @@
+'''
+This module calculates the hypergeometric cumulative distribution function for
+a whole batch of deck configurations at once with vectorized NumPy operations.
+
+Included are:
+- calculate_batch(deck_sizes, sample_sizes, group_sizes, group_mins, group_maxes)
+- validate_batch(deck_sizes, sample_sizes, group_sizes, group_mins, group_maxes)
+'''
+
+# Imports.
+from math import lgamma
+import numpy as np
+
+# Methods.
+def validate_batch(deck_sizes, sample_sizes, group_sizes, group_mins, group_maxes):
+    '''
+    Returns a boolean array which is True for every configuration that fulfils the rules of Model_Hypgeo:
+    deck_size >= sample_size >= 0, deck_size >= sum of all card_counts and card_count >= max_in_sample >= min_in_sample >= 0.
+    '''
+    valid = (sample_sizes >= 0) & (deck_sizes >= sample_sizes)
+    valid &= np.all((group_mins >= 0) & (group_maxes >= group_mins) & (group_sizes >= group_maxes), axis=1)
+    valid &= deck_sizes >= group_sizes.sum(axis=1)
+    return valid
+
+def calculate_batch(deck_sizes, sample_sizes, group_sizes, group_mins, group_maxes):
+    '''
+    Calculates the probability of every configuration of a batch and returns them as a float array.
+
+    deck_sizes, sample_sizes: Sequences of length B (one entry per configuration).
+    group_sizes, group_mins, group_maxes: Arrays of shape (B, G), one column per group.
+    Configurations with fewer groups are padded with groups of [0, 0, 0], which don't change the result.
+
+    The groups are folded into a coefficient vector per configuration like the "convolution" engine of
+    Model_Hypgeo, in log-space like its "log" arithmetic, but for the whole batch in one array operation.
+    Invalid configurations return nan.
+    '''
+    deck_sizes = np.asarray(deck_sizes, dtype=np.int64)
+    sample_sizes = np.asarray(sample_sizes, dtype=np.int64)
+    group_sizes = np.asarray(group_sizes, dtype=np.int64).reshape(len(deck_sizes), -1)
+    group_mins = np.asarray(group_mins, dtype=np.int64).reshape(group_sizes.shape)
+    group_maxes = np.asarray(group_maxes, dtype=np.int64).reshape(group_sizes.shape)
+
+    results = np.full(len(deck_sizes), np.nan)
+    valid = validate_batch(deck_sizes, sample_sizes, group_sizes, group_mins, group_maxes)
+    if not valid.any():
+        return results
+    deck_sizes, sample_sizes = deck_sizes[valid], sample_sizes[valid]
+    group_sizes, group_mins, group_maxes = group_sizes[valid], group_mins[valid], group_maxes[valid]
+    unassigned_cards = deck_sizes - group_sizes.sum(axis=1)
+
+    max_sample_size = int(sample_sizes.max())
+    log_faculties = np.array([lgamma(n + 1) for n in range(int(deck_sizes.max()) + 1)])   # log_faculties[n] = log(n!)
+
+    def log_binomial(n, k):
+        '''
+        Vectorized log of the binomial coefficient. -inf where k < 0 or k > n.
+        '''
+        n, k = np.broadcast_arrays(n, k)
+        possible = (k >= 0) & (k <= n)
+        safe_n = np.where(possible, n, 0)
+        safe_k = np.where(possible, k, 0)
+        return np.where(possible, log_faculties[safe_n] - log_faculties[safe_k] - log_faculties[safe_n - safe_k], -np.inf)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawn = np.arange(max_sample_size + 1)                                  # Column index of the coefficient vectors.
+        coefficients = np.zeros((len(deck_sizes), max_sample_size + 1))
+        coefficients[:, 0] = 1.0
+        log_scale = np.zeros(len(deck_sizes))                                   # coefficients * exp(log_scale) = number of ways.
+
+        for group in range(group_sizes.shape[1]):
+            sizes = group_sizes[:, group, None]
+            in_window = (drawn >= group_mins[:, group, None]) & (drawn <= group_maxes[:, group, None])
+            log_binomials = np.where(in_window, log_binomial(sizes, drawn), -np.inf)
+            group_scale = log_binomials.max(axis=1)
+            group_scale = np.where(np.isfinite(group_scale), group_scale, 0.0)  # Empty windows give zero coefficients.
+            group_coefficients = np.exp(log_binomials - group_scale[:, None])
+
+            highest = int(np.minimum(group_maxes[:, group], max_sample_size).max())
+            folded = np.zeros_like(coefficients)
+            for in_sample in range(int(group_mins[:, group].min()), highest + 1):
+                folded[:, in_sample:] += coefficients[:, :max_sample_size + 1 - in_sample] * group_coefficients[:, in_sample, None]
+
+            peak = folded.max(axis=1)
+            peak = np.where(peak > 0.0, peak, 1.0)
+            coefficients = folded / peak[:, None]                               # Rescale, so the vectors neither overflow nor underflow.
+            log_scale += group_scale + np.log(peak)
+
+        size_rest = sample_sizes[:, None] - drawn
+        log_terms = np.log(coefficients) + log_binomial(unassigned_cards[:, None], size_rest)
+        log_peak = log_terms.max(axis=1)
+        possible = np.isfinite(log_peak)
+        log_peak = np.where(possible, log_peak, 0.0)
+        log_dividend = log_scale + log_peak + np.log(np.exp(log_terms - log_peak[:, None]).sum(axis=1))
+        probabilities = np.exp(log_dividend - log_binomial(deck_sizes, sample_sizes))
+
+    results[valid] = np.where(possible, np.minimum(probabilities, 1.0), 0.0)
+    return results
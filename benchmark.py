@@ -0,0 +1,203 @@
+'''
+Benchmark suite for the probability engines. Runs headless (no tkinter).
+
+Every workload scales one parameter (group count, range width, deck size or sample size)
+and is run with every engine. Wall time, peak memory and the number of combinations
+visited are written to a JSON file, which can be compared with the file of another commit.
+"visited" counts combinations for the enumeration engine, tree nodes for the streaming and
+parallel engines, pairwise folds for the convolution engine and the planner's actual cost
+(see Model_Hypgeo.plan_calculation()) for the complement and auto engines.
+The multi-turn engine is timed on typical decks, too; runs slower than TURNS_LIMIT seconds are flagged.
+
+Usage:
+    python benchmark.py --output benchmark_results.json
+    python benchmark.py --compare old.json new.json
+'''
+
+# Imports.
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from math import prod
+from headless import build_model
+from configuration import Configuration
+from methods_for_model import binomial_coefficient
+from model_hypgeo import ENGINES
+from multi_turn import calculate_turns
+
+# Constants.
+MAX_COMBINATIONS = 300000       # Workloads with more combinations are skipped for the enumerating engines, they would take minutes.
+MAX_COST = 10 ** 7              # Workloads with a higher estimated cost are skipped for the other engines, see Model_Hypgeo.estimate_costs().
+ENUMERATING_ENGINES = ("enumeration", "streaming", "parallel")
+TURNS_LIMIT = 1.0               # Seconds calculate_turns() may take for a typical deck (60 cards, 7 card hand, 10 turns).
+
+# Methods.
+def workloads(quick=False):
+    '''
+    Returns all workloads as a list of dicts with "workload", "parameter", "deck_size", "sample_size" and "groups".
+    All workloads are fixed, so the results of two runs are comparable.
+    '''
+    steps = 3 if quick else None
+    cases = []
+    for group_count in [1, 2, 4, 6, 8, 10, 12][:steps]:
+        cases.append({"workload": "group count", "parameter": group_count, "deck_size": 60, "sample_size": 10, "groups": [[4, 0, 3]] * group_count})
+    for width in [1, 2, 4, 8, 12][:steps]:
+        cases.append({"workload": "range width", "parameter": width, "deck_size": 100, "sample_size": 20, "groups": [[12, 0, width - 1]] * 5})
+    for deck_size in [60, 100, 1000, 10000, 100000][:steps]:
+        cases.append({"workload": "deck size", "parameter": deck_size, "deck_size": deck_size, "sample_size": 7, "groups": [[deck_size // 15, 1, 3]] * 4})
+    for sample_size in [5, 10, 20, 40][:steps]:
+        cases.append({"workload": "sample size", "parameter": sample_size, "deck_size": 100, "sample_size": sample_size, "groups": [[10, 1, 4]] * 5})
+    return cases
+
+def combination_count(case):
+    '''
+    Returns the size of the product Model_Hypgeo.calculate_combinations() builds for a workload.
+    '''
+    return prod(max(min(group[0], group[2], case["sample_size"]) - group[1] + 1, 0) for group in case["groups"])
+
+def run_case(case, engine, repeat):
+    '''
+    Runs one workload with one engine and returns the measurements as a dict.
+    The time is the best of repeat runs, each on a fresh model (cold caches). Peak memory is measured in an extra run.
+    '''
+    seconds = []
+    for _ in range(repeat):
+        model = build_model(case["deck_size"], case["sample_size"], case["groups"], engine=engine)
+        start = time.perf_counter()
+        result = model.calculate()
+        seconds.append(time.perf_counter() - start)
+
+    model = build_model(case["deck_size"], case["sample_size"], case["groups"], engine=engine)
+    tracemalloc.start()
+    model.calculate()
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    if model.get_active_arithmetic() == "log":
+        visited = None
+    elif engine in ("auto", "complement"):
+        visited = model.get_plan()["actual cost"]
+    elif engine == "enumeration":
+        visited = combination_count(case)
+    elif engine in ("streaming", "parallel"):
+        visited = model.get_enumeration_stats()["visited"]
+    else:
+        visited = model.get_fold_stats()["folds"]
+    return {"workload": case["workload"],
+            "parameter": case["parameter"],
+            "engine": engine,
+            "arithmetic": model.get_active_arithmetic(),
+            "seconds": min(seconds),
+            "peak bytes": peak_bytes,
+            "combinations": combination_count(case),
+            "visited": visited,
+            "plan": model.get_plan()["engine"],
+            "estimated cost": model.get_plan()["estimated cost"],
+            "result": result}
+
+def run_micro(repeat):
+    '''
+    Micro benchmarks of binomial_coefficient and Model_Hypgeo.calculate_combinations.
+    '''
+    results = []
+    for n in [60, 1000, 100000]:
+        start = time.perf_counter()
+        for _ in range(repeat * 100):
+            binomial_coefficient(n, 7)
+        results.append({"workload": "binomial_coefficient", "parameter": n, "engine": None, "seconds": (time.perf_counter() - start) / (repeat * 100)})
+    model = build_model(60, 10, [[4, 0, 3]] * 8)
+    start = time.perf_counter()
+    combinations = model.calculate_combinations()
+    results.append({"workload": "calculate_combinations", "parameter": 8, "engine": None, "seconds": time.perf_counter() - start, "combinations": len(combinations)})
+    return results
+
+def run_turns(repeat, quick=False):
+    '''
+    Times calculate_turns() on typical decks with more and more groups, without and with mulligans.
+    '''
+    results = []
+    for group_count in [2, 4, 8, 9, 12][:3 if quick else None]:
+        configuration = Configuration.from_groups(60, 7, [[4, 1, 3]] * group_count)
+        for mulligans in [0, 2]:
+            seconds = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                calculate_turns(configuration, turns=10, mulligans=mulligans)
+                seconds.append(time.perf_counter() - start)
+            results.append({"workload": "turns, " + str(mulligans) + " mulligans", "parameter": group_count, "engine": "turns",
+                            "seconds": min(seconds), "within limit": min(seconds) < TURNS_LIMIT})
+    return results
+
+def get_commit():
+    '''
+    Returns the current git commit, or None if git isn't available.
+    '''
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(engines=ENGINES, repeat=3, quick=False):
+    '''
+    Runs the whole suite and returns it as a dict.
+    '''
+    results = []
+    for case in workloads(quick):
+        for engine in engines:
+            model = build_model(case["deck_size"], case["sample_size"], case["groups"], engine=engine)
+            if ((engine in ENUMERATING_ENGINES and combination_count(case) > MAX_COMBINATIONS)
+                    or (engine not in ENUMERATING_ENGINES and model.plan_calculation()["estimated cost"] > MAX_COST)):
+                results.append({"workload": case["workload"], "parameter": case["parameter"], "engine": engine, "skipped": True, "combinations": combination_count(case)})
+                continue
+            results.append(run_case(case, engine, repeat))
+    results.extend(run_turns(repeat, quick))
+    results.extend(run_micro(repeat))
+    return {"meta": {"commit": get_commit(), "python": platform.python_version(), "platform": platform.platform(), "date": time.strftime("%Y-%m-%d %H:%M:%S"), "repeat": repeat},
+            "results": results}
+
+def compare(old_path, new_path):
+    '''
+    Prints the time of every measurement of two result files and their ratio (new / old).
+    '''
+    with open(old_path, "r") as read_old:
+        old = json.load(read_old)
+    with open(new_path, "r") as read_new:
+        new = json.load(read_new)
+    old_seconds = {(entry["workload"], entry["parameter"], entry["engine"]): entry.get("seconds") for entry in old["results"]}
+    print("{:<24}{:>10}{:>14}{:>12}{:>12}{:>8}".format("workload", "parameter", "engine", "old [ms]", "new [ms]", "ratio"))
+    for entry in new["results"]:
+        key = (entry["workload"], entry["parameter"], entry["engine"])
+        before, after = old_seconds.get(key), entry.get("seconds")
+        ratio = "-" if not before or after is None else "{:.2f}".format(after / before)
+        print("{:<24}{:>10}{:>14}{:>12}{:>12}{:>8}".format(key[0], key[1], str(key[2]),
+              "-" if before is None else "{:.3f}".format(before * 1000), "-" if after is None else "{:.3f}".format(after * 1000), ratio))
+
+def main(argv=None):
+    '''
+    Command line interface.
+    '''
+    import argparse     # Imported on demand, like in headless.py.
+    parser = argparse.ArgumentParser(prog="benchmark", description="Benchmark the probability engines.")
+    parser.add_argument("--output", default="benchmark_results.json", help="file for the JSON results")
+    parser.add_argument("--engine", choices=ENGINES, action="append", help="only run this engine (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the best is kept")
+    parser.add_argument("--quick", action="store_true", help="only the first steps of every workload")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    suite = run(args.engine or ENGINES, args.repeat, args.quick)
+    with open(args.output, "w") as write_output:
+        json.dump(suite, write_output, indent=4)
+    print("Wrote " + str(len(suite["results"])) + " results to " + args.output)
+    for entry in suite["results"]:
+        if entry.get("within limit") is False:
+            print("Slower than " + str(TURNS_LIMIT) + " s: " + entry["workload"] + ", " + str(entry["parameter"]) + " groups")
+
+# Execute the benchmark only when this exact file is run.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+'''
+This module defines the Binomial_Cache class.
+'''
+
+# Imports.
+from collections import OrderedDict
+from math import comb
+from methods_for_model import check_positive_int
+
+# Classes.
+class Binomial_Cache():
+    '''
+    Provides binomial coefficients for a model.
+
+    Misses are calculated with math.comb. It is faster than dividing precomputed factorials and
+    needs no table, so nothing has to be prepared when the deck size changes.
+    Results are memoized with a bounded LRU eviction policy and the cache is reused
+    across repeated calculations. Hits and misses are counted.
+    '''
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries      # Number of memoized coefficients before the least recently used one is evicted.
+        self.entries = OrderedDict()        # {(n, k): binomial coefficient}, ordered from least to most recently used.
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, n, k):
+        '''
+        Returns the binomial coefficient n! / [k! * (n - k)!].
+        Note that n >= k >= 0.
+        '''
+        entry = self.entries.get((n, k))
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end((n, k))    # Mark as most recently used.
+            return entry
+
+        if not (check_positive_int(k) and check_positive_int(n) and k <= n):
+            raise ValueError("only positive integers which fulfil n >= k >= 0.")
+        self.misses += 1
+        entry = comb(n, k)
+        self.entries[(n, k)] = entry
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)     # Evict the least recently used coefficient.
+        return entry
+
+    def copy(self):
+        '''
+        Returns an independent copy of the cache, e.g. for a calculation on another thread.
+        '''
+        new_cache = Binomial_Cache(self.max_entries)
+        new_cache.entries = OrderedDict(self.entries)
+        new_cache.hits = self.hits
+        new_cache.misses = self.misses
+        return new_cache
+
+    def clear(self):
+        '''
+        Removes all memoized coefficients and resets the statistics.
+        '''
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def get_stats(self):
+        '''
+        Returns the statistics of the cache as a dict.
+        '''
+        calls = self.hits + self.misses
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "hit rate": self.hits / calls if calls else 0.0,
+                "entries": len(self.entries),
+                "max entries": self.max_entries}
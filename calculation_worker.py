@@ -0,0 +1,83 @@
+'''
+This module defines the Calculation_Worker class.
+'''
+
+# Imports.
+import queue
+import threading
+from model_hypgeo import Calculation_Cancelled
+
+# Classes.
+class Calculation_Worker():
+    '''
+    Runs calculations of a model copy on a worker thread, so the Tk mainloop never freezes.
+
+    The worker never touches tkinter. The thread of the GUI asks for finished jobs with poll(),
+    so the result is handed back to it. Only the latest submitted job is delivered; older jobs are cancelled.
+    '''
+    def __init__(self):
+        self.job_id = 0                 # Id of the latest job. Results of other jobs are stale.
+        self.model = None               # Model copy of the latest job.
+        self.cancel_event = None        # Cancel event of the latest job.
+        self.finished = queue.Queue()   # (job_id, model, error) of all jobs which have finished.
+
+    def submit(self, model):
+        '''
+        Cancels the running job and starts calculating model.compute() on a new worker thread.
+        '''
+        self.cancel()
+        self.job_id += 1
+        self.model = model
+        self.cancel_event = threading.Event()
+        model.cancel_event = self.cancel_event
+        thread = threading.Thread(target=self.run, args=(self.job_id, model), daemon=True)
+        thread.start()
+
+    def run(self, job_id, model):
+        '''
+        Target of the worker thread.
+        '''
+        try:
+            model.compute()
+            self.finished.put((job_id, model, None))
+        except Calculation_Cancelled:
+            pass
+        except Exception as error:
+            self.finished.put((job_id, model, error))
+
+    def cancel(self):
+        '''
+        Cancels the running job. Returns True if there was one.
+        '''
+        if self.model is None:
+            return False
+        self.cancel_event.set()
+        self.model = None
+        self.cancel_event = None
+        return True
+
+    def is_busy(self):
+        return self.model is not None
+
+    def get_progress(self):
+        '''
+        Returns the progress of the running job between 0.0 and 1.0.
+        '''
+        if self.model is None:
+            return 0.0
+        return self.model.get_progress()
+
+    def poll(self):
+        '''
+        Returns (model, error) of the latest job once it has finished, else None.
+        Stale results of cancelled jobs are discarded.
+        '''
+        while True:
+            try:
+                job_id, model, error = self.finished.get_nowait()
+            except queue.Empty:
+                return None
+            if job_id == self.job_id and model is self.model:
+                self.model = None
+                self.cancel_event = None
+                return model, error
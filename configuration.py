@@ -0,0 +1,78 @@
+'''
+This module defines the Group and Configuration classes.
+
+Group is the mutable group of a Model_Hypgeo, Configuration is an immutable snapshot of a whole
+configuration (deck size, sample size and all groups), e.g. for worker processes and cache keys.
+'''
+
+# Imports.
+from collections import namedtuple
+
+# Classes.
+class Group():
+    '''
+    A group of cards: card_count cards are in the deck, at least min_in_sample and at most max_in_sample of them must be in the sample.
+    The attributes are stored in __slots__, so a group needs less memory than a [card_count, min_in_sample, max_in_sample] list.
+    A group can be unpacked: card_count, min_in_sample, max_in_sample = group
+    '''
+    __slots__ = ("card_count", "min_in_sample", "max_in_sample")
+
+    def __init__(self, card_count=0, min_in_sample=0, max_in_sample=0):
+        self.card_count = card_count
+        self.min_in_sample = min_in_sample
+        self.max_in_sample = max_in_sample
+
+    def __iter__(self):
+        yield self.card_count
+        yield self.min_in_sample
+        yield self.max_in_sample
+
+    def __repr__(self):
+        return "Group(" + str(self.card_count) + ", " + str(self.min_in_sample) + ", " + str(self.max_in_sample) + ")"
+
+    def get_highest(self, sample_size):
+        '''
+        Returns the highest number of cards of the group that can be in a sample of sample_size cards.
+        '''
+        return min(self.card_count, self.max_in_sample, sample_size)
+
+    def get_slot_sizes(self, sample_size):
+        '''
+        Returns all possible numbers of cards of the group in a sample of sample_size cards as a range.
+        '''
+        return range(self.min_in_sample, self.get_highest(sample_size) + 1)
+
+    def to_tuple(self):
+        return (self.card_count, self.min_in_sample, self.max_in_sample)
+
+    def copy(self):
+        return Group(self.card_count, self.min_in_sample, self.max_in_sample)
+
+class Configuration(namedtuple("Configuration", ("deck_size", "sample_size", "groups"))):
+    '''
+    Immutable snapshot of a configuration. groups is a tuple of (card_count, min_in_sample, max_in_sample) tuples.
+
+    It only consists of tuples of ints, so it is hashable, can be shared instead of copied
+    and is pickled compactly when it is sent to worker processes.
+    '''
+    __slots__ = ()
+
+    @classmethod
+    def from_groups(cls, deck_size, sample_size, groups):
+        '''
+        Creates a Configuration from an iterable of Groups or [card_count, min_in_sample, max_in_sample] lists.
+        '''
+        return cls(deck_size, sample_size, tuple(tuple(group) for group in groups))
+
+    def get_unassigned_cards(self):
+        return self.deck_size - sum(group[0] for group in self.groups)
+
+    def canonical(self):
+        '''
+        Returns the Configuration which is equal for all configurations with the same probability.
+        The order of the groups doesn't matter, max_in_sample is capped like in the engines and
+        groups that can't change the result (no cards and min_in_sample = 0) are dropped.
+        '''
+        groups = sorted((card_count, min_in_sample, min(card_count, max_in_sample, self.sample_size))
+                        for card_count, min_in_sample, max_in_sample in self.groups if card_count != 0 or min_in_sample != 0)
+        return Configuration(self.deck_size, self.sample_size, tuple(groups))
@@ -3,73 +3,140 @@ This module defines the Controll class.
 '''
 
 # Imports.
-import copy
 import json
+from calculation_worker import Calculation_Worker
 from model_hypgeo import Model_Hypgeo
+from result_cache import Result_Cache
 from view import View
 
+# Constants.
+GUI_COST_BUDGET = 10 ** 8       # Highest estimated cost (see Model_Hypgeo.estimate_costs()) of a calculation started in the GUI.
+
 # Classes.
 class Controller:
     '''
     Controlls the interaction from the user with the View and Model class.
     '''
     def __init__(self):
-        self.model = copy.deepcopy(Model_Hypgeo())  # Model of the system, contains logic aspects.
+        self.model = Model_Hypgeo()                 # Model of the system, contains logic aspects.
+        self.worker = Calculation_Worker()          # Calculates on a worker thread, so the GUI doesn't freeze.
+        self.model.set_result_cache(Result_Cache("result_cache.sqlite"))    # Results of earlier sessions.
+        self.model.set_engine("auto")               # The planner picks the cheapest engine for every calculation.
+        self.model.set_cost_budget(GUI_COST_BUDGET)  # Refuse calculations that would take minutes instead of freezing the buttons.
         self.view = View(self.model, self)          # View of the system, contians visual aspects.
 
     def on_deck_size(self, value):
-        if value == "":
-            self.model.set_deck_size(0)
-        else:
-            self.model.set_deck_size(int(value))
+        with self.model.batch():
+            self.cancel_stale_calculation()
+            if value == "":
+                self.model.set_deck_size(0)
+            else:
+                self.model.set_deck_size(int(value))
 
     def on_sample_size(self, value):
-        if value == "":
-            self.model.set_deck_size(0)
-        else:
-            self.model.set_sample_size(int(value))
+        with self.model.batch():
+            self.cancel_stale_calculation()
+            if value == "":
+                self.model.set_deck_size(0)
+            else:
+                self.model.set_sample_size(int(value))
 
     def on_calculate(self):
         '''
-        Calculate the probability of drawing the hand the user set up.
+        Calculate the probability of drawing the hand the user set up on the worker thread.
+        The view has to call on_poll_calculation() until the calculation has finished.
+        '''
+        model = self.model.begin_calculation()
+        if model is not None:                       # None: Served from the result cache.
+            self.worker.submit(model)
+
+    def on_poll_calculation(self):
+        '''
+        Hands the result of a finished calculation to the model, else reports the progress.
+        Returns True while the calculation is still running.
+        '''
+        if not self.worker.is_busy():
+            return False
+        finished = self.worker.poll()
+        if finished is None:
+            self.model.report_progress(self.worker.get_progress())
+            return True
+        model, error = finished
+        if error is not None:
+            self.model.cancel_calculation()
+            raise error
+        self.model.finish_calculation(model)
+        return False
+
+    def on_cancel_calculation(self):
+        '''
+        Cancels the running calculation.
+        '''
+        if self.worker.cancel():
+            self.model.cancel_calculation()
+
+    def cancel_stale_calculation(self):
+        '''
+        The user edited the inputs, so the result of a running calculation would be stale.
+        '''
+        self.on_cancel_calculation()
+
+    def on_calculate_curve(self):
         '''
-        self.model.calculate()
+        Calculate the probability of drawing the hand the user set up for every sample size up to the current one.
+        '''
+        self.model.calculate_curve(self.model.get_sample_size())
 
     def on_add_group(self):
         '''
         Adds a new group.
         '''
+        self.cancel_stale_calculation()
         self.model.add_defined_group()
 
     def on_del_group(self, key):
         '''
         Deletes a group.
         '''
+        self.cancel_stale_calculation()
         self.model.del_defined_group(key)
 
+    def on_group_name(self, key, value):
+        '''
+        Changes a groups name.
+        '''
+        with self.model.batch():
+            self.model.set_group_name(key, value)
+
     def on_group_size(self, key, value):
         '''
         Changes a groups size.
         '''
-        if value == "":
-            self.model.set_defined_group_size(key, 0)
-        else:
-            self.model.set_defined_group_size(key, int(value))
+        with self.model.batch():           # One edit is validated in one round.
+            self.cancel_stale_calculation()
+            if value == "":
+                self.model.set_defined_group_size(key, 0)
+            else:
+                self.model.set_defined_group_size(key, int(value))
 
     def on_group_min(self, key, value):
         '''
         Changes a groups min in sample.
         '''
-        if value == "":
-            self.model.set_defined_group_size(key, 0)
-        else:
-            self.model.set_defined_group_min(key, int(value))
+        with self.model.batch():           # One edit is validated in one round.
+            self.cancel_stale_calculation()
+            if value == "":
+                self.model.set_defined_group_size(key, 0)
+            else:
+                self.model.set_defined_group_min(key, int(value))
 
     def on_group_max(self, key, value):
         '''
         Changes a groups max in sample.
         '''
-        if value == "":
-            self.model.set_defined_group_size(key, 0)
-        else:
-            self.model.set_defined_group_max(key, int(value))
+        with self.model.batch():           # One edit is validated in one round.
+            self.cancel_stale_calculation()
+            if value == "":
+                self.model.set_defined_group_size(key, 0)
+            else:
+                self.model.set_defined_group_max(key, int(value))
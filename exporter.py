@@ -0,0 +1,156 @@
+'''
+Exports scenarios (configurations and their probability) to Excel or CSV files.
+
+Appending to an existing workbook would mean loading and saving the whole file, which gets slower
+the bigger the file grows. So rows are only ever appended to CSV files, which costs the same for any
+file size: Exporting to an existing .xlsx file appends to its CSV sidecar, merge_sidecar() moves
+the sidecar into the workbook (keeping its other sheets and formatting). New workbooks are written in
+openpyxl's write-only (streaming) mode.
+
+Included are:
+- scenario_rows(deck_size, sample_size, groups, result, names)
+- export_scenarios(path, scenarios, create_new)
+- get_sidecar_path(path)
+- merge_sidecar(path)
+- export_grid(path, deck_sizes, sample_sizes, grid)
+'''
+
+# Imports.
+import csv
+import os
+import re
+
+# Constants.
+INTEGER = re.compile(r"[+-]?\d+")
+DECIMAL = re.compile(r"[+-]?(\d+\.\d*|\.\d+)([eE][+-]?\d+)?")     # An exponent only counts after a decimal point, so "1e5" stays text.
+
+# Methods.
+def scenario_rows(deck_size, sample_size, groups, result, names=None):
+    '''
+    Returns the rows of one scenario as a list, in the layout of the GUI export.
+    groups: List of [card_count, min_in_sample, max_in_sample] or Groups. names: Optional list of group names.
+    '''
+    rows = [[],
+            [],
+            ["deck size", deck_size],
+            ["sample size", sample_size],
+            []]
+    for index, (card_count, min_in_sample, max_in_sample) in enumerate(groups):
+        rows.extend([[names[index] if names else ""],
+                     ["cards in deck", card_count],
+                     ["min. in sample", min_in_sample],
+                     ["max. in sample", max_in_sample],
+                     []])
+    rows.append(["probability", result])
+    return rows
+
+def get_sidecar_path(path):
+    '''
+    Returns the path of the CSV file which collects the rows exported to the workbook at path.
+    '''
+    return os.path.splitext(path)[0] + "_export.csv"
+
+def append_csv(path, scenarios, create_new=False):
+    '''
+    Appends the rows of all scenarios to a CSV file. Only the new rows are written.
+    '''
+    with open(path, "w" if create_new else "a", newline="") as write_csv:
+        writer = csv.writer(write_csv)
+        for rows in scenarios:
+            writer.writerows([format_cell(value) for value in row] for row in rows)
+
+def write_workbook(path, rows):
+    '''
+    Writes rows to a new workbook in write-only mode, so rows are streamed to the file instead of kept in memory.
+    '''
+    from openpyxl import Workbook          # Imported on demand, so openpyxl doesn't slow down the start of the program.
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    wb.close()
+
+def export_scenarios(path, scenarios, create_new=False):
+    '''
+    Exports many scenarios in one call and returns the path of the file that was written.
+    scenarios: Iterable of row lists, e.g. of scenario_rows(). It is consumed lazily.
+
+    .csv files: The rows are appended (or a new file is created).
+    .xlsx files: create_new writes a new workbook, else the rows are appended to the CSV sidecar of the workbook.
+    '''
+    if path.lower().endswith(".csv"):
+        append_csv(path, scenarios, create_new)
+        return path
+    if create_new:
+        write_workbook(path, (row for rows in scenarios for row in rows))
+        sidecar_path = get_sidecar_path(path)
+        if os.path.exists(sidecar_path):
+            os.remove(sidecar_path)        # The sidecar belonged to the replaced workbook.
+        return path
+    sidecar_path = get_sidecar_path(path)
+    append_csv(sidecar_path, scenarios)
+    return sidecar_path
+
+def merge_sidecar(path):
+    '''
+    Moves the rows of the CSV sidecar into the first sheet of the workbook at path.
+    The workbook is loaded in normal mode, so its other sheets, formulas, styles and column widths are kept.
+    It is saved to a temporary file first, which replaces the workbook only if saving succeeded.
+    Numbers from the CSV file are written as numbers again.
+    '''
+    sidecar_path = get_sidecar_path(path)
+    if not os.path.exists(sidecar_path):
+        return
+    if not os.path.exists(path):
+        with open(sidecar_path, "r", newline="") as read_csv:
+            write_workbook(path, ([parse_number(value) for value in row] for row in csv.reader(read_csv)))
+        os.remove(sidecar_path)
+        return
+
+    from openpyxl import load_workbook     # Imported on demand, so openpyxl doesn't slow down the start of the program.
+    wb = load_workbook(path)
+    ws = wb.worksheets[0]
+    with open(sidecar_path, "r", newline="") as read_csv:
+        for row in csv.reader(read_csv):
+            ws.append([parse_number(value) for value in row])
+    temporary_path = path + ".tmp.xlsx"
+    wb.save(temporary_path)
+    wb.close()
+    os.replace(temporary_path, path)
+    os.remove(sidecar_path)
+
+def export_grid(path, deck_sizes, sample_sizes, grid):
+    '''
+    Writes a table of Model_Hypgeo.calculate_grid() to a new .xlsx (write-only mode) or .csv file and returns path.
+    The first row holds the sample sizes, the first column the deck sizes. Cells with a sample bigger than the deck stay empty.
+    '''
+    rows = [["deck size \\ sample size"] + list(sample_sizes)]
+    rows.extend([deck_size] + ["" if cell is None else cell for cell in row] for deck_size, row in zip(deck_sizes, grid))
+    if path.lower().endswith(".csv"):
+        append_csv(path, [rows], create_new=True)
+    else:
+        write_workbook(path, rows)
+    return path
+
+def format_cell(value):
+    '''
+    Converts a value to the text of a CSV cell. Floats always get a decimal point (1e-05 -> 1.0e-05), so parse_number() reads them back.
+    '''
+    if isinstance(value, float):
+        text = repr(value)
+        if "e" in text and "." not in text:
+            text = text.replace("e", ".0e")
+        return text
+    return value
+
+def parse_number(value):
+    '''
+    Converts a value of a CSV file back to an int or float, if it is written as an integer or a decimal number.
+    Other texts like "nan", "inf" or "1e5" stay texts.
+    '''
+    if INTEGER.fullmatch(value):
+        return int(value)
+    if DECIMAL.fullmatch(value):
+        return float(value)
+    return value
@@ -0,0 +1,137 @@
+'''
+This module defines the Fold_Cache class.
+'''
+
+# Classes.
+class Fold_Cache():
+    '''
+    Keeps the intermediate results of folding the groups of a model into a coefficient vector.
+
+    Every group has a coefficient vector (its partial distribution). The vectors are folded pairwise
+    in a balanced tree, and every node of the tree is kept, keyed by the group keys it covers.
+    When a group changes, it is marked dirty: Only its vector and the nodes above it are recomputed,
+    which are log2(groups) folds instead of folding all groups again.
+    '''
+    def __init__(self):
+        self.truncation = None          # All vectors are truncated at this number of drawn cards.
+        self.group_vectors = {}         # {group key: coefficient vector of this group}
+        self.nodes = {}                 # {tuple of group keys: coefficient vector of these groups folded}
+        self.dirty_groups = set()       # Keys of the groups which changed since the last fold.
+        self.node_count = 0             # Number of nodes of the tree in the running fold.
+        self.stats = {"group vectors": 0, "folds": 0, "reused": 0, "operations": 0}   # Computed vectors, folded nodes, reused nodes and multiply-adds of the folds since the cache was created.
+
+    def mark_dirty(self, key):
+        '''
+        Marks the group of key as changed.
+        '''
+        self.dirty_groups.add(key)
+
+    def set_truncation(self, truncation):
+        '''
+        Truncates all vectors at truncation drawn cards. A new truncation changes every vector, so all intermediate results are forgotten.
+        '''
+        if truncation != self.truncation:
+            self.clear()
+            self.truncation = truncation
+
+    def clear(self):
+        '''
+        Forgets all intermediate results.
+        '''
+        self.group_vectors.clear()
+        self.nodes.clear()
+        self.dirty_groups.clear()
+
+    def copy(self):
+        '''
+        Returns an independent copy of the cache, e.g. for a calculation on another thread.
+        The vectors themselves are never changed in place, so they are shared.
+        '''
+        new_cache = Fold_Cache()
+        new_cache.truncation = self.truncation
+        new_cache.group_vectors = dict(self.group_vectors)
+        new_cache.nodes = dict(self.nodes)
+        new_cache.dirty_groups = set(self.dirty_groups)
+        new_cache.stats = dict(self.stats)
+        return new_cache
+
+    def fold(self, keys, truncation, group_vector, check_cancelled=None):
+        '''
+        Returns the coefficient vector of all groups of keys folded together.
+        group_vector(key, truncation): Calculates the coefficient vector of one group.
+        check_cancelled(progress): Called before every fold, may raise to stop the calculation.
+        '''
+        self.set_truncation(truncation)
+        for key in self.dirty_groups:
+            self.group_vectors.pop(key, None)
+        if self.dirty_groups:
+            self.nodes = {node: vector for node, vector in self.nodes.items() if self.dirty_groups.isdisjoint(node)}
+            self.dirty_groups.clear()
+
+        used_nodes = {}
+        self.node_count = 2 * len(keys) - 1                             # Number of nodes of the tree, for the progress.
+        vector = self.fold_node(tuple(keys), group_vector, check_cancelled, used_nodes)
+        self.nodes = used_nodes                                         # Nodes of deleted groups or old tree shapes are dropped.
+        for key in list(self.group_vectors):
+            if key not in keys:
+                del self.group_vectors[key]
+        return vector
+
+    def fold_node(self, node, group_vector, check_cancelled, used_nodes):
+        '''
+        Returns the coefficient vector of the groups of node. Recursively splits node in two halves.
+        '''
+        if node in self.nodes:
+            self.stats["reused"] += 1
+            self.keep_node(node, used_nodes)
+            return self.nodes[node]
+
+        if len(node) == 0:
+            vector = [1] + [0] * self.truncation                        # There is exactly one way to draw 0 cards from no groups.
+        elif len(node) == 1:
+            key = node[0]
+            if key not in self.group_vectors:
+                self.group_vectors[key] = group_vector(key, self.truncation)
+                self.stats["group vectors"] += 1
+            vector = self.group_vectors[key]
+        else:
+            middle = len(node) // 2
+            left = self.fold_node(node[:middle], group_vector, check_cancelled, used_nodes)
+            right = self.fold_node(node[middle:], group_vector, check_cancelled, used_nodes)
+            if check_cancelled is not None:
+                check_cancelled(len(used_nodes) / self.node_count)
+            vector = self.fold_vectors(left, right)
+            self.stats["folds"] += 1
+        used_nodes[node] = vector
+        return vector
+
+    def keep_node(self, node, used_nodes):
+        '''
+        Keeps a reused node and all nodes below it, so they can be reused when a group of node changes.
+        '''
+        if node in self.nodes:
+            used_nodes[node] = self.nodes[node]
+            if len(node) > 1:
+                middle = len(node) // 2
+                self.keep_node(node[:middle], used_nodes)
+                self.keep_node(node[middle:], used_nodes)
+
+    def fold_vectors(self, left, right):
+        '''
+        Folds two coefficient vectors (truncated polynomial multiplication) and returns the result.
+        Zero coefficients are skipped, so narrow groups fold fast.
+        '''
+        folded = [0] * (self.truncation + 1)
+        right_terms = [(drawn, ways) for drawn, ways in enumerate(right) if ways != 0]
+        for drawn_left, ways_left in enumerate(left):
+            if ways_left == 0:
+                continue
+            self.stats["operations"] += len(right_terms)
+            for drawn_right, ways_right in right_terms:
+                if drawn_left + drawn_right > self.truncation:          # Truncate: You can't draw more cards than the sample.
+                    break
+                folded[drawn_left + drawn_right] += ways_left * ways_right
+        return folded
+
+    def get_stats(self):
+        return dict(self.stats, nodes=len(self.nodes))
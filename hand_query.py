@@ -0,0 +1,285 @@
+'''
+Small query language for hands which can't be described with one [min, max] window per group.
+
+Examples:
+    (A >= 2 and B >= 1) or C >= 1
+    A + B >= 3 and not D == 0
+
+Grammar:
+    query      := clause ("or" clause)*
+    clause     := factor ("and" factor)*
+    factor     := "not" factor | "(" query ")" | comparison
+    comparison := name ("+" name)* operator integer
+    operator   := ">=" | "<=" | "==" | "!=" | ">" | "<"
+
+A name stands for the cards of a group in the sample, a sum of names for the cards of all these groups.
+Only the card_count of the groups is used, their min_in_sample and max_in_sample are ignored.
+
+A query is compiled once into a Hand_Query: Equal comparisons become one atom, atoms over the same
+groups share one term (the sum of their cards in the sample) and the formula is simplified.
+Evaluating it is a dynamic program over the groups: A state holds the drawn cards, the sums of the
+terms that are still needed and the rest of the formula after all atoms that are already decided
+were replaced by True or False. States with a True formula are finished at once (the other groups
+are lumped into the rest), states with a False formula are dropped.
+
+Included are:
+- Hand_Query(text, names)
+- Hand_Query.evaluate(group_sizes, deck_size, sample_size, binomial)
+'''
+
+# Imports.
+import re
+from math import comb
+
+# Constants.
+TOKEN = re.compile(r"\s*(?:(\d+)|([A-Za-z_]\w*)|(>=|<=|==|!=|>|<|\+|\(|\)))")
+KEYWORDS = ("and", "or", "not")
+
+# Classes.
+class Hand_Query():
+    '''
+    Compiled hand query.
+
+    Formulas are nested tuples: ("atom", index), ("not", formula), ("and", formulas), ("or", formulas), True or False.
+    self.atoms[index] = (term index, lowest, highest), highest is None if there is no upper bound.
+    self.terms[index] = tuple of the group keys whose cards are summed up.
+    '''
+    def __init__(self, text, names):
+        '''
+        Compiles text. names: {name: group key}. Raises ValueError if the query is invalid.
+        '''
+        self.text = text
+        self.names = names
+        self.terms = []
+        self.atoms = []
+        self.substitutions = {}     # Memoized self.substitute().
+        self.open_atoms = {}        # Memoized self.get_open_atoms().
+        self.tokens = self.tokenize(text)
+        self.position = 0
+        self.formula = self.parse_query()
+        if self.position != len(self.tokens):
+            raise ValueError("unexpected " + repr(self.tokens[self.position]) + " in query")
+        del self.tokens
+
+    def tokenize(self, text):
+        tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = TOKEN.match(text, position)
+            if match is None:
+                raise ValueError("invalid character " + repr(text[position:].strip()[0]) + " in query")
+            number, name, symbol = match.groups()
+            if number is not None:
+                tokens.append(int(number))
+            elif name is not None:
+                tokens.append(name.lower() if name.lower() in KEYWORDS else ("name", name))
+            else:
+                tokens.append(symbol)
+            position = match.end()
+        return tokens
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self, expected=None):
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            raise ValueError("expected " + repr(expected or "more") + " in query, got " + repr(token))
+        self.position += 1
+        return token
+
+    def parse_query(self):
+        clauses = [self.parse_clause()]
+        while self.peek() == "or":
+            self.take()
+            clauses.append(self.parse_clause())
+        return self.combine("or", clauses)
+
+    def parse_clause(self):
+        factors = [self.parse_factor()]
+        while self.peek() == "and":
+            self.take()
+            factors.append(self.parse_factor())
+        return self.combine("and", factors)
+
+    def parse_factor(self):
+        token = self.peek()
+        if token == "not":
+            self.take()
+            return self.negate(self.parse_factor())
+        if token == "(":
+            self.take()
+            formula = self.parse_query()
+            self.take(")")
+            return formula
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        keys = []
+        while True:
+            token = self.take()
+            if not isinstance(token, tuple):
+                raise ValueError("expected a group name in query, got " + repr(token))
+            if token[1] not in self.names:
+                raise ValueError("unknown group name " + repr(token[1]) + " in query")
+            key = self.names[token[1]]
+            if key in keys:
+                raise ValueError("group " + repr(token[1]) + " is summed up twice in query")
+            keys.append(key)
+            if self.peek() != "+":
+                break
+            self.take()
+        operator = self.take()
+        value = self.take()
+        if operator not in (">=", "<=", "==", "!=", ">", "<") or not isinstance(value, int):
+            raise ValueError("expected a comparison with an integer in query")
+        lowest, highest = {">=": (value, None), ">": (value + 1, None), "<=": (0, value), "<": (0, value - 1),
+                           "==": (value, value), "!=": (value, value)}[operator]
+        atom = self.get_atom(tuple(sorted(keys)), lowest, highest)
+        return self.negate(atom) if operator == "!=" else atom
+
+    def get_atom(self, term, lowest, highest):
+        '''
+        Returns the formula of the atom "lowest <= sum of term <= highest". Equal atoms and terms are shared.
+        '''
+        if highest is not None and highest < lowest:
+            return False
+        if lowest <= 0 and highest is None:
+            return True
+        if term not in self.terms:
+            self.terms.append(term)
+        atom = (self.terms.index(term), max(lowest, 0), highest)
+        if atom not in self.atoms:
+            self.atoms.append(atom)
+        return ("atom", self.atoms.index(atom))
+
+    def negate(self, formula):
+        if isinstance(formula, bool):
+            return not formula
+        if formula[0] == "not":
+            return formula[1]
+        return ("not", formula)
+
+    def combine(self, operator, formulas):
+        '''
+        Returns the simplified "and"/"or" of formulas: Nested equal operators are flattened, duplicates and neutral elements removed.
+        '''
+        absorbing = operator == "or"        # True absorbs "or", False absorbs "and".
+        children = []
+        for formula in formulas:
+            if isinstance(formula, bool):
+                if formula == absorbing:
+                    return absorbing
+                continue
+            for child in (formula[1] if formula[0] == operator else (formula,)):
+                if child not in children:
+                    children.append(child)
+        if len(children) == 0:
+            return not absorbing
+        if len(children) == 1:
+            return children[0]
+        return (operator, tuple(children))
+
+    def substitute(self, formula, values):
+        '''
+        Replaces the atoms in values ({atom index: bool}, as a sorted tuple of items) and returns the simplified formula.
+        '''
+        key = (formula, values)
+        result = self.substitutions.get(key)
+        if result is None:
+            if isinstance(formula, bool):
+                result = formula
+            elif formula[0] == "atom":
+                result = dict(values).get(formula[1], formula)
+            elif formula[0] == "not":
+                result = self.negate(self.substitute(formula[1], values))
+            else:
+                result = self.combine(formula[0], [self.substitute(child, values) for child in formula[1]])
+            self.substitutions[key] = result
+        return result
+
+    def get_open_atoms(self, formula):
+        '''
+        Returns the indices of the atoms in formula as a tuple.
+        '''
+        atoms = self.open_atoms.get(formula)
+        if atoms is None:
+            if isinstance(formula, bool):
+                atoms = ()
+            elif formula[0] == "atom":
+                atoms = (formula[1],)
+            elif formula[0] == "not":
+                atoms = self.get_open_atoms(formula[1])
+            else:
+                atoms = tuple(sorted(set(atom for child in formula[1] for atom in self.get_open_atoms(child))))
+            self.open_atoms[formula] = atoms
+        return atoms
+
+    def evaluate(self, group_sizes, deck_size, sample_size, binomial=comb):
+        '''
+        Returns (dividend, divisor) of the probability that a sample of sample_size cards satisfies the query.
+        group_sizes: {group key: card_count} of all groups, binomial: Function (n, k) -> binomial coefficient.
+        Raises ValueError if a name of the query stands for a group that isn't in group_sizes (e.g. it was deleted after compiling).
+        '''
+        for name, key in self.names.items():
+            if key not in group_sizes and any(key in term for term in self.terms):
+                raise ValueError("group " + repr(name) + " of query doesn't exist")
+        caps = [0] * len(self.terms)        # Higher sums of a term don't change any atom, so they are capped.
+        for term, lowest, highest in self.atoms:
+            caps[term] = max(caps[term], lowest if highest is None else highest + 1)
+        order = [key for key in group_sizes if any(key in term for term in self.terms)]
+        capacities = []                     # capacities[index][term]: Cards of the term in the groups after order[index].
+        remaining = []                      # remaining[index]: Cards of the deck that aren't in the groups up to order[index].
+        cards = deck_size
+        for index, key in enumerate(order):
+            cards -= group_sizes[key]
+            remaining.append(cards)
+            capacities.append([sum(group_sizes[later] for later in order[index + 1:] if later in term) for term in self.terms])
+        initial_capacities = [sum(group_sizes[key] for key in term) for term in self.terms]
+
+        dividend = 0
+        formula = self.decide(self.formula, [0] * len(self.terms), initial_capacities)
+        if formula is True:
+            return binomial(deck_size, sample_size), binomial(deck_size, sample_size)
+        states = {} if formula is False else {(0, (0,) * len(self.terms), formula): 1}
+        for index, key in enumerate(order):
+            card_count = group_sizes[key]
+            group_terms = [term for term in range(len(self.terms)) if key in self.terms[term]]
+            new_states = {}
+            for (drawn, sums, formula), ways in states.items():
+                for in_sample in range(min(card_count, sample_size - drawn) + 1):
+                    new_sums = list(sums)
+                    for term in group_terms:
+                        new_sums[term] = min(sums[term] + in_sample, caps[term])
+                    new_formula = self.decide(formula, new_sums, capacities[index])
+                    if new_formula is False:
+                        continue
+                    new_ways = ways * binomial(card_count, in_sample)
+                    size_rest = sample_size - drawn - in_sample
+                    if new_formula is True:
+                        if size_rest <= remaining[index]:
+                            dividend += new_ways * binomial(remaining[index], size_rest)    # The other groups are lumped into the rest.
+                        continue
+                    needed_terms = set(self.atoms[atom][0] for atom in self.get_open_atoms(new_formula))
+                    state = (drawn + in_sample, tuple(new_sums[term] if term in needed_terms else 0 for term in range(len(self.terms))), new_formula)
+                    new_states[state] = new_states.get(state, 0) + new_ways
+            states = new_states
+        return dividend, binomial(deck_size, sample_size)
+
+    def decide(self, formula, sums, capacities):
+        '''
+        Replaces the atoms of formula that are decided by the term sums, whatever the other groups add, and returns the new formula.
+        capacities[term]: Most cards the groups that weren't drawn yet can add to the term.
+        '''
+        values = []
+        for atom in self.get_open_atoms(formula):
+            term, lowest, highest = self.atoms[atom]
+            total = sums[term]
+            if (highest is not None and total > highest) or total + capacities[term] < lowest:
+                values.append((atom, False))
+            elif total >= lowest and (highest is None or total + capacities[term] <= highest):
+                values.append((atom, True))
+        if not values:
+            return formula
+        return self.substitute(formula, tuple(values))
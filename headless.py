@@ -0,0 +1,139 @@
+'''
+Calculate probabilities without the GUI.
+
+This module only imports the model, so it neither needs tkinter nor openpyxl
+and starts fast on servers without a display. sqlite3 and the process pool of
+the "parallel" engine are only imported when they are used.
+
+Usage as a library:
+    from headless import calculate_probability
+    calculate_probability(60, 7, [[4, 1, 4], [10, 0, 2]])
+
+Usage from the command line:
+    python -m headless --deck-size 60 --sample-size 7 --group 4 1 4 --group 10 0 2
+'''
+
+# Imports.
+import json
+from hand_query import Hand_Query
+from model_hypgeo import Model_Hypgeo, ENGINES, ARITHMETICS
+from observer_subject import Observer
+
+# Classes.
+class Error_Collector(Observer):
+    '''
+    Observer which collects all events of a model that report invalid input.
+    '''
+    def __init__(self):
+        self.errors = []
+
+    def update(self, event_code, **kwargs):
+        if event_code.startswith("invalid") or event_code.endswith("error"):
+            self.errors.append(event_code)
+
+# Methods.
+def build_model(deck_size, sample_size, groups, engine="enumeration", arithmetic="auto", binomial_cache=None):
+    '''
+    Creates a Model_Hypgeo with the given configuration and returns it.
+    groups: Iterable of [card_count, min_in_sample, max_in_sample].
+    binomial_cache: Optional Binomial_Cache shared by many models, e.g. when calculating many configurations in a row.
+    The same rules as in the GUI apply. Raises ValueError with all violated rules if the configuration is invalid.
+    '''
+    model = Model_Hypgeo()
+    if binomial_cache is not None:
+        model.binomial_cache = binomial_cache
+    collector = Error_Collector()
+    model.attach(collector)
+    model.set_engine(engine)
+    model.set_arithmetic(arithmetic)
+    model.set_deck_size(deck_size)
+    model.set_sample_size(sample_size)
+    for group in groups:
+        model.add_defined_group(*group)
+    if collector.errors:
+        raise ValueError(", ".join(collector.errors))
+    model.observers.discard(collector)
+    return model
+
+def calculate_probability(deck_size, sample_size, groups, engine="enumeration", arithmetic="auto"):
+    '''
+    Calculates the probability of drawing the configured hand and returns it.
+    '''
+    return build_model(deck_size, sample_size, groups, engine, arithmetic).calculate()
+
+def calculate_probability_turns(deck_size, hand_size, groups, turns, draws_per_turn=1, mulligans=0, keep=None):
+    '''
+    Calculates the probability of drawing the configured hand by every turn from 0 (opening hand) to turns and returns them as a list.
+    See Model_Hypgeo.calculate_turns().
+    '''
+    return build_model(deck_size, hand_size, groups).calculate_turns(turns, draws_per_turn, mulligans, keep)
+
+def calculate_probability_curve(deck_size, sample_size, groups):
+    '''
+    Calculates the probability of drawing the configured hand for every sample size from 0 to sample_size and returns them as a list.
+    '''
+    return build_model(deck_size, sample_size, groups).calculate_curve(sample_size)
+
+def main(argv=None):
+    '''
+    Command line interface. Prints the result as JSON.
+    '''
+    import argparse     # Imported on demand, so the library functions don't pay for it.
+    parser = argparse.ArgumentParser(prog="headless", description="Calculate the probability of drawing a sample hand from a deck.")
+    parser.add_argument("--deck-size", type=int, required=True, help="number of cards in the deck")
+    parser.add_argument("--sample-size", type=int, required=True, help="number of cards drawn")
+    parser.add_argument("--group", type=int, nargs=3, action="append", default=[], metavar=("CARDS", "MIN", "MAX"), help="cards of the group in the deck, min. and max. in sample (repeatable)")
+    parser.add_argument("--engine", choices=ENGINES, default="enumeration")
+    parser.add_argument("--arithmetic", choices=ARITHMETICS, default="auto")
+    parser.add_argument("--curve", action="store_true", help="print the probability for every sample size up to --sample-size")
+    parser.add_argument("--query", help="print the probability of a hand query instead, e.g. \"g0 + g1 >= 3 or g2 >= 1\" (groups are g0, g1, ... in order)")
+    parser.add_argument("--grid", type=int, nargs=4, metavar=("MIN_DECK", "MAX_DECK", "MIN_SAMPLE", "MAX_SAMPLE"),
+                        help="print the probability for every deck size and sample size in these ranges (the groups stay the same)")
+    parser.add_argument("--export", metavar="FILE", help="write the table of --grid to an .xlsx or .csv file")
+    parser.add_argument("--turns", type=int, help="print the probability for every turn up to TURNS, --sample-size is the opening hand")
+    parser.add_argument("--draws-per-turn", type=int, default=1, help="cards drawn every turn (with --turns)")
+    parser.add_argument("--mulligans", type=int, default=0, help="redraw hands that don't satisfy all groups with one card less, at most this often (with --turns)")
+    parser.add_argument("--budget", type=int, help="refuse calculations whose estimated cost (about the inner loop steps) is higher")
+    parser.add_argument("--profile", metavar="FILE", help="write the timing and counters of the calculation to a JSON file")
+    args = parser.parse_args(argv)
+
+    try:
+        model = build_model(args.deck_size, args.sample_size, args.group, args.engine, args.arithmetic)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.budget is not None:
+        model.set_cost_budget(args.budget)
+        if model.get_cost_budget() != args.budget:
+            parser.error("invalid budget")
+    if args.profile:
+        from profiling_observer import Profiling_Observer
+        profiler = Profiling_Observer()
+        model.attach(profiler)
+    if args.query is not None:
+        try:
+            query = Hand_Query(args.query, {"g" + str(key): key for key in model.get_defined_groups()})
+        except ValueError as error:
+            parser.error(str(error))
+        output = {"probability": model.calculate_query(query)}
+    elif args.grid is not None:
+        output = {"grid": model.calculate_grid(*args.grid)}
+        if output["grid"] is None:
+            parser.error("invalid grid ranges")
+        if args.export:
+            from exporter import export_grid
+            export_grid(args.export, range(args.grid[0], args.grid[1] + 1), range(args.grid[2], args.grid[3] + 1), output["grid"])
+    elif args.turns is not None:
+        output = {"turns": model.calculate_turns(args.turns, args.draws_per_turn, args.mulligans)}
+    elif args.curve:
+        output = {"curve": model.calculate_curve(args.sample_size)}
+    else:
+        output = {"probability": model.calculate(), "plan": model.get_plan()}
+        if output["plan"]["over budget"] and output["probability"] is None:
+            parser.error("estimated cost {} is above the budget".format(output["plan"]["estimated cost"]))
+    if args.profile:
+        profiler.dump(args.profile)
+    print(json.dumps(output))
+
+# Execute the command line interface only when this exact file is run.
+if __name__ == "__main__":
+    main()
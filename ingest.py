@@ -0,0 +1,161 @@
+'''
+Calculate the probabilities of many configurations stored in a file.
+
+The input is read and the results are written row by row, so the memory doesn't grow with the file.
+Every configuration is validated with the same rules as in the GUI (see headless.build_model());
+invalid rows are reported in the output instead of stopping the run.
+
+Input formats:
+    .csv:   deck_size,sample_size,cards,min,max[,cards,min,max,...]
+            A header row and lines starting with "#" are skipped. Empty cells at the end of a row are ignored,
+            an empty cell between values is an error.
+    .jsonl: {"deck_size": 60, "sample_size": 7, "groups": [[4, 1, 4], [10, 0, 2]], "id": "optional"}
+
+Output formats (by the extension of the output path, "-" is stdout as JSON lines):
+    .csv:   line,id,probability,error
+    else:   {"line": 1, "id": ..., "probability": 0.39} or {"line": 2, "id": ..., "error": "invalid deck size"}
+
+Usage:
+    python ingest.py decks.csv results.jsonl
+'''
+
+# Imports.
+import csv
+import json
+import sys
+from binomial_cache import Binomial_Cache
+from headless import build_model
+from model_hypgeo import ENGINES, ARITHMETICS
+
+# Methods.
+def read_csv(read_file):
+    '''
+    Yields (line, id, configuration, error) for every row of a CSV file.
+    configuration is (deck_size, sample_size, groups), or None if the row can't be parsed.
+    '''
+    for line, row in enumerate(csv.reader(read_file), start=1):
+        if not row or not "".join(row).strip() or row[0].lstrip().startswith("#"):
+            continue
+        cells = [value.strip() for value in row]
+        while not cells[-1]:
+            cells.pop()                     # Spreadsheets pad shorter rows with empty cells.
+        try:
+            values = [int(value) if value else None for value in cells]
+        except ValueError:
+            if line == 1:
+                continue                    # Header.
+            yield line, None, None, "not an integer"
+            continue
+        if None in values:                  # Skipping the cell would shift the later values into other fields.
+            yield line, None, None, "empty cell in column " + str(values.index(None) + 1)
+            continue
+        if len(values) < 2 or (len(values) - 2) % 3:
+            yield line, None, None, "needs deck size, sample size and three values per group"
+            continue
+        groups = [values[index:index + 3] for index in range(2, len(values), 3)]
+        yield line, None, (values[0], values[1], groups), None
+
+def read_jsonl(read_file):
+    '''
+    Yields (line, id, configuration, error) for every line of a JSON lines file.
+    '''
+    for line, text in enumerate(read_file, start=1):
+        if not text.strip():
+            continue
+        try:
+            entry = json.loads(text)
+            configuration = (entry["deck_size"], entry["sample_size"], [list(group) for group in entry.get("groups", [])])
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            yield line, None, None, "invalid entry: " + str(error)
+            continue
+        if not all(len(group) == 3 for group in configuration[2]):
+            yield line, entry.get("id"), None, "needs three values per group"
+            continue
+        yield line, entry.get("id"), configuration, None
+
+def read_configurations(read_file, file_format):
+    '''
+    Yields (line, id, configuration, error) for every configuration of an open file. file_format: "csv" or "jsonl".
+    '''
+    if file_format == "csv":
+        return read_csv(read_file)
+    return read_jsonl(read_file)
+
+def calculate_rows(rows, engine="enumeration", arithmetic="auto", result_cache=None):
+    '''
+    Calculates the probability of every configuration of rows (see read_configurations()) and yields a dict per row,
+    either with "probability" or with "error". All models share one Binomial_Cache and the optional Result_Cache,
+    so repeated deck sizes and repeated configurations are cheap.
+    '''
+    binomial_cache = Binomial_Cache()
+    for line, row_id, configuration, error in rows:
+        output = {"line": line, "id": row_id}
+        if error is None:
+            try:
+                model = build_model(*configuration, engine=engine, arithmetic=arithmetic, binomial_cache=binomial_cache)
+                model.set_result_cache(result_cache)
+                output["probability"] = model.calculate()
+            except ValueError as calculation_error:    # Invalid configuration, the message says what is wrong.
+                error = str(calculation_error)
+            except Exception as calculation_error:     # One bad row must not stop the run, e.g. a MemoryError or RecursionError of a huge configuration.
+                error = type(calculation_error).__name__ + ": " + str(calculation_error)
+        if error is not None:
+            output["error"] = error
+        yield output
+
+def get_format(path):
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+def ingest(input_path, output_path, engine="enumeration", arithmetic="auto", result_cache=None):
+    '''
+    Calculates every configuration of the file at input_path and writes the results to output_path ("-" for stdout).
+    Returns {"rows": int, "errors": int}.
+    '''
+    counts = {"rows": 0, "errors": 0}
+    output_format = "jsonl" if output_path == "-" else get_format(output_path)
+    with open(input_path, "r", newline="") as read_file:
+        write_file = sys.stdout if output_path == "-" else open(output_path, "w", newline="")
+        try:
+            if output_format == "csv":
+                writer = csv.writer(write_file)
+                writer.writerow(["line", "id", "probability", "error"])
+            rows = read_configurations(read_file, get_format(input_path))
+            for output in calculate_rows(rows, engine, arithmetic, result_cache):
+                counts["rows"] += 1
+                counts["errors"] += "error" in output
+                if output_format == "csv":
+                    writer.writerow([output["line"], "" if output["id"] is None else output["id"], output.get("probability", ""), output.get("error", "")])
+                else:
+                    write_file.write(json.dumps(output) + "\n")
+        finally:
+            if write_file is not sys.stdout:
+                write_file.close()
+    return counts
+
+def main(argv=None):
+    '''
+    Command line interface. Prints the number of rows and errors to stderr.
+    '''
+    import argparse     # Imported on demand, like in headless.py.
+    parser = argparse.ArgumentParser(prog="ingest", description="Calculate the probabilities of all configurations in a CSV or JSON lines file.")
+    parser.add_argument("input", help=".csv or .jsonl file with one configuration per line")
+    parser.add_argument("output", nargs="?", default="-", help=".csv or .jsonl file for the results (default: stdout)")
+    parser.add_argument("--engine", choices=ENGINES, default="enumeration")
+    parser.add_argument("--arithmetic", choices=ARITHMETICS, default="auto")
+    parser.add_argument("--cache", metavar="FILE", help="SQLite file of a Result_Cache, so repeated configurations aren't calculated again")
+    args = parser.parse_args(argv)
+
+    result_cache = None
+    if args.cache:
+        from result_cache import Result_Cache
+        result_cache = Result_Cache(args.cache)
+    try:
+        counts = ingest(args.input, args.output, args.engine, args.arithmetic, result_cache)
+    finally:
+        if result_cache is not None:
+            result_cache.close()
+    print(str(counts["rows"]) + " rows, " + str(counts["errors"]) + " errors", file=sys.stderr)
+
+# Execute the command line interface only when this exact file is run.
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,14 @@ Included are:
 - check_positiv_int(value)
 - faculty(n)
 - biomial_coefficient(n, k)
+- log_binomial_coefficient(n, k)
 - format_float(value, decimals, factor)
 - convert_dict_to_list(dictionary)
 '''
 
+# Imports.
+from math import lgamma
+
 # Methods.
 def check_positive_int(value):
     '''
@@ -55,9 +59,25 @@ def binomial_coefficient(n, k):
             dividend *= n
             divisor *= i
             n -= 1
-        return int(dividend / divisor)
+        return dividend // divisor                              # The division is exact, so integer division keeps the full precision.
+    else:
+        raise ValueError("only positive integers which fulfil n >= k >= 0.")
+
+def log_binomial_coefficient(n, k):
+    '''
+    Calculates the natural logarithm of the binomial coefficient with the log-gamma function.
+
+    log(n! / [k! * (n - k)!]) = lgamma(n + 1) - lgamma(k + 1) - lgamma(n - k + 1)
+
+    Note that n >= k >= 0.
+
+    In contrast to binomial_coefficient(n, k), the cost does not grow with n and k,
+    but the result is only a float approximation.
+    '''
+    if check_positive_int(k) and check_positive_int(n) and k <= n:
+        return lgamma(n + 1) - lgamma(k + 1) - lgamma(n - k + 1)
     else:
-        raise ("only positive integers which fulfil n >= k >= 0.")
+        raise ValueError("only positive integers which fulfil n >= k >= 0.")
 
 def format_float(value, decimals=3, factor=1):
     '''
@@ -4,11 +4,66 @@ a sample hand from a deck with the hypergeometric cumulative distribution functi
 '''
 
 # Imports.
+from fractions import Fraction
 from itertools import product
+from math import exp, log, prod
+from os import cpu_count
+from time import perf_counter
+from sys import float_info
 from methods_for_model import *
+from binomial_cache import Binomial_Cache
+from configuration import Group, Configuration
+from fold_cache import Fold_Cache
+from multi_turn import calculate_turns
+from hand_query import Hand_Query
+from result_cache import configuration_key
 from observer_subject import Subject
 
+# Constants.
+CANCEL_CHECK_INTERVAL = 4096                            # Number of combinations/nodes between two checks of the cancel event.
+ENGINES = ("auto", "enumeration", "convolution", "streaming", "parallel", "complement")   # All algorithms that can calculate the hypgeo. cdf.
+PLANNED_ENGINES = ("enumeration", "convolution", "complement")     # Engines the "auto" engine chooses from, the first one wins ties.
+BUDGET_POLICIES = ("refuse", "warn")                    # What calculate() does if the estimated cost of a calculation exceeds the budget.
+ARITHMETICS = ("auto", "exact", "log")                  # "exact": Integer dividend and divisor, "log": Float approximation with log-gamma, "auto": Choose by deck size.
+LOG_SPACE_THRESHOLD = 10000                             # In "auto" arithmetic, decks with more cards than this are calculated in log-space.
+PARALLEL_THRESHOLD = 200000                             # The "parallel" engine calculates serially if there are fewer combinations than this, because the process pool would cost more than it saves.
+PARTITIONS_PER_WORKER = 4                               # The "parallel" engine splits the combinations into at least this many partitions per worker process, so they are balanced.
+PARALLEL_POLL_SECONDS = 0.05                            # The "parallel" engine checks its cancel event at least this often while it waits for the partitions.
+
+# Variables.
+partition_cancel_event = None                           # Cancel event of the worker processes of the "parallel" engine, see init_partition_worker().
+
+# Methods.
+def init_partition_worker(cancel_event):
+    '''
+    Initializer of the worker processes of the "parallel" engine. Their partitions stop when cancel_event is set.
+    '''
+    global partition_cancel_event
+    partition_cancel_event = cancel_event
+
+def calculate_partition(configuration, prefix):
+    '''
+    Calculate the part of the dividend of all combinations which start with the in-sample counts of prefix and return it.
+    configuration: Configuration of the model.
+    Runs in the worker processes of the "parallel" engine, so it only gets picklable arguments.
+    '''
+    ways = 1
+    for (card_count, _, _), in_sample in zip(configuration.groups, prefix):
+        ways *= binomial_coefficient(card_count, in_sample)
+    model = Model_Hypgeo()
+    model.sample_size = configuration.sample_size - sum(prefix)         # The cards of the prefix are already drawn.
+    model.unassigned_cards = configuration.get_unassigned_cards()
+    model.defined_groups = {key: Group(*group) for key, group in enumerate(configuration.groups[len(prefix):])}
+    model.cancel_event = partition_cancel_event
+    return ways * model.calculate_streaming()
+
 # Classes.
+class Calculation_Cancelled(Exception):
+    '''
+    Raised inside a calculation when its cancel event was set.
+    '''
+    pass
+
 class Model_Hypgeo(Subject):
     '''
     Model which calculates the probability of drawing a sample hand 
@@ -18,10 +73,33 @@ class Model_Hypgeo(Subject):
         Subject.__init__(self)          # Inheritance of Observer pattern.
         self.deck_size = 0              # Number of cards in deck.
         self.sample_size = 0            # Size of the sample of cards drawn.
-        self.defined_groups = {}        # Each element is a group (type = list). {"number": [card_count, min_in_sample, max_in_sample], "number": [...], etc.]
+        self.defined_groups = {}        # Each element is a group (type = Group). {"number": Group(card_count, min_in_sample, max_in_sample), "number": Group(...), etc.]
         self.group_key = 0
+        self.group_names = {}           # Optional names of the groups. {key: name}
         self.unassigned_cards = 0       # Number of cards that are in no group
         self.result = None              # Store the result of the last calculation.
+        self.curve = None               # Store the result of the last calculate_curve(). curve[sample_size] = probability.
+        self.turns = None               # Store the result of the last calculate_turns(). turns[turn] = probability.
+        self.grid = None                # Store the result of the last calculate_grid(). grid[deck_size - min_deck_size][sample_size - min_sample_size] = probability.
+        self.engine = "enumeration"     # Algorithm used by calculate(), see ENGINES. "auto" lets the planner choose.
+        self.arithmetic = "auto"        # Arithmetic used by calculate(), see ARITHMETICS.
+        self.dividend = None            # Exact dividend and divisor of the last calculation. None, if it was calculated in log-space.
+        self.divisor = None
+        self.error_bound = 0.0          # Upper bound of the absolute error of self.result. 0.0 for exact calculations.
+        self.binomial_cache = Binomial_Cache()  # Binomial coefficients shared by all engines and reused across calculations.
+        self.fold_cache = Fold_Cache()          # Per-group coefficient vectors and their partial folds. Only changed groups are folded again.
+        self.enumeration_stats = {"visited": 0, "pruned": 0}  # Nodes of the combination tree the "streaming" engine visited or cut off in the last calculation.
+        self.combination_counts = {"generated": None, "accepted": None}    # Combinations the last calculation generated and accepted. None for engines that don't enumerate.
+        self.calculation_stats = {}     # Timing and counters of the last calculation. Sent to the Observers with "end calculte".
+        self.workers = cpu_count() or 1 # Number of worker processes of the "parallel" engine.
+        self.result_cache = None        # Optional Result_Cache which is asked before calculating.
+        self.result_from_cache = False  # True if the last result was served from self.result_cache.
+        self.cancel_event = None        # threading.Event of a calculation that runs on a worker thread. The calculation stops when it is set.
+        self.progress = 0.0             # Rough progress of the running calculation between 0.0 and 1.0.
+        self.cost_budget = None         # Highest estimated cost calculate() accepts, None for no limit. The cost is roughly the number of inner loop steps.
+        self.budget_policy = "refuse"   # See BUDGET_POLICIES.
+        self.plan = None                # Plan of the last calculation: chosen engine, estimated and actual cost. See self.plan_calculation().
+        self.log_space_operations = 0   # Float operations of the last calculation in log-space.
 
     # Set functions
     def set_deck_size(self, integer):
@@ -43,6 +121,58 @@ class Model_Hypgeo(Subject):
         else:
             self.notify("invalid sample size")
 
+    def set_engine(self, engine):
+        '''
+        Sets self.engine to engine, which selects the algorithm used by calculate().
+        "enumeration": Sum over every combination of in-sample counts of the groups.
+        "convolution": Fold the groups one at a time into a coefficient vector.
+        "streaming": Walk the combinations depth-first and prune subtrees that can't be valid.
+        "parallel": Split the combinations by the in-sample counts of the first groups and stream the parts on a process pool.
+        "complement": Inclusion-exclusion over the in-sample counts outside of the groups' windows.
+        "auto": Estimate the cost of "enumeration", "convolution" and "complement" and use the cheapest.
+        '''
+        if engine in ENGINES:
+            self.engine = engine
+        else:
+            self.notify("invalid engine")
+
+    def set_cost_budget(self, cost_budget, policy="refuse"):
+        '''
+        Sets the highest estimated cost calculate() accepts (None for no limit) and what happens above it, see BUDGET_POLICIES.
+        '''
+        if (cost_budget is None or check_positive_int(cost_budget)) and policy in BUDGET_POLICIES:
+            self.cost_budget = cost_budget
+            self.budget_policy = policy
+        else:
+            self.notify("invalid budget")
+
+    def set_arithmetic(self, arithmetic):
+        '''
+        Sets self.arithmetic to arithmetic.
+        "exact": Calculate the dividend and divisor as integers with the selected engine.
+        "log": Fold the groups with floats in log-space. Fast for huge decks, but approximated.
+        "auto": "log" if self.deck_size > LOG_SPACE_THRESHOLD, else "exact".
+        '''
+        if arithmetic in ARITHMETICS:
+            self.arithmetic = arithmetic
+        else:
+            self.notify("invalid arithmetic")
+
+    def set_workers(self, integer):
+        '''
+        Sets self.workers, the number of worker processes of the "parallel" engine.
+        '''
+        if check_positive_int(integer) and integer >= 1:
+            self.workers = integer
+        else:
+            self.notify("invalid workers")
+
+    def set_result_cache(self, result_cache):
+        '''
+        Sets self.result_cache to a Result_Cache, or None to always calculate.
+        '''
+        self.result_cache = result_cache
+
     def add_defined_group(self, card_count=0, min_in_sample=0, max_in_sample=0):
         '''
         Adds a new group to self.defined_groups. Needs three integers.
@@ -51,7 +181,7 @@ class Model_Hypgeo(Subject):
         '''
         if check_positive_int(card_count) and check_positive_int(min_in_sample) and check_positive_int(max_in_sample) \
                                           and self.unassigned_cards >= card_count >= max_in_sample >= min_in_sample:
-            self.defined_groups[self.group_key] = [card_count, min_in_sample, max_in_sample]
+            self.defined_groups[self.group_key] = Group(card_count, min_in_sample, max_in_sample)
             self.group_key += 1
             self.update_unassigned_cards()
         else:
@@ -63,11 +193,13 @@ class Model_Hypgeo(Subject):
         self.unassigned_cards >= card_count >= max_in_sample >= min_in_sample
         '''
         try:
-            if check_positive_int(card_count) and card_count <= (self.unassigned_cards + self.defined_groups[key][0]) and card_count >= (self.defined_groups[key][1] and self.defined_groups[key][2]):
-                self.defined_groups[key][0] = card_count
+            group = self.defined_groups[key]
+            if check_positive_int(card_count) and card_count <= (self.unassigned_cards + group.card_count) and card_count >= (group.min_in_sample and group.max_in_sample):
+                group.card_count = card_count
+                self.fold_cache.mark_dirty(key)
                 self.update_unassigned_cards()
             else:
-                self.notify("invalid group size", group_key=key)
+                self.notify("invalid group size", group_key=key, value=card_count)
         except:
             self.notify("index error")
 
@@ -77,10 +209,12 @@ class Model_Hypgeo(Subject):
         self.unassigned_cards >= card_count >= max_in_sample >= min_in_sample
         '''
         try:
-            if check_positive_int(min_in_sample) and min_in_sample <= self.defined_groups[key][2]:
-                self.defined_groups[key][1] = min_in_sample
+            group = self.defined_groups[key]
+            if check_positive_int(min_in_sample) and min_in_sample <= group.max_in_sample:
+                group.min_in_sample = min_in_sample
+                self.fold_cache.mark_dirty(key)
             else:
-                self.notify("invalid group min", group_key=key)
+                self.notify("invalid group min", group_key=key, value=min_in_sample)
         except:
             self.notify("key error")
 
@@ -90,19 +224,31 @@ class Model_Hypgeo(Subject):
         self.unassigned_cards >= card_count >= max_in_sample >= min_in_sample
         '''
         try:
-            if check_positive_int(max_in_sample) and max_in_sample >= self.defined_groups[key][1] and max_in_sample <= self.defined_groups[key][0]:
-                self.defined_groups[key][2] = max_in_sample
+            group = self.defined_groups[key]
+            if check_positive_int(max_in_sample) and max_in_sample >= group.min_in_sample and max_in_sample <= group.card_count:
+                group.max_in_sample = max_in_sample
+                self.fold_cache.mark_dirty(key)
             else:
-                self.notify("invalid group max", group_key=key)
+                self.notify("invalid group max", group_key=key, value=max_in_sample)
         except:
             self.notify("key error")
             
+    def set_group_name(self, key, name):
+        '''
+        Set the name of the group corresponding to key. The name is only shown and exported, it doesn't change the result.
+        '''
+        if key in self.defined_groups:
+            self.group_names[key] = name
+        else:
+            self.notify("key error")
+
     def del_defined_group(self, key):
         '''
         Deletes a group from self.defined_groups. index = integer for accessing the group.
         '''
         try:
             self.defined_groups.pop(key)
+            self.group_names.pop(key, None)
             self.update_unassigned_cards()
         except:
             self.notify("key error")
@@ -112,44 +258,41 @@ class Model_Hypgeo(Subject):
         Updates self.unassigned_cards.
         '''
         self.unassigned_cards = self.deck_size
-        for key in self.defined_groups:
-            self.unassigned_cards -= self.defined_groups[key][0]
+        for group in self.defined_groups.values():
+            self.unassigned_cards -= group.card_count
 
     def calculate_combinations(self):
         '''
         Get a list with all possible slot sizes of each group (also lists) and return it.
         '''
         slot_sizes = []
-        for key in self.defined_groups:                 # Get a list with all possible slot sizes of each group.
-            size_list = []
-            group = self.defined_groups[key]
-            size_list = list(range(group[1], min(group[0], group[2], self.sample_size) + 1))
-            slot_sizes.append(size_list)
+        for group in self.defined_groups.values():      # Get a list with all possible slot sizes of each group.
+            slot_sizes.append(list(group.get_slot_sizes(self.sample_size)))
 
         combination_table = list(product(*slot_sizes))  # The combination_table is a list containing tuples. Every tuple of product() contains exactly one element from each sublist of slot_sizes. product() contains all possible combinations.
         return combination_table
     
 
-    def calculate(self):
+    def calculate_enumeration(self):
         '''
-        Calculate the probability of drawing the configured hand and return it.
+        Calculate the dividend of the hypgeo. cdf by summing over all combinations of self.calculate_combinations() and return it.
         '''
-        self.notify("start calculate")                                              # Notifiy the Observers that the calculation will start, so the last parameters can be set before calculation.
-        defined_groups = convert_dict_to_list(self.defined_groups)                  # Convert dict to list (index not needed).
+        defined_groups = list(self.defined_groups.values())                         # Convert dict to list (index not needed).
         binomial_list_table = []                                                    # Stores multiple lists which themself contain binomial coeffiecents. Each sublist contains a set of binomial coeffiecents that are needed for one hypgeo_pdf.
         combination_table = self.calculate_combinations()                           # Raw data from the groups for calculating binomial coeffiecents.                      
-        for combination in combination_table:
+        for count, combination in enumerate(combination_table):
+            if count % CANCEL_CHECK_INTERVAL == 0:
+                self.check_cancelled(count / len(combination_table))
             size_sum = sum(combination)                                             # How many slots of sample_size are in a defined group.
             size_rest = self.sample_size - size_sum                                 # Not all slots of the sample hand must be occupied by a group. Here, the size of the rest slot is calculated and stored in size_rest.
             if size_sum <= self.sample_size and size_rest <= self.unassigned_cards: # All slot sizes added up must not exceed the self.sample_size (You can't draw more cards than self.sample_size.). Also, there must be enough unassigned cards to fill size_rest.
                 index = 0                                                           # index count variable which we need for accessing certain elements in group_lists.
                 binomial_list = []                                                  # Store the binomial coefficient of each in_sample in one combination.
                 for in_sample in combination:                                       # in_sample = we select that many cards from that group. The binomial coeffiecent is calcualted with n = (total cards in the group) and k = in_sample.
-                    binomial_list.append(binomial_coefficient(defined_groups[index][0], in_sample))
+                    binomial_list.append(self.binomial_cache.get(defined_groups[index].card_count, in_sample))
                     index += 1                                          
-                binomial_list.append(binomial_coefficient(self.unassigned_cards, size_rest))    # Calculate the binomial coefficient of the rest, n = self.unassigned_cards, k = size_rest.
+                binomial_list.append(self.binomial_cache.get(self.unassigned_cards, size_rest))    # Calculate the binomial coefficient of the rest, n = self.unassigned_cards, k = size_rest.
                 binomial_list_table.append(binomial_list)                                       # Add the rest binomial coefficient to the list. Now, all slots of the sample hand are occupied by something.
-        divisor = binomial_coefficient(self.deck_size, self.sample_size)                        # All possible samples that a deck can produce which includes successes and failures. It is the divisor of the probability.   
 
         dividend = 0                            # All successfull, possible samples that this deck can produce. It is the dividend of the probability.
         for binomial_list in binomial_list_table:                                                                         
@@ -157,10 +300,630 @@ class Model_Hypgeo(Subject):
             for value in binomial_list:         # If we multiply all binomial coefficients of one combination, we get the number of successful samples that one combination adds to the overall probability (the dividend of the hypergeometric probability distribution function of this exact combination).
                 temp_factor *= value                
             dividend += temp_factor             # We add all dividends of the hypgeo. pdfs together and get the number of all possible successfull samples(the dividend of the hypergeometric cumulative distribution function).
-        hypgeo_cdf = dividend / divisor         # We get the hypgeo. cdf by dividing (successful samples) / (possible samples).
+        self.combination_counts = {"generated": len(combination_table), "accepted": len(binomial_list_table)}
+        return dividend
+
+    def group_vector(self, key, truncation):
+        '''
+        Calculate the coefficient vector of one group and return it.
+        vector[in_sample] is the number of ways to draw in_sample cards of the group, 0 outside of its [min_in_sample, max_in_sample] window.
+        '''
+        group = self.defined_groups[key]
+        vector = [0] * (truncation + 1)
+        for in_sample in group.get_slot_sizes(truncation):     # Same slot sizes as in self.calculate_combinations().
+            vector[in_sample] = self.binomial_cache.get(group.card_count, in_sample)
+        return vector
+
+    def fold_groups(self, truncation):
+        '''
+        Fold the groups into a coefficient vector and return it.
+
+        coefficients[drawn] is the number of ways to draw exactly "drawn" cards from the groups,
+        so that every group stays inside its [min_in_sample, max_in_sample] window.
+        The vector is truncated at truncation (drawn <= truncation).
+        The per-group vectors and partial folds are kept in self.fold_cache, so only groups that changed
+        since the last call (and the folds that depend on them) are calculated again.
+        '''
+        return self.fold_cache.fold(list(self.defined_groups), truncation, self.group_vector, self.check_cancelled)
+
+    def combine_with_rest(self, coefficients, sample_size, unassigned_cards=None):
+        '''
+        Fill the rest slot of a sample of sample_size cards with unassigned cards and return the dividend of the hypgeo. cdf.
+        coefficients is a vector of self.fold_groups().
+        unassigned_cards: Cards of the rest slot. Default: self.unassigned_cards. The model isn't changed.
+        '''
+        if unassigned_cards is None:
+            unassigned_cards = self.unassigned_cards
+        dividend = 0
+        for drawn, ways in enumerate(coefficients[:sample_size + 1]):
+            size_rest = sample_size - drawn
+            if ways != 0 and size_rest <= unassigned_cards:
+                dividend += ways * self.binomial_cache.get(unassigned_cards, size_rest)
+        return dividend
+
+    def calculate_convolution(self):
+        '''
+        Calculate the dividend of the hypgeo. cdf by folding the groups one at a time into a coefficient vector and return it.
+        The vector is truncated at self.sample_size, which gives a cost of O(groups * sample_size^2)
+        instead of the product of all range widths.
+        '''
+        return self.combine_with_rest(self.fold_groups(self.sample_size), self.sample_size)
+
+    def calculate_curve(self, max_sample_size):
+        '''
+        Calculate the probability of drawing the configured hand for every sample size from 0 to max_sample_size
+        in one pass and return them as a list. The list is also stored in self.curve.
+
+        The coefficient vector of the groups is folded only once (truncated at max_sample_size) and shared
+        by all sample sizes. Only the rest slot and the divisor differ between them.
+        '''
+        if not (check_positive_int(max_sample_size) and max_sample_size <= self.deck_size):
+            self.notify("invalid sample size")
+            return None
+        self.notify("start calculate curve", **self.get_start_info())
+        start = perf_counter()
+        coefficients = self.fold_groups(max_sample_size)
+        curve = []
+        for sample_size in range(max_sample_size + 1):
+            dividend = self.combine_with_rest(coefficients, sample_size)
+            curve.append(dividend / self.binomial_cache.get(self.deck_size, sample_size))
+        self.curve = curve
+        self.notify("end calculate curve", stats={"engine": "curve", "seconds": perf_counter() - start, "groups": len(self.defined_groups),
+                                                  "binomial cache": self.binomial_cache.get_stats(), "fold cache": self.fold_cache.get_stats()})
+        return curve
+
+    def calculate_grid(self, min_deck_size, max_deck_size, min_sample_size, max_sample_size):
+        '''
+        Calculate the probability of drawing the configured hand for every deck size from min_deck_size to max_deck_size
+        (the groups stay the same, only the unassigned cards change) and every sample size from min_sample_size to max_sample_size.
+        Returns the table as a list of rows, one row per deck size. Cells with a sample bigger than the deck are None.
+        The table is also stored in self.grid.
+
+        The groups are folded only once, like in self.calculate_curve(). Neighbouring cells follow from Pascal's rule,
+        so every cell costs two integer additions:
+            dividend(unassigned + 1, sample) = dividend(unassigned, sample) + dividend(unassigned, sample - 1)
+            divisor(deck + 1, sample) = divisor(deck, sample) + divisor(deck, sample - 1)
+        '''
+        group_cards = self.deck_size - self.unassigned_cards
+        if not (all(check_positive_int(value) for value in (min_deck_size, max_deck_size, min_sample_size, max_sample_size))
+                and group_cards <= min_deck_size <= max_deck_size and min_sample_size <= max_sample_size):
+            self.notify("invalid grid")
+            return None
+        self.notify("start calculate grid", **self.get_start_info())
+        start = perf_counter()
+        coefficients = self.fold_groups(max_sample_size)
+        unassigned_cards = min_deck_size - group_cards
+        dividends = []      # dividends[sample_size] of the current deck size.
+        divisors = []
+        for sample_size in range(max_sample_size + 1):
+            dividends.append(sum(ways * self.binomial_cache.get(unassigned_cards, sample_size - drawn)
+                                 for drawn, ways in enumerate(coefficients[:sample_size + 1]) if ways != 0 and sample_size - drawn <= unassigned_cards))
+            divisors.append(self.binomial_cache.get(min_deck_size, sample_size) if sample_size <= min_deck_size else 0)
+
+        grid = []
+        for deck_size in range(min_deck_size, max_deck_size + 1):
+            if deck_size > min_deck_size:
+                for sample_size in range(max_sample_size, 0, -1):     # Descending, so dividends[sample_size - 1] still belongs to the smaller deck.
+                    dividends[sample_size] += dividends[sample_size - 1]
+                    divisors[sample_size] += divisors[sample_size - 1]
+            grid.append([dividends[sample_size] / divisors[sample_size] if divisors[sample_size] else None
+                         for sample_size in range(min_sample_size, max_sample_size + 1)])
+        self.grid = grid
+        self.notify("end calculate grid", stats={"engine": "grid", "seconds": perf_counter() - start, "groups": len(self.defined_groups),
+                                                 "cells": len(grid) * len(grid[0]), "fold cache": self.fold_cache.get_stats()})
+        return grid
+
+    def calculate_turns(self, turns, draws_per_turn=1, mulligans=0, keep=None):
+        '''
+        Calculate the probability of drawing the configured hand by every turn from 0 to turns and return them as a list.
+        self.sample_size is the opening hand, then draws_per_turn cards are drawn every turn.
+        Hands that don't pass keep are redrawn with one card less, at most mulligans times. See multi_turn.calculate_turns().
+        The list is also stored in self.turns.
+        '''
+        if not (check_positive_int(turns) and check_positive_int(draws_per_turn) and check_positive_int(mulligans)):
+            self.notify("invalid turns")
+            return None
+        self.notify("start calculate turns", **self.get_start_info())
+        start = perf_counter()
+        result = calculate_turns(self.get_configuration(), turns, draws_per_turn, mulligans, keep)
+        self.turns = result["turns"]
+        self.notify("end calculate turns", stats={"engine": "turns", "seconds": perf_counter() - start, "groups": len(self.defined_groups),
+                                                  "keep": result["keep"], "hands": result["hands"], "terms": result["terms"]})
+        return self.turns
+
+    def calculate_query(self, query, names=None):
+        '''
+        Calculate the probability that a sample satisfies query and return it. See hand_query.py for the query language.
+        names: {name: group key} of the names used in the query. Default: "g0", "g1", ... for the group keys 0, 1, ...
+        Only the card counts of the groups are used, not their min_in_sample and max_in_sample.
+        '''
+        if names is None:
+            names = {"g" + str(key): key for key in self.defined_groups}
+        start = perf_counter()
+        group_sizes = {key: group.card_count for key, group in self.defined_groups.items()}
+        try:
+            compiled_query = query if isinstance(query, Hand_Query) else Hand_Query(query, names)
+            dividend, divisor = compiled_query.evaluate(group_sizes, self.deck_size, self.sample_size, self.binomial_cache.get)
+        except ValueError as error:     # Invalid query, or a compiled query uses a deleted group.
+            self.notify("invalid query", error=str(error))
+            return None
+        self.notify("end calculate query", stats={"engine": "query", "seconds": perf_counter() - start, "groups": len(self.defined_groups),
+                                                  "atoms": len(compiled_query.atoms), "terms": len(compiled_query.terms)})
+        return dividend / divisor
+
+    def stream_combinations(self):
+        '''
+        Generator which walks all valid combinations depth-first and yields (combination, ways).
+        ways is the product of the binomial coefficients of the groups in the combination (without the rest slot).
+
+        In contrast to self.calculate_combinations(), nothing is materialized: A whole subtree is pruned as soon as
+        the partial sum exceeds self.sample_size or the remaining slots can't be filled from self.unassigned_cards.
+        The visited and pruned nodes are counted in self.enumeration_stats.
+        '''
+        self.enumeration_stats = {"visited": 0, "pruned": 0}
+        groups = []
+        for group in self.defined_groups.values():
+            groups.append((group.card_count, group.min_in_sample, group.get_highest(self.sample_size)))   # (card_count, lowest slot size, highest slot size)
+
+        suffix_min = [0] * (len(groups) + 1)    # suffix_min[i]: Fewest cards the groups i, i+1, ... can occupy in the sample.
+        suffix_max = [0] * (len(groups) + 1)    # suffix_max[i]: Most cards the groups i, i+1, ... can occupy in the sample.
+        for index in range(len(groups) - 1, -1, -1):
+            suffix_min[index] = suffix_min[index + 1] + groups[index][1]
+            suffix_max[index] = suffix_max[index + 1] + max(groups[index][2], groups[index][1])
+        combination = [0] * len(groups)
+
+        def visit(depth, size_sum, ways):
+            '''
+            Counts a node and returns its frame (depth, size_sum, ways, iterator over the slot sizes of the group at depth).
+            '''
+            self.enumeration_stats["visited"] += 1
+            if self.enumeration_stats["visited"] % CANCEL_CHECK_INTERVAL == 0:
+                self.check_cancelled(self.progress)
+            if depth == 1:
+                self.progress = (combination[0] - groups[0][1]) / (groups[0][2] - groups[0][1] + 1)   # Share of the first group's slot sizes already walked.
+            slot_sizes = iter(range(groups[depth][1], groups[depth][2] + 1)) if depth < len(groups) else None
+            return depth, size_sum, ways, slot_sizes
+
+        if not (suffix_min[0] <= self.sample_size and self.sample_size - suffix_max[0] <= self.unassigned_cards):
+            self.enumeration_stats["pruned"] += 1   # Not even the root is valid.
+            return
+        stack = [visit(0, 0, 1)]    # Frames of the nodes from the root to the current node. A stack instead of recursion, so any number of groups works.
+        while stack:
+            depth, size_sum, ways, slot_sizes = stack[-1]
+            if depth == len(groups):
+                stack.pop()
+                yield tuple(combination), ways
+                continue
+            card_count, _, highest = groups[depth]
+            child = None
+            for in_sample in slot_sizes:                # Resumes after the slot size of the last child.
+                new_sum = size_sum + in_sample
+                if new_sum + suffix_min[depth + 1] > self.sample_size:                                  # Even the smallest slot sizes of the next groups don't fit anymore. This holds for all bigger in_sample, too.
+                    self.enumeration_stats["pruned"] += highest - in_sample + 1
+                    break
+                if self.sample_size - new_sum - suffix_max[depth + 1] > self.unassigned_cards:          # Even the biggest slot sizes of the next groups leave a rest slot that is too big.
+                    self.enumeration_stats["pruned"] += 1
+                    continue
+                combination[depth] = in_sample
+                child = visit(depth + 1, new_sum, ways * self.binomial_cache.get(card_count, in_sample))
+                break
+            if child is None:
+                stack.pop()                             # All slot sizes of the group at depth were walked or pruned.
+            else:
+                stack.append(child)
+
+    def calculate_streaming(self):
+        '''
+        Calculate the dividend of the hypgeo. cdf by accumulating the combinations of self.stream_combinations() on the fly and return it.
+        '''
+        dividend = 0
+        accepted = 0
+        for combination, ways in self.stream_combinations():
+            size_rest = self.sample_size - sum(combination)
+            dividend += ways * self.binomial_cache.get(self.unassigned_cards, size_rest)
+            accepted += 1
+        self.combination_counts = {"generated": self.enumeration_stats["visited"], "accepted": accepted}
+        return dividend
+
+    def calculate_complement(self):
+        '''
+        Calculate the dividend of the hypgeo. cdf with inclusion-exclusion over the complements of the groups' windows and return it.
+
+        Every group satisfies 1[in window] = 1 - 1[in complement], the complement being the in-sample counts below
+        min_in_sample or above max_in_sample. Multiplying this out gives one signed term per choice of "free" or
+        "a count in the complement" for every group. Free groups are lumped into the rest slot, groups whose window
+        covers all counts are always free. So the cost is the product of (1 + complement width), which is small
+        when the windows cover most of the range.
+        '''
+        free_cards = self.unassigned_cards
+        groups = []
+        for group in self.defined_groups.values():
+            top = min(group.card_count, self.sample_size)
+            complement = [in_sample for in_sample in range(top + 1) if in_sample < group.min_in_sample or in_sample > group.get_highest(self.sample_size)]
+            if complement:
+                groups.append((group.card_count, complement))
+            else:
+                free_cards += group.card_count
+
+        dividend = 0
+        terms = 0
+
+        def walk(depth, drawn, ways, rest_cards):
+            nonlocal dividend, terms
+            if depth == len(groups):
+                terms += 1
+                if terms % CANCEL_CHECK_INTERVAL == 0:
+                    self.check_cancelled(self.progress)
+                size_rest = self.sample_size - drawn
+                if size_rest <= rest_cards:
+                    dividend += ways * self.binomial_cache.get(rest_cards, size_rest)
+                return
+            card_count, complement = groups[depth]
+            walk(depth + 1, drawn, ways, rest_cards + card_count)       # Free: The group is lumped into the rest slot.
+            for in_sample in complement:
+                if drawn + in_sample > self.sample_size:
+                    break
+                walk(depth + 1, drawn + in_sample, -ways * self.binomial_cache.get(card_count, in_sample), rest_cards)
+
+        walk(0, 0, 1, free_cards)
+        self.combination_counts = {"generated": terms, "accepted": terms}
+        return dividend
+
+    def estimate_costs(self):
+        '''
+        Returns the estimated cost of every engine as a dict, without calculating anything.
+        The cost is roughly the number of steps of the inner loops:
+        "enumeration": Product of the range widths (the size of self.calculate_combinations()) times the groups.
+        "convolution": Sum of (sample_size + 1) * range width over the groups, one sparse fold per group.
+        "complement": Product of (1 + complement width) times the groups.
+        "streaming" and "parallel" are estimated like "enumeration", although they prune and split it.
+        '''
+        group_count = max(len(self.defined_groups), 1)
+        widths = []
+        complement_widths = []
+        for group in self.defined_groups.values():
+            width = len(group.get_slot_sizes(self.sample_size))
+            widths.append(width)
+            complement_widths.append(min(group.card_count, self.sample_size) + 1 - width)
+        enumeration = prod(widths) * group_count
+        return {"enumeration": enumeration,
+                "convolution": sum((self.sample_size + 1) * width for width in widths) + self.sample_size + 1,
+                "complement": prod(1 + width for width in complement_widths) * group_count,
+                "streaming": enumeration,
+                "parallel": enumeration // max(self.workers, 1)}
+
+    def plan_calculation(self):
+        '''
+        Chooses the engine of the next calculation, stores the plan in self.plan and returns it.
+        The plan is a dict with "engine", "estimated cost", "estimates" (all engines), "budget" and "over budget".
+        Calculations in log-space always fold the groups, they are estimated like "convolution".
+        '''
+        estimates = self.estimate_costs()
+        if self.get_active_arithmetic() == "log":
+            engine = "log-space"
+            estimated_cost = estimates["convolution"]
+        else:
+            engine = self.engine
+            if engine == "auto":
+                engine = min(PLANNED_ENGINES, key=lambda planned_engine: estimates[planned_engine])
+            estimated_cost = estimates[engine]
+        self.plan = {"engine": engine,
+                     "estimated cost": estimated_cost,
+                     "actual cost": None,
+                     "estimates": estimates,
+                     "budget": self.cost_budget,
+                     "over budget": self.cost_budget is not None and estimated_cost > self.cost_budget}
+        return self.plan
+
+    def check_budget(self):
+        '''
+        Plans the calculation and compares its estimated cost with self.cost_budget. Returns False if the calculation is refused.
+        Notifies the Observers with "over budget" (refused) or "budget warning" (calculated anyway).
+        '''
+        plan = self.plan_calculation()
+        if not plan["over budget"]:
+            return True
+        if self.budget_policy == "refuse":
+            self.notify("over budget", plan=plan)
+            return False
+        self.notify("budget warning", plan=plan)
+        return True
+
+    def calculate_parallel(self):
+        '''
+        Calculate the dividend of the hypgeo. cdf on self.workers processes and return it.
+
+        The combinations are partitioned by the in-sample counts of the first groups (the prefix). Prefixes are
+        extended by one group at a time until there are PARTITIONS_PER_WORKER partitions per worker. Every partition
+        is summed up exactly with calculate_partition() and the partial dividends are added.
+        Falls back to the "streaming" engine for small configurations, where the process pool would dominate.
+        When the calculation is cancelled, the workers stop their partitions and the pool is shut down without waiting for them.
+        '''
+        configuration = self.get_configuration()
+        slot_sizes = [group.get_slot_sizes(self.sample_size) for group in self.defined_groups.values()]
+        groups = configuration.groups
+        if self.workers <= 1 or len(groups) < 2 or prod(len(sizes) for sizes in slot_sizes) < PARALLEL_THRESHOLD:
+            return self.calculate_streaming()
+
+        prefixes = [()]
+        depth = 0
+        while 0 < len(prefixes) < PARTITIONS_PER_WORKER * self.workers and depth < len(groups) - 1:
+            prefixes = [prefix + (in_sample,) for prefix in prefixes for in_sample in slot_sizes[depth] if sum(prefix) + in_sample <= self.sample_size]
+            depth += 1
+
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait  # Imported on demand, so the process pool doesn't slow down the start of the program.
+        from multiprocessing import Event
+        dividend = 0
+        cancel_event = Event()      # Shared with the workers, see init_partition_worker().
+        executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_partition_worker, initargs=(cancel_event,))
+        try:
+            pending = {executor.submit(calculate_partition, configuration, prefix) for prefix in prefixes}
+            while pending:
+                self.check_cancelled(1 - len(pending) / len(prefixes))
+                done, pending = wait(pending, timeout=PARALLEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    dividend += future.result()
+        except BaseException:       # Cancelled, or a partition failed: Don't wait for the running partitions.
+            cancel_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+        return dividend
+
+    def calculate_log_space(self):
+        '''
+        Calculate the hypgeo. cdf with floats in log-space and return (hypgeo_cdf, error_bound).
+
+        The groups are folded like in self.calculate_convolution(), but every binomial coefficient
+        is calculated with log_binomial_coefficient(n, k) and the coefficient vector is rescaled
+        after each group, so neither the huge integers nor float overflows of big decks occur.
+        error_bound is an upper bound of the absolute error, estimated from the magnitude of the
+        log-gamma values and the number of float operations.
+        '''
+        log_scale = 0.0                                                 # coefficients[drawn] * exp(log_scale) is the number of ways to draw "drawn" cards from the folded groups.
+        log_magnitude = 0.0                                             # Sum of the magnitudes of all log-gamma values in one term of the cdf. Their rounding errors add up.
+        operations = 0
+        coefficients = [1.0] + [0.0] * self.sample_size
+        for index, group in enumerate(self.defined_groups.values()):
+            self.check_cancelled(index / len(self.defined_groups))
+            in_sample_range = group.get_slot_sizes(self.sample_size)
+            if len(in_sample_range) == 0:
+                return 0.0, 0.0
+            log_binomials = [log_binomial_coefficient(group.card_count, in_sample) for in_sample in in_sample_range]
+            group_scale = max(log_binomials)                            # Scale the binomial coefficients of the group to <= 1.
+            group_coefficients = [(in_sample, exp(log_binomial - group_scale)) for in_sample, log_binomial in zip(in_sample_range, log_binomials)]
+            log_scale += group_scale
+            log_magnitude += 3 * log_binomial_coefficient(group.card_count, group.card_count // 2) + 3
+            folded = [0.0] * (self.sample_size + 1)
+            for drawn, ways in enumerate(coefficients):
+                if ways == 0.0:
+                    continue
+                for in_sample, binomial in group_coefficients:
+                    if drawn + in_sample > self.sample_size:
+                        break
+                    folded[drawn + in_sample] += ways * binomial
+                    operations += 1
+            peak = max(folded)
+            if peak == 0.0:
+                return 0.0, 0.0
+            coefficients = [ways / peak for ways in folded]             # Rescale, so the vector neither overflows nor underflows.
+            log_scale += log(peak)
+
+        log_terms = []
+        for drawn, ways in enumerate(coefficients):
+            size_rest = self.sample_size - drawn
+            if ways != 0.0 and size_rest <= self.unassigned_cards:
+                log_terms.append(log(ways) + log_binomial_coefficient(self.unassigned_cards, size_rest))
+        if len(log_terms) == 0:
+            return 0.0, 0.0
+        log_peak = max(log_terms)                                       # log-sum-exp.
+        log_dividend = log_scale + log_peak + log(sum(exp(log_term - log_peak) for log_term in log_terms))
+        hypgeo_cdf = min(exp(log_dividend - log_binomial_coefficient(self.deck_size, self.sample_size)), 1.0)
+
+        log_magnitude += 3 * log_binomial_coefficient(self.unassigned_cards, self.unassigned_cards // 2) + 3    # Rest slot.
+        log_magnitude += 3 * log_binomial_coefficient(self.deck_size, self.deck_size // 2) + 3                  # Divisor.
+        self.log_space_operations = operations
+        relative_error = float_info.epsilon * (4 * log_magnitude + operations + len(log_terms) + 2 * len(self.defined_groups))
+        return hypgeo_cdf, hypgeo_cdf * relative_error
+
+    def get_active_arithmetic(self):
+        '''
+        Returns the arithmetic calculate() uses for the current configuration. Resolves "auto".
+        '''
+        if self.arithmetic == "auto":
+            if self.deck_size > LOG_SPACE_THRESHOLD:
+                return "log"
+            return "exact"
+        return self.arithmetic
+
+    def check_cancelled(self, progress):
+        '''
+        Stores the progress of the running calculation and raises Calculation_Cancelled if its cancel event was set.
+        '''
+        self.progress = progress
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise Calculation_Cancelled()
+
+    def compute(self):
+        '''
+        Calculate the probability of drawing the configured hand, store it in self.result and return it.
+        In contrast to self.calculate(), the Observers are not notified. Safe to run on a worker thread with a copy of the model.
+        '''
+        self.progress = 0.0
+        self.combination_counts = {"generated": None, "accepted": None}
+        self.enumeration_stats = {"visited": 0, "pruned": 0}
+        start = perf_counter()
+        binomial_calls = self.binomial_cache.hits + self.binomial_cache.misses
+        fold_operations = self.fold_cache.stats["operations"]
+        plan = self.plan_calculation()
+        engine = plan["engine"]
+        if engine == "log-space":
+            self.dividend = None
+            self.divisor = None
+            hypgeo_cdf, self.error_bound = self.calculate_log_space()
+        else:
+            if engine == "convolution":
+                dividend = self.calculate_convolution()
+            elif engine == "streaming":
+                dividend = self.calculate_streaming()
+            elif engine == "parallel":
+                dividend = self.calculate_parallel()
+            elif engine == "complement":
+                dividend = self.calculate_complement()
+            else:
+                dividend = self.calculate_enumeration()
+            divisor = self.binomial_cache.get(self.deck_size, self.sample_size)    # All possible samples that a deck can produce which includes successes and failures. It is the divisor of the probability.   
+            hypgeo_cdf = dividend / divisor     # We get the hypgeo. cdf by dividing (successful samples) / (possible samples). Python rounds the division of two integers correctly, even if they don't fit into a float.
+            self.dividend = dividend
+            self.divisor = divisor
+            self.error_bound = 0.0
         self.result = hypgeo_cdf                # Set self.result.
-        self.notify("end calculte")             # Notify the Observers that the caluclation has finished.
-    
+        self.progress = 1.0
+        plan["actual cost"] = self.get_actual_cost(engine, self.fold_cache.stats["operations"] - fold_operations)
+        plan["seconds"] = perf_counter() - start
+        self.calculation_stats = {"engine": engine,
+                                  "arithmetic": self.get_active_arithmetic(),
+                                  "seconds": perf_counter() - start,
+                                  "groups": len(self.defined_groups),
+                                  "combinations generated": self.combination_counts["generated"],
+                                  "combinations accepted": self.combination_counts["accepted"],
+                                  "binomial calls": self.binomial_cache.hits + self.binomial_cache.misses - binomial_calls,
+                                  "binomial cache": self.binomial_cache.get_stats(),
+                                  "fold cache": self.fold_cache.get_stats(),
+                                  "configuration": self.get_cache_key(),
+                                  "plan": plan}
+        return hypgeo_cdf
+
+    def get_actual_cost(self, engine, fold_operations):
+        '''
+        Returns the cost of the last calculation in the units of self.estimate_costs(), or None if it isn't known
+        (the "parallel" engine counts in its worker processes).
+        '''
+        group_count = max(len(self.defined_groups), 1)
+        if engine in ("enumeration", "complement"):
+            return self.combination_counts["generated"] * group_count
+        if engine == "convolution":
+            return fold_operations + self.sample_size + 1
+        if engine == "log-space":
+            return self.log_space_operations
+        return self.enumeration_stats["visited"] or None
+
+    def get_cache_key(self):
+        '''
+        Returns the key of the current configuration in a Result_Cache.
+        '''
+        return configuration_key(self.get_configuration(), self.get_active_arithmetic())
+
+    def lookup_result(self):
+        '''
+        Looks up the current configuration in self.result_cache. Returns True and sets the result if it was cached.
+        '''
+        self.result_from_cache = False
+        if self.result_cache is None:
+            return False
+        start = perf_counter()
+        key = self.get_cache_key()
+        entry = self.result_cache.lookup(key)
+        self.notify("result cache lookup", hit=entry is not None, seconds=perf_counter() - start, stats=self.result_cache.get_stats())
+        if entry is None:
+            return False
+        self.result, self.dividend, self.divisor, self.error_bound = entry
+        self.result_from_cache = True
+        self.calculation_stats = {"engine": "result cache", "arithmetic": self.get_active_arithmetic(), "seconds": perf_counter() - start,
+                                  "groups": len(self.defined_groups), "configuration": key}
+        return True
+
+    def store_result(self):
+        '''
+        Stores the result of the last calculation in self.result_cache.
+        '''
+        if self.result_cache is not None:
+            self.result_cache.store(self.get_cache_key(), self.result, self.dividend, self.divisor, self.error_bound)
+
+    def calculate(self):
+        '''
+        Calculate the probability of drawing the configured hand and return it.
+        '''
+        self.notify("start calculate", **self.get_start_info())   # Notifiy the Observers that the calculation will start, so the last parameters can be set before calculation.
+        if not self.lookup_result():
+            if not self.check_budget():
+                return None
+            self.compute()
+            self.store_result()
+        self.notify("end calculte", from_cache=self.result_from_cache, stats=self.calculation_stats)    # Notify the Observers that the caluclation has finished.
+        return self.result
+
+    def get_start_info(self):
+        '''
+        Returns the information that is sent to the Observers with "start calculate".
+        '''
+        return {"engine": self.engine, "arithmetic": self.get_active_arithmetic(), "groups": len(self.defined_groups),
+                "deck_size": self.deck_size, "sample_size": self.sample_size}
+
+    def copy_configuration(self):
+        '''
+        Returns a new Model_Hypgeo with the same configuration, but without Observers.
+        The copy can calculate on a worker thread while this model stays responsive.
+        '''
+        model = Model_Hypgeo()
+        model.deck_size = self.deck_size
+        model.sample_size = self.sample_size
+        model.defined_groups = {key: group.copy() for key, group in self.defined_groups.items()}
+        model.group_key = self.group_key
+        model.unassigned_cards = self.unassigned_cards
+        model.engine = self.engine
+        model.arithmetic = self.arithmetic
+        model.workers = self.workers
+        model.cost_budget = self.cost_budget
+        model.budget_policy = self.budget_policy
+        model.binomial_cache = self.binomial_cache.copy()
+        model.fold_cache = self.fold_cache.copy()
+        return model
+
+    def begin_calculation(self):
+        '''
+        Notify the Observers that a calculation on a worker thread will start and return the copy of the model it calculates with.
+        Returns None if the result was served from self.result_cache, then the calculation has already finished,
+        or if the calculation exceeds the cost budget and is refused.
+        '''
+        self.notify("start calculate", **self.get_start_info())
+        if self.lookup_result():
+            self.notify("end calculte", from_cache=True, stats=self.calculation_stats)
+            return None
+        if not self.check_budget():
+            return None
+        return self.copy_configuration()
+
+    def report_progress(self, progress):
+        '''
+        Notify the Observers about the progress of a calculation on a worker thread.
+        '''
+        self.notify("progress calculate", progress=progress)
+
+    def finish_calculation(self, model):
+        '''
+        Take the results of a calculation on a worker thread from its copy of the model and notify the Observers.
+        '''
+        self.result = model.result
+        self.dividend = model.dividend
+        self.divisor = model.divisor
+        self.error_bound = model.error_bound
+        self.enumeration_stats = model.enumeration_stats
+        self.combination_counts = model.combination_counts
+        self.calculation_stats = model.calculation_stats
+        self.plan = model.plan
+        self.binomial_cache = model.binomial_cache     # Keep the coefficients and folds of the worker for the next calculation.
+        self.fold_cache = model.fold_cache
+        self.result_from_cache = False
+        self.store_result()
+        self.notify("end calculte", from_cache=False, stats=self.calculation_stats)
+
+    def cancel_calculation(self):
+        '''
+        Notify the Observers that a calculation on a worker thread was cancelled.
+        '''
+        self.notify("cancel calculate")
+
     # Get methods.
     def get_deck_size(self):
         return self.deck_size
@@ -170,18 +933,80 @@ class Model_Hypgeo(Subject):
     
     def get_defined_groups(self):
         return self.defined_groups
+
+    def get_configuration(self):
+        '''
+        Returns an immutable Configuration snapshot of the deck size, the sample size and all groups.
+        '''
+        return Configuration(self.deck_size, self.sample_size, tuple(group.to_tuple() for group in self.defined_groups.values()))
     
     def get_unassigned_cards(self):
         return self.unassigned_cards
     
     def get_group_size(self, key):
-        return self.defined_groups[key][0]
+        return self.defined_groups[key].card_count
     
     def get_group_min(self, key):
-        return self.defined_groups[key][1]
+        return self.defined_groups[key].min_in_sample
     
+    def get_group_name(self, key):
+        return self.group_names.get(key, "")
+
     def get_group_max(self, key):
-        return self.defined_groups[key][2]
+        return self.defined_groups[key].max_in_sample
+
+    def get_engine(self):
+        return self.engine
+
+    def get_plan(self):
+        return self.plan
+
+    def get_cost_budget(self):
+        return self.cost_budget
+
+    def get_enumeration_stats(self):
+        return self.enumeration_stats
+
+    def get_binomial_stats(self):
+        return self.binomial_cache.get_stats()
+
+    def get_arithmetic(self):
+        return self.arithmetic
+
+    def get_workers(self):
+        return self.workers
+
+    def get_fold_stats(self):
+        return self.fold_cache.get_stats()
+
+    def get_result_from_cache(self):
+        return self.result_from_cache
+
+    def get_calculation_stats(self):
+        return self.calculation_stats
+
+    def get_progress(self):
+        return self.progress
 
     def get_result(self):
         return self.result
+
+    def get_curve(self):
+        return self.curve
+
+    def get_turns(self):
+        return self.turns
+
+    def get_grid(self):
+        return self.grid
+
+    def get_exact_result(self):
+        '''
+        Returns the result of the last calculation as a Fraction, or None if it was calculated in log-space.
+        '''
+        if self.dividend is None:
+            return None
+        return Fraction(self.dividend, self.divisor)
+
+    def get_error_bound(self):
+        return self.error_bound
@@ -0,0 +1,179 @@
+'''
+Calculates the probability of the configured hand turn by turn: An opening hand is drawn, then
+draws_per_turn cards every turn. Optionally, hands which don't pass a keep rule are shuffled back
+and redrawn with one card less (mulligan).
+
+The cards seen by a turn are the opening hand plus the next extra cards of the deck, so the number of ways
+to see h_i cards of group i in the hand and a_i more by the turn is the product of C(card_count, h_i) * C(card_count - h_i, a_i)
+over the groups, times the ways of the unassigned cards. Like the "convolution" engine, the groups are folded into
+a table instead of walking the states of the deck:
+- kept[H][A] sums these products over all kept hands with H group cards and A more group cards by the turn,
+  whose groups are within their windows. With the default keep rule (every group within its window) every group
+  contributes a factor, so the table is a two-dimensional fold.
+- A custom keep rule needs the exact hand, so the hands are enumerated depth-first. The one-dimensional folds of the
+  later draws are shared by all hands with the same first groups.
+The unassigned cards fill the rest of the hand and of the later draws, so all turns come out of one table.
+
+Included are:
+- calculate_turns(configuration, turns, draws_per_turn, mulligans, keep)
+'''
+
+# Imports.
+from math import comb
+
+# Methods.
+def fold_vectors(coefficients, vector, truncation):
+    '''
+    Returns the fold of two coefficient vectors, truncated at truncation. None stands for a vector of zeros.
+    '''
+    if coefficients is None or vector is None:
+        return None
+    folded = [0] * (truncation + 1)
+    for drawn, ways in enumerate(coefficients):
+        if ways:
+            for more, more_ways in enumerate(vector[:truncation - drawn + 1]):
+                folded[drawn + more] += ways * more_ways
+    return folded
+
+def calculate_turns(configuration, turns=10, draws_per_turn=1, mulligans=0, keep=None):
+    '''
+    Calculates the probability that the cards seen so far satisfy all groups, for every turn from 0 (opening hand) to turns.
+    Returns a dict with "turns" (list of probabilities), "keep" (probability to keep the hand after 0, 1, ... mulligans),
+    "hands" (hands a custom keep rule was asked about) and "terms" (nonzero entries of the folded tables).
+
+    configuration: Configuration, its sample_size is the size of the opening hand.
+    mulligans: Most mulligans. Every mulligan draws a new hand with one card less. The last hand is always kept.
+    keep: Function which gets the tuple of the drawn cards of every group in the opening hand and returns True to keep it.
+          Default: Keep hands which satisfy all groups.
+    '''
+    deck_size, hand_size, groups = configuration
+    unassigned_cards = configuration.get_unassigned_cards()
+    stats = {"hands": 0, "terms": 0}
+
+    def in_window(index, count):
+        return groups[index][1] <= count <= groups[index][2]
+
+    def draw_vector(index, in_hand, extra):
+        '''
+        Returns the ways to draw more cards of group index after in_hand of them are in the hand, up to extra more,
+        so that the group is within its window. None if it can't be anymore.
+        '''
+        card_count = groups[index][0]
+        vector = [comb(card_count - in_hand, more) if in_window(index, in_hand + more) else 0 for more in range(extra + 1)]
+        return vector if any(vector) else None
+
+    def fold_hands(size, extra, keep_window):
+        '''
+        Returns (kept_ways, kept) for the default keep rule: kept_ways[H] are the ways of the kept hands with H group cards.
+        keep_window: False for the last hand, which is kept anyway.
+        '''
+        kept_ways = [1] + [0] * size
+        kept = [[1] + [0] * extra] + [[0] * (extra + 1) for _ in range(size)]
+        for index, (card_count, _, _) in enumerate(groups):
+            hand_vector = [comb(card_count, in_hand) if not keep_window or in_window(index, in_hand) else 0
+                           for in_hand in range(min(card_count, size) + 1)]
+            kept_ways = fold_vectors(kept_ways, hand_vector, size)
+            vectors = []            # [(in_hand, [(more, ways), ...]), ...] of the group, without zeros.
+            for in_hand, hand_ways in enumerate(hand_vector):
+                vector = draw_vector(index, in_hand, extra) if hand_ways else None
+                if vector is not None:
+                    vectors.append((in_hand, [(more, hand_ways * ways) for more, ways in enumerate(vector) if ways]))
+            folded = [[0] * (extra + 1) for _ in range(size + 1)]
+            for drawn, row in enumerate(kept):
+                for drawn_later, ways in enumerate(row):
+                    if ways:
+                        for in_hand, vector in vectors:
+                            if drawn + in_hand > size:
+                                break
+                            target = folded[drawn + in_hand]
+                            for more, more_ways in vector:
+                                if drawn_later + more > extra:
+                                    break
+                                target[drawn_later + more] += ways * more_ways
+            kept = folded
+        return kept_ways, kept
+
+    def enumerate_hands(size, extra):
+        '''
+        Returns (kept_ways, kept) like fold_hands() for a custom keep rule. The hands are walked depth-first with an
+        explicit stack, every frame holds the fold of the later draws of the groups before it.
+        '''
+        kept_ways = [0] * (size + 1)
+        kept = [[0] * (extra + 1) for _ in range(size + 1)]
+        counts = [0] * len(groups)
+        suffix_cards = [0] * (len(groups) + 1)      # suffix_cards[depth]: Cards of the groups depth, depth+1, ...
+        for depth in range(len(groups) - 1, -1, -1):
+            suffix_cards[depth] = suffix_cards[depth + 1] + groups[depth][0]
+        vectors = {}                                # {(index, in_hand): draw_vector()}
+
+        def frame(depth, drawn, ways, coefficients):
+            top = min(groups[depth][0], size - drawn) if depth < len(groups) else -1
+            return depth, drawn, ways, coefficients, iter(range(top + 1))
+
+        stack = [frame(0, 0, 1, [1] + [0] * extra)]
+        while stack:
+            depth, drawn, ways, coefficients, hand_counts = stack[-1]
+            if depth == len(groups):
+                stack.pop()
+                stats["hands"] += 1
+                if keep(tuple(counts)):
+                    kept_ways[drawn] += ways
+                    if coefficients is not None:
+                        row = kept[drawn]
+                        for drawn_later, later_ways in enumerate(coefficients):
+                            row[drawn_later] += ways * later_ways
+                continue
+            child = None
+            for in_hand in hand_counts:
+                if size - drawn - in_hand > suffix_cards[depth + 1] + unassigned_cards:    # The rest of the hand can't be filled.
+                    continue
+                key = (depth, in_hand)
+                if key not in vectors:
+                    vectors[key] = draw_vector(depth, in_hand, extra)
+                counts[depth] = in_hand
+                child = frame(depth + 1, drawn + in_hand, ways * comb(groups[depth][0], in_hand), fold_vectors(coefficients, vectors[key], extra))
+                break
+            if child is None:
+                stack.pop()
+            else:
+                stack.append(child)
+        return kept_ways, kept
+
+    def get_success(kept, size, drawn_later):
+        '''
+        Returns the probability that a kept hand of size cards and drawn_later more cards satisfy all groups.
+        '''
+        dividend = 0
+        for drawn, row in enumerate(kept):
+            hand_rest = size - drawn                    # Unassigned cards in the hand.
+            if hand_rest > unassigned_cards:
+                continue
+            later_ways = 0
+            for drawn_group_cards, ways in enumerate(row[:drawn_later + 1]):
+                if ways:
+                    later_ways += ways * comb(unassigned_cards - hand_rest, drawn_later - drawn_group_cards)
+            dividend += comb(unassigned_cards, hand_rest) * later_ways
+        return dividend / (comb(deck_size, size) * comb(deck_size - size, drawn_later))
+
+    turn_probabilities = [0.0] * (turns + 1)
+    keep_probabilities = []
+    branch_probability = 1.0            # Probability to draw the hand with this many mulligans.
+    for mulligan in range(mulligans + 1):
+        size = min(hand_size - mulligan, deck_size)
+        last = mulligan == mulligans or size == 0
+        extra = min(turns * draws_per_turn, deck_size - size)
+        if last or keep is None:
+            kept_ways, kept = fold_hands(size, extra, not last)
+        else:
+            kept_ways, kept = enumerate_hands(size, extra)
+        stats["terms"] += sum(1 for row in kept for ways in row if ways)
+        keep_probability = 1.0 if last else sum(ways * comb(unassigned_cards, size - drawn) for drawn, ways in enumerate(kept_ways)) / comb(deck_size, size)
+        keep_probabilities.append(branch_probability * keep_probability)
+
+        for turn in range(turns + 1):
+            turn_probabilities[turn] += branch_probability * get_success(kept, size, min(turn * draws_per_turn, extra))
+
+        branch_probability *= 1.0 - keep_probability
+        if last or branch_probability == 0.0:
+            break
+    return {"turns": turn_probabilities, "keep": keep_probabilities, "hands": stats["hands"], "terms": stats["terms"]}
@@ -6,6 +6,12 @@ These classes are:
 - Subject
 '''
 
+# Imports.
+from contextlib import contextmanager
+
+# Constants.
+MAX_ROUNDS = 100                # Rounds of one delivery. Events of longer cascades are handed to the scheduler or dropped.
+
 # Classes.
 class Observer():
     '''
@@ -19,14 +25,35 @@ class Observer():
         '''
         pass
 
+    def end_delivery(self):
+        '''
+        Called once when a delivery has ended, after the events of all its rounds were handled.
+        Observers which redraw for many events can redraw here once instead.
+        '''
+        pass
+
 class Subject():
     '''
     Class Subject from the "Observer Pattern".
     The system which is being observed by the Observer implements this class further.
+
+    Events are delivered in rounds. Events notified while a round is delivered (an Observer reacts by
+    changing the Subject again) are queued and delivered in a follow-up round after it, until no events
+    are left. Then every Observer's end_delivery() is called once. One delivery runs at most MAX_ROUNDS
+    rounds, so a cascade can't hang the program: The events left after them are delivered by the scheduler
+    (see set_scheduler()) if there is one, else they are dropped and logged.
+    Inside "with subject.batch():" all events are queued and delivered as one round at the end.
+    Queued events with the same event_code and group_key are coalesced, only the last one is delivered.
     '''
     def __init__(self):
 
         self.observers = set()
+        self.queued_events = {}         # {(event_code, group_key): kwargs} of the next round, in the order they were notified.
+        self.batch_depth = 0            # Number of open batch() blocks.
+        self.delivering = False         # True while a round is delivered.
+        self.scheduler = None           # Optional function which runs a function soon on the thread of the Observers, see set_scheduler().
+        self.delivery_scheduled = False # True if the scheduler will deliver the queued events.
+        self.event_stats = {"delivered": 0, "coalesced": 0, "rounds": 0, "deferred": 0, "dropped": 0}
 
     def attach(self, observer):
         '''
@@ -34,11 +61,112 @@ class Subject():
         '''
         self.observers.add(observer)
 
+    def set_scheduler(self, scheduler):
+        '''
+        Sets the function which delivers events that are notified while a round is delivered, e.g. tkinter's after_idle.
+        scheduler(function) must call function soon on the thread of the Observers. None: Deliver them after the round.
+        The scheduler also delivers the events left after MAX_ROUNDS rounds.
+        '''
+        self.scheduler = scheduler
+
     def notify(self, event_code, **kwargs):
         '''
         Notifiy all Observers about a change.
         The event_code further specifies what exactly changed.
         **kwargs for arguments that are important in combination with the change.
         '''
-        for observer in self.observers:
-            observer.update(event_code, **kwargs)
+        self.queue_event(event_code, kwargs)
+        if not self.batch_depth:
+            self.request_delivery()
+
+    def queue_event(self, event_code, kwargs):
+        '''
+        Queues an event for the next round. Replaces a queued event with the same event_code and group_key.
+        '''
+        key = (event_code, kwargs.get("group_key"))
+        if key in self.queued_events:
+            self.event_stats["coalesced"] += 1
+            del self.queued_events[key]     # The event moves to the end, it happened last.
+        self.queued_events[key] = kwargs
+
+    def request_delivery(self):
+        '''
+        Delivers the queued events now, or lets the scheduler deliver them if a round is being delivered.
+        Without a scheduler, the round that is being delivered delivers them in its follow-up round.
+        '''
+        if not self.delivering:
+            self.deliver_rounds()
+        elif self.scheduler is not None:
+            self.schedule_delivery()
+
+    def schedule_delivery(self):
+        '''
+        Lets the scheduler deliver the queued events, once.
+        '''
+        if not self.delivery_scheduled:
+            self.delivery_scheduled = True
+            self.scheduler(self.deliver_scheduled)
+
+    def deliver_scheduled(self):
+        '''
+        Called by the scheduler. May run inside of a round, if an Observer runs a nested event loop.
+        '''
+        self.delivery_scheduled = False
+        self.deliver_rounds()
+
+    def deliver_rounds(self):
+        '''
+        Delivers the queued events and the follow-up rounds they cause, then calls end_delivery() of the Observers.
+        '''
+        outer_delivering = self.delivering
+        self.delivering = True
+        try:
+            for _ in range(MAX_ROUNDS):
+                if not self.queued_events:
+                    break
+                events, self.queued_events = self.queued_events, {}
+                self.event_stats["rounds"] += 1
+                for (event_code, _), kwargs in events.items():
+                    self.event_stats["delivered"] += 1
+                    for observer in list(self.observers):
+                        observer.update(event_code, **kwargs)
+            else:
+                self.handle_leftover_events()
+        finally:
+            self.delivering = outer_delivering
+        if not outer_delivering:
+            for observer in list(self.observers):
+                observer.end_delivery()
+
+    def handle_leftover_events(self):
+        '''
+        Hands the events left after MAX_ROUNDS rounds to the scheduler, or drops them without one.
+        They must not wait in the queue, else they would reach the Observers with some unrelated later event.
+        '''
+        if not self.queued_events:
+            return
+        if self.scheduler is not None:
+            self.event_stats["deferred"] += len(self.queued_events)
+            self.schedule_delivery()
+        else:
+            import logging              # Imported on demand, so logging doesn't slow down the start of the program.
+            self.event_stats["dropped"] += len(self.queued_events)
+            logging.getLogger(__name__).warning("Dropped %d events after %d rounds: %s", len(self.queued_events), MAX_ROUNDS,
+                                                ", ".join(event_code for event_code, _ in self.queued_events))
+            self.queued_events = {}
+
+    @contextmanager
+    def batch(self):
+        '''
+        Context manager which queues all events until the outermost batch() block ends, then delivers them.
+        '''
+        self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.batch_depth -= 1
+        if not self.batch_depth and self.queued_events:
+            self.request_delivery()
+
+    def get_event_stats(self):
+        return dict(self.event_stats)
@@ -0,0 +1,184 @@
+'''
+Searches the card counts of the groups which maximize the probability of drawing the configured hand.
+
+Every group gets a range of card counts to try, its min_in_sample and max_in_sample stay fixed.
+The search is depth-first over the groups: The coefficient vector of the groups that already have a
+card count (see Model_Hypgeo.fold_groups()) is folded once per node and shared by all candidates below it.
+Every node has an upper bound of the candidates below it: The groups without a card count are merged
+into one group with as many cards as they can have together, which must have at least the sum of their
+min_in_sample in the sample. Subtrees whose bound can't beat the top candidates are pruned.
+
+Usage:
+    python optimizer.py --deck-size 60 --sample-size 7 --group 14 20 1 7 --group 4 12 1 4 --budget 30 --top 5
+'''
+
+# Imports.
+import heapq
+import json
+from concurrent.futures import ProcessPoolExecutor
+from configuration import Group
+from fold_cache import Fold_Cache
+from headless import build_model
+from methods_for_model import check_positive_int
+
+# Methods.
+def search_partition(deck_size, sample_size, groups, budget, top, first_count):
+    '''
+    Searches all candidates in which the first group has first_count cards and returns (top candidates, stats).
+    Runs in the worker processes of optimize(), so it only gets picklable arguments.
+    '''
+    search = Composition_Search(deck_size, sample_size, groups, budget, top)
+    search.search(first_count=first_count)
+    return search.best, search.stats
+
+def optimize(deck_size, sample_size, groups, budget=None, top=10, processes=1):
+    '''
+    Returns the top candidates as a dict with "best", "top" (list of {"card counts": [...], "probability": float},
+    the best first) and "stats" (searched nodes, evaluated candidates, pruned subtrees).
+
+    groups: Iterable of [lowest card_count, highest card_count, min_in_sample, max_in_sample].
+    budget: Most cards in all groups together. Default: deck_size.
+    processes: The candidates are split by the card count of the first group over this many worker processes.
+    Raises ValueError if the configuration is invalid.
+    '''
+    search = Composition_Search(deck_size, sample_size, groups, budget, top)
+    if processes <= 1 or len(search.groups) < 2:
+        search.search()
+        best, stats = search.best, search.stats
+    else:
+        best, stats = [], {"nodes": 0, "candidates": 0, "pruned": 0}
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(search_partition, deck_size, sample_size, search.groups, search.budget, top, first_count)
+                       for first_count in search.get_card_counts(0, 0)]
+            for future in futures:
+                partition_best, partition_stats = future.result()
+                for candidate in partition_best:
+                    search.add_candidate(best, candidate)
+                for key in stats:
+                    stats[key] += partition_stats[key]
+    ranking = [{"card counts": list(card_counts), "probability": probability} for probability, card_counts in sorted(best, reverse=True)]
+    return {"best": ranking[0] if ranking else None, "top": ranking, "stats": stats}
+
+# Classes.
+class Composition_Search():
+    '''
+    Depth-first search over the card counts of the groups, see optimize().
+    '''
+    def __init__(self, deck_size, sample_size, groups, budget=None, top=10):
+        self.groups = [tuple(group) for group in groups]    # (lowest card_count, highest card_count, min_in_sample, max_in_sample)
+        self.budget = deck_size if budget is None else min(budget, deck_size)
+        self.top = top
+        for lowest, highest, min_in_sample, max_in_sample in self.groups:
+            if not (all(check_positive_int(value) for value in (lowest, highest, min_in_sample, max_in_sample))
+                    and lowest <= highest and min_in_sample <= max_in_sample and min_in_sample <= highest):
+                raise ValueError("invalid group range")
+        if not (check_positive_int(top) and top > 0 and check_positive_int(self.budget)):
+            raise ValueError("invalid top or budget")
+        self.model = build_model(deck_size, sample_size, [])   # Validates deck_size and sample_size, provides the binomial coefficients.
+        self.fold_cache = Fold_Cache()                          # Only its fold_vectors() is used, the groups of the search aren't groups of the model.
+        self.fold_cache.set_truncation(sample_size)
+        self.sample_size = sample_size
+        self.deck_size = deck_size
+        self.divisor = self.model.binomial_cache.get(deck_size, sample_size)
+        self.suffix_lowest = [0] * (len(self.groups) + 1)   # suffix_lowest[depth]: Fewest cards the groups depth, depth+1, ... need.
+        self.suffix_highest = [0] * (len(self.groups) + 1)  # suffix_highest[depth]: Most cards the groups depth, depth+1, ... can have.
+        self.suffix_min = [0] * (len(self.groups) + 1)      # suffix_min[depth]: Sum of min_in_sample of the groups depth, depth+1, ...
+        for depth in range(len(self.groups) - 1, -1, -1):
+            self.suffix_lowest[depth] = self.suffix_lowest[depth + 1] + self.groups[depth][0]
+            self.suffix_highest[depth] = self.suffix_highest[depth + 1] + self.groups[depth][1]
+            self.suffix_min[depth] = self.suffix_min[depth + 1] + self.groups[depth][2]
+        self.vectors = {}       # {(card_count, min_in_sample, max_in_sample): coefficient vector}
+        self.best = []          # Heap of the top candidates (probability, card counts), the worst first.
+        self.stats = {"nodes": 0, "candidates": 0, "pruned": 0}
+
+    def get_card_counts(self, depth, assigned):
+        '''
+        Returns the card counts the group at depth can have within the budget, the highest first,
+        because high card counts usually give good candidates early, which prunes more.
+        '''
+        lowest, highest = self.groups[depth][:2]
+        highest = min(highest, self.budget - assigned - self.suffix_lowest[depth + 1])
+        return range(highest, lowest - 1, -1)
+
+    def group_vector(self, card_count, min_in_sample, max_in_sample):
+        '''
+        Returns the coefficient vector of a group, like Model_Hypgeo.group_vector(). Vectors are memoized.
+        '''
+        key = (card_count, min_in_sample, max_in_sample)
+        vector = self.vectors.get(key)
+        if vector is None:
+            vector = [0] * (self.sample_size + 1)
+            for in_sample in Group(card_count, min_in_sample, max_in_sample).get_slot_sizes(self.sample_size):
+                vector[in_sample] = self.model.binomial_cache.get(card_count, in_sample)
+            self.vectors[key] = vector
+        return vector
+
+    def get_probability(self, coefficients, assigned):
+        '''
+        Returns the probability of the folded groups, all other cards of the deck are in the rest slot.
+        '''
+        return self.model.combine_with_rest(coefficients, self.sample_size, self.deck_size - assigned) / self.divisor
+
+    def get_bound(self, depth, coefficients, assigned):
+        '''
+        Returns an upper bound of the probability of all candidates below a node.
+        The groups from depth on are merged into one group with their most cards together, which must have at least
+        the sum of their min_in_sample in the sample. More cards and fewer constraints never lower the probability.
+        '''
+        merged_cards = min(self.suffix_highest[depth], self.budget - assigned)
+        merged_min = self.suffix_min[depth]
+        if merged_min == 0:
+            return self.get_probability(coefficients, assigned)
+        vector = self.group_vector(merged_cards, merged_min, merged_cards)
+        return self.get_probability(self.fold_cache.fold_vectors(coefficients, vector), assigned + merged_cards)
+
+    def add_candidate(self, best, candidate):
+        if len(best) < self.top:
+            heapq.heappush(best, candidate)
+        elif candidate > best[0]:
+            heapq.heapreplace(best, candidate)
+
+    def search(self, depth=0, coefficients=None, assigned=0, card_counts=(), first_count=None):
+        '''
+        Searches all candidates below a node. first_count: Only search this card count of the first group.
+        '''
+        if coefficients is None:
+            coefficients = [1] + [0] * self.sample_size
+        self.stats["nodes"] += 1
+        if depth == len(self.groups):
+            self.stats["candidates"] += 1
+            self.add_candidate(self.best, (self.get_probability(coefficients, assigned), card_counts))
+            return
+        if len(self.best) == self.top and self.get_bound(depth, coefficients, assigned) <= self.best[0][0]:
+            self.stats["pruned"] += 1
+            return
+        min_in_sample, max_in_sample = self.groups[depth][2:]
+        card_counts_of_group = self.get_card_counts(depth, assigned) if first_count is None else [first_count]
+        for card_count in card_counts_of_group:
+            vector = self.group_vector(card_count, min_in_sample, max_in_sample)
+            self.search(depth + 1, self.fold_cache.fold_vectors(coefficients, vector), assigned + card_count, card_counts + (card_count,))
+
+def main(argv=None):
+    '''
+    Command line interface. Prints the result as JSON.
+    '''
+    import argparse     # Imported on demand, like in headless.py.
+    parser = argparse.ArgumentParser(prog="optimizer", description="Search the card counts of the groups which maximize the probability of drawing the configured hand.")
+    parser.add_argument("--deck-size", type=int, required=True, help="number of cards in the deck")
+    parser.add_argument("--sample-size", type=int, required=True, help="number of cards drawn")
+    parser.add_argument("--group", type=int, nargs=4, action="append", default=[], metavar=("LOWEST", "HIGHEST", "MIN", "MAX"),
+                        help="range of cards of the group in the deck, min. and max. in sample (repeatable)")
+    parser.add_argument("--budget", type=int, help="most cards in all groups together (default: deck size)")
+    parser.add_argument("--top", type=int, default=10, help="number of candidates to return")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes")
+    args = parser.parse_args(argv)
+
+    try:
+        result = optimize(args.deck_size, args.sample_size, args.group, args.budget, args.top, args.processes)
+    except ValueError as error:
+        parser.error(str(error))
+    print(json.dumps(result))
+
+# Execute the command line interface only when this exact file is run.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+'''
+This module defines the Profiling_Observer class.
+'''
+
+# Imports.
+import json
+from math import floor, log10
+from observer_subject import Observer
+
+# Classes.
+class Profiling_Observer(Observer):
+    '''
+    Optional Observer which aggregates the statistics the model sends with its calculation events.
+
+    Attach it to a model with model.attach(Profiling_Observer()). Per engine, it counts the calculations
+    and builds histograms of their time and of the generated combinations (in powers of ten).
+    The slowest configurations are kept, so it is visible which configurations are slow without a profiler.
+    '''
+    def __init__(self, slowest=10):
+        self.slowest_count = slowest    # Number of slowest calculations that are kept.
+        self.engines = {}               # {engine: {"calculations": int, "seconds": float, "time histogram": {...}, "combinations histogram": {...}}}
+        self.slowest = []               # The slowest calculations, sorted from slow to fast.
+        self.cache_lookups = {"hits": 0, "misses": 0, "seconds": 0.0}
+        self.last_stats = {}            # Statistics of the last calculation, e.g. the binomial and fold cache.
+
+    def update(self, event_code, **kwargs):
+        '''
+        Aggregate the statistics of "end calculte", "end calculate curve", "end calculate turns", "end calculate query", "end calculate grid" and "result cache lookup".
+        '''
+        if event_code in ("end calculte", "end calculate curve", "end calculate turns", "end calculate query", "end calculate grid") and "stats" in kwargs:
+            self.add_calculation(kwargs["stats"])
+
+        elif event_code == "result cache lookup":
+            self.cache_lookups["hits" if kwargs["hit"] else "misses"] += 1
+            self.cache_lookups["seconds"] += kwargs["seconds"]
+
+    def add_calculation(self, stats):
+        '''
+        Adds the statistics of one calculation.
+        '''
+        engine = self.engines.setdefault(stats["engine"], {"calculations": 0, "seconds": 0.0, "time histogram": {}, "combinations histogram": {}})
+        engine["calculations"] += 1
+        engine["seconds"] += stats["seconds"]
+        self.count(engine["time histogram"], stats["seconds"], "s")
+        if stats.get("combinations generated") is not None:
+            self.count(engine["combinations histogram"], stats["combinations generated"], "")
+
+        self.last_stats = stats
+        self.slowest.append({key: stats[key] for key in ("engine", "seconds", "groups", "configuration") if key in stats})
+        self.slowest.sort(key=lambda calculation: calculation["seconds"], reverse=True)
+        del self.slowest[self.slowest_count:]
+
+    def count(self, histogram, value, unit):
+        '''
+        Increases the bucket of value in histogram. Buckets are powers of ten, e.g. "1e-03 s".
+        '''
+        bucket = "0" + unit if value <= 0 else "{:.0e}".format(10 ** floor(log10(value))) + (" " + unit if unit else "")
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+
+    def get_report(self):
+        '''
+        Returns all aggregated statistics as a dict.
+        '''
+        return {"engines": self.engines, "slowest": self.slowest, "result cache lookups": self.cache_lookups, "last": self.last_stats}
+
+    def dump(self, path):
+        '''
+        Writes the report to a JSON file.
+        '''
+        with open(path, "w") as write_profile:
+            json.dump(self.get_report(), write_profile, indent=4)
@@ -0,0 +1,131 @@
+'''
+This module defines the Result_Cache class.
+'''
+
+# Imports.
+import json
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from configuration import Configuration
+
+# Constants.
+TOUCH_FLUSH_INTERVAL = 256      # Memory hits whose last_used is collected before it is written to the file.
+
+# Methods.
+def canonical_key(deck_size, sample_size, groups, arithmetic="exact"):
+    '''
+    Returns a string which is equal for all configurations with the same probability.
+
+    groups: Iterable of [card_count, min_in_sample, max_in_sample] (or Groups).
+    See Configuration.canonical() for the rules.
+    '''
+    configuration = Configuration.from_groups(deck_size, sample_size, groups).canonical()
+    return json.dumps([deck_size, sample_size, configuration.groups, arithmetic], separators=(",", ":"))
+
+@lru_cache(maxsize=4096)
+def configuration_key(configuration, arithmetic="exact"):
+    '''
+    Returns the canonical_key() of a Configuration. Configurations are hashable, so the keys are memoized.
+    '''
+    return canonical_key(*configuration, arithmetic)
+
+# Classes.
+class Result_Cache():
+    '''
+    Stores results of calculations on disk in a SQLite file, so they survive the session.
+
+    Lookups go to an LRU dict in memory first, so repeated hits take microseconds. The file holds
+    at most max_entries results; the least recently used ones are evicted. Memory hits update
+    last_used in the file too, in batches, so hot results aren't evicted.
+    '''
+    def __init__(self, path="result_cache.sqlite", max_entries=10000):
+        import sqlite3                  # Imported on demand, so sqlite3 doesn't slow down the start of the program.
+        self.path = path
+        self.max_entries = max_entries
+        self.memory = OrderedDict()     # {key: (result, dividend, divisor, error_bound)} of this session, the least recently used first.
+        self.touched = {}               # {key: time} of memory hits whose last_used isn't written to the file yet.
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result REAL, dividend TEXT, divisor TEXT, error_bound REAL, last_used REAL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self.connection.commit()
+        self.entry_count = self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def lookup(self, key):
+        '''
+        Returns (result, dividend, divisor, error_bound) of key, or None if it isn't cached.
+        dividend and divisor are None for results calculated in log-space.
+        '''
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.memory.move_to_end(key)
+            self.touched[key] = time.time()
+            if len(self.touched) >= TOUCH_FLUSH_INTERVAL:
+                self.flush_touched()
+                self.connection.commit()
+            return entry
+
+        row = self.connection.execute("SELECT result, dividend, divisor, error_bound FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.connection.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.connection.commit()
+        result, dividend, divisor, error_bound = row
+        entry = (result, None if dividend is None else int(dividend), None if divisor is None else int(divisor), error_bound)
+        self.remember(key, entry)
+        return entry
+
+    def flush_touched(self):
+        '''
+        Writes last_used of the memory hits to the file. The caller commits.
+        '''
+        if self.touched:
+            self.connection.executemany("UPDATE results SET last_used = ? WHERE key = ?", [(used, key) for key, used in self.touched.items()])
+            self.touched.clear()
+
+    def remember(self, key, entry):
+        '''
+        Keeps an entry in memory. At most max_entries are kept, the least recently used ones are forgotten first.
+        '''
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def store(self, key, result, dividend=None, divisor=None, error_bound=0.0):
+        '''
+        Stores a result. Evicts the least recently used results if the file is full.
+        '''
+        self.remember(key, (result, dividend, divisor, error_bound))
+        self.flush_touched()            # Before evicting, so the order of last_used is up to date.
+        if self.connection.execute("SELECT 1 FROM results WHERE key = ?", (key,)).fetchone() is None:
+            self.entry_count += 1
+        self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                                (key, result, None if dividend is None else str(dividend), None if divisor is None else str(divisor), error_bound, time.time()))
+        if self.entry_count > self.max_entries:
+            self.connection.execute("DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)", (self.entry_count - self.max_entries,))
+            self.entry_count = self.max_entries
+        self.connection.commit()
+
+    def clear(self):
+        '''
+        Removes all results from memory and from the file.
+        '''
+        self.memory.clear()
+        self.touched.clear()
+        self.connection.execute("DELETE FROM results")
+        self.connection.commit()
+        self.entry_count = 0
+
+    def close(self):
+        self.flush_touched()
+        self.connection.commit()
+        self.connection.close()
+
+    def get_stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": self.entry_count, "max entries": self.max_entries}
@@ -0,0 +1,283 @@
+'''
+Local JSON service for the calculator, built on asyncio (no extra dependencies).
+
+Requests:
+    POST /probability   {"deck_size": 60, "sample_size": 7, "groups": [[4, 1, 4], [10, 0, 2]], "arithmetic": "auto"}
+                        -> 200 {"probability": 0.39, "coalesced": false}
+                        -> 400 {"error": "invalid deck size"}
+                        -> 422 {"error": "over budget", "estimated cost": ..., "budget": ...}
+                        -> 503 {"error": "busy"}    (too many calculations pending, retry later)
+    GET  /stats         -> 200 {"requests": ..., "calculations": ..., "coalesced": ..., "rejected": ..., "over budget": ..., "pending": ...}
+
+Calculations run on a bounded process pool. Identical requests (same configuration_key) that arrive while
+the first one is still being calculated wait for its result instead of being calculated again.
+If more than max_pending calculations are pending, new ones are rejected with 503 (backpressure).
+Calculations whose estimated cost exceeds the cost budget (see Model_Hypgeo.estimate_costs()) are refused with 422
+before they reach the pool, so a few huge requests can't occupy every worker.
+
+Usage:
+    python service.py serve --port 8765 --workers 2
+    python service.py benchmark --requests 2000 --concurrency 32
+'''
+
+# Imports.
+import asyncio
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+from random import Random
+from headless import build_model, calculate_probability
+from model_hypgeo import ENGINES, ARITHMETICS
+from result_cache import configuration_key
+
+# Constants.
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 422: "Unprocessable Entity",
+           500: "Internal Server Error", 503: "Service Unavailable"}
+MAX_BODY = 1 << 20              # Larger request bodies are rejected.
+SERVICE_COST_BUDGET = 10 ** 8   # Highest estimated cost of a calculation the service accepts, like GUI_COST_BUDGET of the GUI.
+
+# Classes.
+class Probability_Service():
+    '''
+    Serves probabilities over HTTP/1.1 (keep-alive) on localhost.
+    '''
+    def __init__(self, workers=None, max_pending=64, engine="auto", cost_budget=SERVICE_COST_BUDGET):
+        self.workers = workers or cpu_count() or 1
+        self.max_pending = max_pending  # Distinct calculations that may be running or queued at the same time.
+        self.engine = engine
+        self.cost_budget = cost_budget  # Highest estimated cost of a calculation, None for no limit.
+        self.executor = None
+        self.server = None
+        self.in_flight = {}             # {canonical key: asyncio.Future} of the calculations that are pending.
+        self.connections = {}           # {asyncio.Task: StreamWriter} of the open connections.
+        self.stats = {"requests": 0, "calculations": 0, "coalesced": 0, "rejected": 0, "over budget": 0, "errors": 0}
+
+    async def start(self, host="127.0.0.1", port=8765):
+        '''
+        Starts the process pool and the server. Returns the port, which is useful with port=0.
+        '''
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        '''
+        Stops the server. Open connections are closed, so their handlers end normally.
+        '''
+        self.server.close()
+        for writer in self.connections.values():
+            writer.close()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        await self.server.wait_closed()
+        self.executor.shutdown(cancel_futures=True)
+
+    async def handle_connection(self, reader, writer):
+        '''
+        Answers requests on one connection until the client closes it.
+        '''
+        self.connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    await self.respond(writer, 400, {"error": "request too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                method, path = (request_line.decode("latin-1").split() + ["", ""])[:2]
+                status, payload = await self.route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            del self.connections[asyncio.current_task()]
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive=True):
+        body = json.dumps(payload).encode()
+        head = "HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\nConnection: {}\r\n".format(
+               status, REASONS[status], len(body), "keep-alive" if keep_alive else "close")
+        if status == 503:
+            head += "Retry-After: 1\r\n"
+        writer.write(head.encode() + b"\r\n" + body)
+        await writer.drain()
+
+    async def route(self, method, path, body):
+        '''
+        Returns (status, payload) of a request.
+        '''
+        self.stats["requests"] += 1
+        if path == "/stats":
+            return 200, dict(self.stats, pending=len(self.in_flight))
+        if path != "/probability":
+            return 404, {"error": "unknown path"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        try:
+            request = json.loads(body)
+            arithmetic = request.get("arithmetic", "auto")
+            if arithmetic not in ARITHMETICS:
+                raise ValueError("invalid arithmetic")
+            model = build_model(request["deck_size"], request["sample_size"], request.get("groups", []), self.engine, arithmetic)
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            self.stats["errors"] += 1
+            return 400, {"error": str(error)}
+        model.set_cost_budget(self.cost_budget)
+        plan = model.plan_calculation()
+        if plan["over budget"]:
+            self.stats["over budget"] += 1
+            return 422, {"error": "over budget", "estimated cost": plan["estimated cost"], "budget": plan["budget"]}
+        return await self.calculate(model, arithmetic)
+
+    async def calculate(self, model, arithmetic):
+        '''
+        Calculates a validated model on the process pool, or waits for the identical calculation that is already pending.
+        '''
+        configuration = model.get_configuration()
+        key = configuration_key(configuration, arithmetic)
+        future = self.in_flight.get(key)
+        coalesced = future is not None
+        if coalesced:
+            self.stats["coalesced"] += 1
+        elif len(self.in_flight) >= self.max_pending:
+            self.stats["rejected"] += 1
+            return 503, {"error": "busy"}
+        else:
+            self.stats["calculations"] += 1
+            future = asyncio.get_running_loop().run_in_executor(self.executor, calculate_probability,
+                                                                *configuration, self.engine, arithmetic)
+            self.in_flight[key] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        try:
+            return 200, {"probability": await asyncio.shield(future), "coalesced": coalesced}
+        except Exception as error:
+            self.stats["errors"] += 1
+            return 500, {"error": str(error)}
+
+# Methods.
+async def request(reader, writer, method, path, payload=None):
+    '''
+    Sends one request on an open keep-alive connection and returns (status, payload).
+    '''
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write("{} {} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\nContent-Length: {}\r\n\r\n".format(method, path, len(body)).encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+def benchmark_configurations(count, distinct):
+    '''
+    Returns count requests made of distinct different configurations, so some of them can be coalesced.
+    '''
+    random = Random(0)                  # Fixed seed, so runs are comparable.
+    return [{"deck_size": 60 + random.randrange(distinct), "sample_size": 10, "groups": [[4, 0, 3]] * 5} for _ in range(count)]
+
+async def run_benchmark(host, port, requests=2000, concurrency=32, distinct=50):
+    '''
+    Sends requests from concurrency keep-alive connections and returns throughput and latency percentiles as a dict.
+    Requests rejected with 503 are retried after a short pause; every retry is counted.
+    '''
+    queue = list(reversed(benchmark_configurations(requests, distinct)))
+    latencies = []
+    counts = {"retries": 0, "coalesced": 0, "errors": 0}
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        while queue:
+            payload = queue.pop()
+            start = time.perf_counter()
+            while True:
+                status, response = await request(reader, writer, "POST", "/probability", payload)
+                if status != 503:
+                    break
+                counts["retries"] += 1
+                await asyncio.sleep(0.01)
+            latencies.append(time.perf_counter() - start)
+            counts["coalesced"] += response.get("coalesced", False)
+            counts["errors"] += status != 200
+        writer.close()
+        await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    return dict(counts,
+                requests=requests,
+                seconds=seconds,
+                throughput=requests / seconds,
+                latency_ms={str(percentile): latencies[min(len(latencies) - 1, int(len(latencies) * percentile / 100))] * 1000 for percentile in (50, 90, 99)})
+
+async def serve(host, port, workers, max_pending, engine, cost_budget):
+    service = Probability_Service(workers, max_pending, engine, cost_budget)
+    port = await service.start(host, port)
+    print("Serving on http://{}:{}".format(host, port))
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.close()
+
+async def benchmark(args):
+    '''
+    Runs the benchmark client, against a server started in this process unless --port is given.
+    '''
+    service = None
+    port = args.port
+    if port is None:
+        service = Probability_Service(args.workers, args.max_pending, args.engine, args.cost_budget)
+        port = await service.start(args.host, 0)
+    try:
+        results = await run_benchmark(args.host, port, args.requests, args.concurrency, args.distinct)
+    finally:
+        if service is not None:
+            results["server"] = dict(service.stats)
+            await service.close()
+    print(json.dumps(results, indent=4))
+
+def main(argv=None):
+    '''
+    Command line interface.
+    '''
+    import argparse     # Imported on demand, like in headless.py.
+    parser = argparse.ArgumentParser(prog="service", description="Local JSON service for the calculator.")
+    parser.add_argument("mode", choices=("serve", "benchmark"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="port of the server (benchmark: connect to a running server)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: number of CPUs)")
+    parser.add_argument("--max-pending", type=int, default=64, help="distinct pending calculations before answering 503")
+    parser.add_argument("--engine", choices=ENGINES, default="auto")
+    parser.add_argument("--cost-budget", type=int, default=SERVICE_COST_BUDGET, help="highest estimated cost of a calculation before answering 422")
+    parser.add_argument("--requests", type=int, default=2000, help="benchmark: number of requests")
+    parser.add_argument("--concurrency", type=int, default=32, help="benchmark: number of connections")
+    parser.add_argument("--distinct", type=int, default=50, help="benchmark: number of different configurations")
+    args = parser.parse_args(argv)
+
+    if args.mode == "serve":
+        asyncio.run(serve(args.host, 8765 if args.port is None else args.port, args.workers, args.max_pending, args.engine, args.cost_budget))
+    else:
+        asyncio.run(benchmark(args))
+
+# Execute the command line interface only when this exact file is run.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+'''
+This module estimates the probability of drawing a sample hand from a deck with a
+Monte Carlo simulation, to cross-check Model_Hypgeo and to quickly estimate huge configurations.
+
+Included are:
+- simulate(deck_size, sample_size, groups, ...)
+- simulate_model(model, ...)
+- wilson_interval(successes, trials, confidence)
+'''
+
+# Imports.
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+import numpy as np
+from headless import build_model
+
+# Methods.
+def wilson_interval(successes, trials, confidence=0.95):
+    '''
+    Returns the (low, high) Wilson score interval of a binomial proportion.
+    '''
+    if trials == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    proportion = successes / trials
+    denominator = 1 + z ** 2 / trials
+    center = (proportion + z ** 2 / (2 * trials)) / denominator
+    margin = z * ((proportion * (1 - proportion) / trials + z ** 2 / (4 * trials ** 2)) ** 0.5) / denominator
+    return max(center - margin, 0.0), min(center + margin, 1.0)
+
+def simulate_batches(colors, sample_size, mins, maxes, trials, time_budget, batch_size, seed):
+    '''
+    Draws samples in batches until trials samples are drawn or time_budget seconds passed and returns (successes, trials).
+    Every batch is one vectorized draw without replacement. All min/max constraints are evaluated on the whole batch at once.
+    Runs in the worker processes of simulate(), so it only gets picklable arguments.
+    '''
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    successes = 0
+    drawn_trials = 0
+    while trials is None or drawn_trials < trials:
+        size = batch_size if trials is None else min(batch_size, trials - drawn_trials)
+        counts = rng.multivariate_hypergeometric(colors, sample_size, size=size)[:, :-1]   # Last color = unassigned cards.
+        successes += int(np.count_nonzero(np.all((counts >= mins) & (counts <= maxes), axis=1)))
+        drawn_trials += size
+        if time_budget is not None and time.perf_counter() - start >= time_budget:
+            break
+    return successes, drawn_trials
+
+def simulate(deck_size, sample_size, groups, trials=1000000, time_budget=None, seed=None, processes=1, batch_size=100000, confidence=0.95):
+    '''
+    Estimates the probability of drawing the configured hand and returns a dict with
+    "estimate", "low", "high" (confidence interval), "confidence", "trials", "successes" and "seconds".
+
+    groups: Iterable of [card_count, min_in_sample, max_in_sample], validated with the same rules as the GUI.
+    trials: Number of samples to draw, None for no limit (then time_budget is needed).
+    time_budget: Stop after this many seconds, even if not all trials are drawn.
+    seed: Makes the simulation reproducible (for the same number of processes).
+    processes: The trials are split over this many worker processes.
+    '''
+    if trials is None and time_budget is None:
+        raise ValueError("trials or time_budget is needed.")
+    configuration = build_model(deck_size, sample_size, groups).get_configuration()
+    colors = np.array([group[0] for group in configuration.groups] + [configuration.get_unassigned_cards()], dtype=np.int64)
+    mins = np.array([group[1] for group in configuration.groups], dtype=np.int64)
+    maxes = np.array([group[2] for group in configuration.groups], dtype=np.int64)
+
+    start = time.perf_counter()
+    seeds = np.random.SeedSequence(seed).spawn(processes)
+    if processes == 1:
+        successes, drawn_trials = simulate_batches(colors, sample_size, mins, maxes, trials, time_budget, batch_size, seeds[0])
+    else:
+        shares = [None] * processes if trials is None else [trials // processes + (index < trials % processes) for index in range(processes)]
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(simulate_batches, colors, sample_size, mins, maxes, share, time_budget, batch_size, process_seed)
+                       for share, process_seed in zip(shares, seeds)]
+            results = [future.result() for future in futures]
+        successes = sum(result[0] for result in results)
+        drawn_trials = sum(result[1] for result in results)
+
+    low, high = wilson_interval(successes, drawn_trials, confidence)
+    return {"estimate": successes / drawn_trials if drawn_trials else 0.0,
+            "low": low,
+            "high": high,
+            "confidence": confidence,
+            "trials": drawn_trials,
+            "successes": successes,
+            "seconds": time.perf_counter() - start}
+
+def simulate_model(model, **kwargs):
+    '''
+    Estimates the probability of the configuration of a Model_Hypgeo. See simulate() for the keyword arguments.
+    '''
+    return simulate(*model.get_configuration(), **kwargs)
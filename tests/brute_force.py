@@ -0,0 +1,80 @@
+'''
+Reference results for the tests: Every sample of a small deck is drawn one by one and checked.
+Also contains Recording_Observer, which the tests attach to a Subject.
+'''
+
+# Imports.
+from fractions import Fraction
+from itertools import combinations
+from random import Random
+from observer_subject import Observer
+
+# Classes.
+class Recording_Observer(Observer):
+    '''
+    Records all events and runs reactions[event_code](kwargs) while it handles an event.
+    '''
+    def __init__(self, reactions=None):
+        self.events = []
+        self.reactions = reactions or {}
+
+    def update(self, event_code, **kwargs):
+        self.events.append((event_code, kwargs))
+        reaction = self.reactions.get(event_code)
+        if reaction is not None:
+            reaction(kwargs)
+
+    def get_event_codes(self):
+        return [event_code for event_code, _ in self.events]
+
+# Methods.
+def sample_counts(deck_size, sample_size, group_sizes):
+    '''
+    Yields the number of cards of every group in every sample of sample_size cards, as a tuple.
+    The cards of the groups come first in the deck, the unassigned cards last.
+    '''
+    labels = [index for index, card_count in enumerate(group_sizes) for _ in range(card_count)]
+    labels += [None] * (deck_size - len(labels))
+    for sample in combinations(range(deck_size), sample_size):
+        counts = [0] * len(group_sizes)
+        for card in sample:
+            if labels[card] is not None:
+                counts[labels[card]] += 1
+        yield tuple(counts)
+
+def probability(deck_size, sample_size, group_sizes, accept):
+    '''
+    Returns the exact share (Fraction) of the samples whose counts pass accept(counts).
+    '''
+    accepted = 0
+    total = 0
+    for counts in sample_counts(deck_size, sample_size, group_sizes):
+        total += 1
+        accepted += bool(accept(counts))
+    return Fraction(accepted, total)
+
+def window_probability(deck_size, sample_size, groups):
+    '''
+    Returns the exact probability that every group [card_count, min_in_sample, max_in_sample] is within its window.
+    '''
+    return probability(deck_size, sample_size, [group[0] for group in groups],
+                       lambda counts: all(group[1] <= count <= group[2] for count, group in zip(counts, groups)))
+
+def random_configurations(count, seed=0, max_deck_size=12, max_groups=3):
+    '''
+    Returns count small valid configurations (deck_size, sample_size, groups), always the same for a seed.
+    '''
+    random = Random(seed)
+    configurations = []
+    for _ in range(count):
+        deck_size = random.randint(0, max_deck_size)
+        sample_size = random.randint(0, deck_size)
+        groups = []
+        unassigned_cards = deck_size
+        for _ in range(random.randint(0, max_groups)):
+            card_count = random.randint(0, unassigned_cards)
+            max_in_sample = random.randint(0, card_count)
+            groups.append([card_count, random.randint(0, max_in_sample), max_in_sample])
+            unassigned_cards -= card_count
+        configurations.append((deck_size, sample_size, groups))
+    return configurations
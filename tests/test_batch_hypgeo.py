@@ -0,0 +1,47 @@
+'''
+Tests of the vectorized batch API against Model_Hypgeo.
+'''
+
+# Imports.
+import pytest
+np = pytest.importorskip("numpy")
+from batch_hypgeo import calculate_batch, validate_batch
+from brute_force import random_configurations
+from headless import build_model
+
+# Methods.
+def pad_groups(configurations):
+    '''
+    Returns (deck_sizes, sample_sizes, group_sizes, group_mins, group_maxes) of configurations, padded with groups of [0, 0, 0].
+    '''
+    group_count = max(len(groups) for _, _, groups in configurations)
+    padded = [groups + [[0, 0, 0]] * (group_count - len(groups)) for _, _, groups in configurations]
+    return ([deck_size for deck_size, _, _ in configurations],
+            [sample_size for _, sample_size, _ in configurations],
+            [[group[0] for group in groups] for groups in padded],
+            [[group[1] for group in groups] for groups in padded],
+            [[group[2] for group in groups] for groups in padded])
+
+# Tests.
+def test_batch_matches_the_model():
+    configurations = random_configurations(200, seed=5, max_deck_size=40, max_groups=4)
+    results = calculate_batch(*pad_groups(configurations))
+    for result, (deck_size, sample_size, groups) in zip(results, configurations):
+        expected = build_model(deck_size, sample_size, groups, arithmetic="exact").calculate()
+        assert result == pytest.approx(expected, rel=1e-9, abs=1e-15), (deck_size, sample_size, groups)
+
+def test_batch_matches_the_model_on_big_decks():
+    configurations = [(60000, 40, [[4000, 1, 6], [9000, 2, 10], [300, 0, 1]]), (500, 60, [[40, 3, 12], [80, 5, 20]])]
+    results = calculate_batch(*pad_groups(configurations))
+    for result, configuration in zip(results, configurations):
+        assert result == pytest.approx(build_model(*configuration, arithmetic="exact").calculate(), rel=1e-9)
+
+def test_invalid_configurations_are_nan():
+    configurations = [(10, 3, [[4, 1, 2]]),
+                      (10, 11, [[4, 1, 2]]),            # Sample bigger than the deck.
+                      (10, 3, [[8, 1, 2], [4, 0, 1]]),  # More group cards than the deck.
+                      (10, 3, [[4, 3, 2]])]             # min_in_sample > max_in_sample.
+    arrays = pad_groups(configurations)
+    assert validate_batch(*(np.asarray(array) for array in arrays)).tolist() == [True, False, False, False]
+    results = calculate_batch(*arrays)
+    assert not np.isnan(results[0]) and np.isnan(results[1:]).all()
@@ -0,0 +1,53 @@
+'''
+Tests of Group and of the Configuration snapshots of Model_Hypgeo.
+'''
+
+# Imports.
+import pickle
+import pytest
+from configuration import Configuration, Group
+from headless import build_model
+
+# Tests.
+def test_group_unpacks_and_copies():
+    group = Group(4, 1, 2)
+    card_count, min_in_sample, max_in_sample = group
+    assert (card_count, min_in_sample, max_in_sample) == group.to_tuple() == (4, 1, 2)
+    assert list(group.get_slot_sizes(7)) == [1, 2]
+    assert group.get_highest(1) == 1
+    copy = group.copy()
+    copy.card_count = 5
+    assert group.card_count == 4
+    with pytest.raises(AttributeError):
+        group.name = "lands"        # Only the slots exist.
+
+def test_snapshot_doesnt_change_with_the_model():
+    model = build_model(20, 5, [[4, 1, 2], [3, 0, 1]])
+    snapshot = model.get_configuration()
+    model.set_deck_size(30)
+    model.set_defined_group_size(0, 6)
+    model.add_defined_group(2, 0, 1)
+    assert snapshot == (20, 5, ((4, 1, 2), (3, 0, 1)))
+    assert model.get_configuration() == (30, 5, ((6, 1, 2), (3, 0, 1), (2, 0, 1)))
+    assert snapshot.get_unassigned_cards() == 13
+
+def test_snapshot_is_hashable_and_immutable():
+    configuration = Configuration.from_groups(20, 5, [Group(4, 1, 2), [3, 0, 1]])
+    assert configuration.groups == ((4, 1, 2), (3, 0, 1))
+    assert {configuration: 1}[Configuration(20, 5, ((4, 1, 2), (3, 0, 1)))] == 1
+    assert pickle.loads(pickle.dumps(configuration)) == configuration
+    with pytest.raises(AttributeError):
+        configuration.deck_size = 30
+    with pytest.raises(TypeError):
+        configuration.groups[0][0] = 5
+
+def test_canonical_configuration():
+    configuration = Configuration(20, 3, ((4, 1, 9), (0, 0, 0), (2, 0, 1), (0, 1, 1)))
+    assert configuration.canonical() == (20, 3, ((0, 1, 0), (2, 0, 1), (4, 1, 3)))     # Sorted, capped and without the empty group.
+
+def test_copy_of_the_model_has_its_own_groups():
+    model = build_model(20, 5, [[4, 1, 2]])
+    copy = model.copy_configuration()
+    copy.set_defined_group_size(0, 6)
+    assert model.get_configuration() == (20, 5, ((4, 1, 2),))
+    assert copy.get_configuration() == (20, 5, ((6, 1, 2),))
@@ -0,0 +1,118 @@
+'''
+Tests of the validation of one edit in the GUI: The View corrects an invalid group in one round and fills the rows once,
+and filling the rows keeps the focus of the user. The View is created without a window, only its event handling runs.
+'''
+
+# Imports.
+import pytest
+pytest.importorskip("tkinter")
+from calculation_worker import Calculation_Worker
+from controller import Controller
+from model_hypgeo import Model_Hypgeo
+from view import View
+
+# Classes.
+class Counting_List():
+    '''
+    Stands in for the Virtual_List of the View and counts how often its rows are filled.
+    '''
+    def __init__(self):
+        self.refreshes = 0
+
+    def refresh(self):
+        self.refreshes += 1
+
+class Fake_Entry():
+    '''
+    Stands in for a tk.Entry of a row.
+    '''
+    def __init__(self, text=""):
+        self.text = text
+
+    def get(self):
+        return self.text
+
+    def delete(self, first, last):
+        self.text = ""
+
+    def insert(self, index, text):
+        self.text = str(text)
+
+# Methods.
+def create_gui(*groups):
+    model = Model_Hypgeo()
+    model.set_deck_size(10)
+    for group in groups:
+        model.add_defined_group(*group)
+    controller = Controller.__new__(Controller)     # Without a window.
+    controller.model = model
+    controller.worker = Calculation_Worker()
+    view = View.__new__(View)
+    view.model = model
+    view.controller = controller
+    view.groups_stale = False
+    view.lst_groups = Counting_List()
+    view.group_keys = list(model.get_defined_groups())
+    view.focused = None
+    view.focus_get = lambda: view.focused
+    view.focus_set = lambda: setattr(view, "focused", None)     # The focus moves to the window.
+    model.attach(view)
+    controller.view = view
+    return model, controller, view
+
+def create_row(view, key):
+    row = {field: Fake_Entry() for field in ["name", "size", "min", "max"]}
+    row["key"] = None
+    view.fill_group_row(row, view.group_keys.index(key))
+    return row
+
+# Tests.
+@pytest.mark.parametrize("handler, value, corrected", [("on_group_size", "20", (10, 1, 2)),
+                                                       ("on_group_size", "1", (1, 1, 1)),
+                                                       ("on_group_min", "3", (4, 3, 3)),
+                                                       ("on_group_min", "7", (4, 4, 4)),
+                                                       ("on_group_max", "9", (4, 1, 4)),
+                                                       ("on_group_max", "0", (4, 1, 1))])
+def test_one_invalid_edit_is_corrected_in_one_round(handler, value, corrected):
+    model, controller, view = create_gui((4, 1, 2))
+    getattr(controller, handler)(0, value)
+    assert (model.get_group_size(0), model.get_group_min(0), model.get_group_max(0)) == corrected
+    assert model.get_event_stats()["rounds"] == 1
+    assert view.lst_groups.refreshes == 1
+
+def test_valid_edit_sends_no_event():
+    model, controller, view = create_gui((4, 1, 2))
+    controller.on_group_max(0, "3")
+    assert model.get_group_max(0) == 3
+    assert model.get_event_stats()["rounds"] == 0
+    assert view.lst_groups.refreshes == 0
+
+def test_refill_keeps_the_focus_of_an_unchanged_entry():
+    model, controller, view = create_gui((4, 1, 2), (3, 0, 1))
+    rows = [create_row(view, key) for key in view.group_keys]
+    view.focused = rows[1]["size"]              # The user moved into another row while the first one is corrected.
+    controller.on_group_max(0, "9")
+    assert view.lst_groups.refreshes == 1
+    for index, row in enumerate(rows):          # What Virtual_List.refresh() does.
+        view.fill_group_row(row, index)
+    assert view.focused is rows[1]["size"]
+    assert rows[0]["max"].get() == "4"
+
+def test_refill_stores_a_focused_entry_first():
+    model, controller, view = create_gui((4, 1, 2), (3, 0, 1))
+    rows = [create_row(view, key) for key in view.group_keys]
+    view.focused = rows[0]["min"]
+    rows[0]["min"].text = "2"                   # Typed, but not left yet.
+    view.fill_group_row(rows[0], 0)
+    assert model.get_group_min(0) == 2
+    assert view.focused is None
+
+def test_refill_with_another_group_stores_the_focused_entry():
+    model, controller, view = create_gui((4, 1, 2), (3, 0, 1))
+    row = create_row(view, 0)
+    view.focused = row["name"]
+    row["name"].text = "lands"
+    view.fill_group_row(row, 1)                 # Scrolled, the row shows the next group.
+    assert model.get_group_name(0) == "lands"
+    assert (row["key"], row["name"].get(), row["size"].get()) == (1, "", "3")
+    assert view.focused is None
@@ -0,0 +1,80 @@
+'''
+Tests of the engines of Model_Hypgeo against brute force enumeration of all samples of small decks.
+'''
+
+# Imports.
+import threading
+from time import perf_counter
+import pytest
+import model_hypgeo
+from brute_force import random_configurations, window_probability
+from headless import build_model
+from model_hypgeo import ENGINES, Calculation_Cancelled
+
+# Constants.
+CONFIGURATIONS = random_configurations(120)
+
+# Tests.
+@pytest.mark.parametrize("engine", [engine for engine in ENGINES if engine != "parallel"])
+def test_engine_is_exact(engine):
+    for deck_size, sample_size, groups in CONFIGURATIONS:
+        model = build_model(deck_size, sample_size, groups, engine=engine, arithmetic="exact")
+        result = model.calculate()
+        expected = window_probability(deck_size, sample_size, groups)
+        assert model.get_exact_result() == expected, (deck_size, sample_size, groups)
+        assert result == float(expected)
+
+def test_parallel_engine_is_exact(monkeypatch):
+    monkeypatch.setattr(model_hypgeo, "PARALLEL_THRESHOLD", 0)     # Small configurations are calculated serially otherwise.
+    for deck_size, sample_size, groups in CONFIGURATIONS[:8]:
+        model = build_model(deck_size, sample_size, groups + [[0, 0, 0]], engine="parallel", arithmetic="exact")
+        model.set_workers(2)
+        model.calculate()
+        assert model.get_exact_result() == window_probability(deck_size, sample_size, groups), (deck_size, sample_size, groups)
+
+def test_parallel_engine_cancels_promptly():
+    model = build_model(100, 30, [[10, 0, 10]] * 7, engine="parallel", arithmetic="exact")     # Every partition streams for seconds.
+    model.set_workers(2)
+    model.cancel_event = threading.Event()
+    threading.Timer(0.5, model.cancel_event.set).start()
+    start = perf_counter()
+    with pytest.raises(Calculation_Cancelled):
+        model.compute()
+    assert perf_counter() - start < 1.5
+
+def test_log_space_is_within_its_error_bound():
+    for deck_size, sample_size, groups in CONFIGURATIONS:
+        model = build_model(deck_size, sample_size, groups, arithmetic="log")
+        result = model.calculate()
+        assert model.get_exact_result() is None
+        assert abs(result - float(window_probability(deck_size, sample_size, groups))) <= model.get_error_bound() + 1e-15
+
+def test_log_space_matches_exact_on_big_decks():
+    groups = [[4000, 1, 6], [9000, 2, 10], [300, 0, 1]]
+    exact = build_model(60000, 40, groups, arithmetic="exact")
+    log_space = build_model(60000, 40, groups, arithmetic="log")
+    assert abs(log_space.calculate() - exact.calculate()) <= log_space.get_error_bound()
+
+def test_convolution_reuses_folds_of_unchanged_groups():
+    model = build_model(16, 6, [[5, 1, 3], [4, 0, 2], [3, 1, 3]], engine="convolution", arithmetic="exact")
+    model.calculate()
+    model.set_defined_group_min(2, 2)
+    model.calculate()
+    assert model.get_exact_result() == window_probability(16, 6, [[5, 1, 3], [4, 0, 2], [3, 2, 3]])
+    assert model.get_fold_stats()["reused"] > 0
+
+def test_curve_matches_every_sample_size():
+    for deck_size, _, groups in CONFIGURATIONS[:40]:
+        model = build_model(deck_size, 0, groups, arithmetic="exact")
+        curve = model.calculate_curve(deck_size)
+        for sample_size, result in enumerate(curve):
+            assert result == pytest.approx(float(window_probability(deck_size, sample_size, groups)), abs=1e-12)
+
+def test_streaming_walks_thousands_of_groups():
+    groups = [[2, 0, 0]] * 1200 + [[3, 1, 2]]     # Deeper than the recursion limit.
+    expected = build_model(3000, 5, groups, engine="convolution", arithmetic="exact")
+    expected.calculate()
+    model = build_model(3000, 5, groups, engine="streaming", arithmetic="exact")
+    model.calculate()
+    assert model.get_exact_result() == expected.get_exact_result()
+    assert model_hypgeo.calculate_partition(model.get_configuration(), (0,)) == expected.dividend     # The "parallel" engine streams its partitions.
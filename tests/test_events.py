@@ -0,0 +1,84 @@
+'''
+Tests of the payloads of the calculation events and of the Profiling_Observer which aggregates them.
+'''
+
+# Imports.
+import json
+from brute_force import Recording_Observer
+from headless import build_model
+from profiling_observer import Profiling_Observer
+from result_cache import Result_Cache
+
+# Constants.
+STATS_KEYS = {"engine", "arithmetic", "seconds", "groups", "combinations generated", "combinations accepted",
+              "binomial calls", "binomial cache", "fold cache", "configuration", "plan"}
+
+# Methods.
+def observe(model):
+    observer = Recording_Observer()
+    model.attach(observer)
+    return observer
+
+# Tests.
+def test_calculation_events_carry_their_stats():
+    model = build_model(12, 5, [[4, 1, 2], [3, 0, 1]], engine="enumeration", arithmetic="exact")
+    observer = observe(model)
+    model.calculate()
+    assert observer.get_event_codes() == ["start calculate", "end calculte"]
+    assert observer.events[0][1] == {"engine": "enumeration", "arithmetic": "exact", "groups": 2, "deck_size": 12, "sample_size": 5}
+    end = observer.events[1][1]
+    assert end["from_cache"] is False
+    stats = end["stats"]
+    assert set(stats) == STATS_KEYS
+    assert stats["engine"] == "enumeration" and stats["groups"] == 2 and stats["seconds"] >= 0
+    assert stats["combinations generated"] >= stats["combinations accepted"] > 0
+    assert stats["configuration"] == model.get_cache_key()
+    assert stats is model.get_calculation_stats()
+
+def test_result_cache_events(tmp_path):
+    result_cache = Result_Cache(str(tmp_path / "results.sqlite"))
+    model = build_model(12, 5, [[4, 1, 2]], arithmetic="exact")
+    model.set_result_cache(result_cache)
+    observer = observe(model)
+    model.calculate()
+    model.calculate()
+    result_cache.close()
+    lookups = [kwargs for code, kwargs in observer.events if code == "result cache lookup"]
+    assert [lookup["hit"] for lookup in lookups] == [False, True]
+    assert lookups[1]["stats"]["hits"] == 1 and lookups[1]["seconds"] >= 0
+    ends = [kwargs for code, kwargs in observer.events if code == "end calculte"]
+    assert [end["from_cache"] for end in ends] == [False, True]
+    assert ends[1]["stats"]["engine"] == "result cache"
+    assert ends[1]["stats"]["configuration"] == ends[0]["stats"]["configuration"]
+
+def test_other_calculations_send_their_stats():
+    model = build_model(20, 5, [[4, 1, 2], [3, 0, 1]])
+    observer = observe(model)
+    model.calculate_curve(5)
+    model.calculate_grid(10, 12, 0, 5)
+    model.calculate_turns(3)
+    model.calculate_query("g0 >= 1")
+    assert observer.get_event_codes() == ["start calculate curve", "end calculate curve", "start calculate grid", "end calculate grid",
+                                          "start calculate turns", "end calculate turns", "end calculate query"]
+    stats = {code: kwargs["stats"] for code, kwargs in observer.events if code.startswith("end")}
+    assert [stats[code]["engine"] for code in stats] == ["curve", "grid", "turns", "query"]
+    assert stats["end calculate grid"]["cells"] == 3 * 6
+    assert len(stats["end calculate turns"]["keep"]) == 1
+    assert stats["end calculate query"]["atoms"] == 1
+
+def test_profiling_observer_aggregates_the_stats(tmp_path):
+    profiler = Profiling_Observer(slowest=2)
+    for engine in ("enumeration", "enumeration", "convolution"):
+        model = build_model(12, 5, [[4, 1, 2], [3, 0, 1]], engine=engine)
+        model.attach(profiler)
+        model.calculate()
+    model.calculate_curve(5)
+    report = profiler.get_report()
+    assert {engine: report["engines"][engine]["calculations"] for engine in report["engines"]} == {"enumeration": 2, "convolution": 1, "curve": 1}
+    assert sum(report["engines"]["enumeration"]["time histogram"].values()) == 2
+    assert sum(report["engines"]["enumeration"]["combinations histogram"].values()) == 2
+    assert len(report["slowest"]) == 2
+    assert report["slowest"][0]["seconds"] >= report["slowest"][1]["seconds"]
+    path = tmp_path / "profile.json"
+    profiler.dump(str(path))
+    assert json.loads(path.read_text())["engines"]["curve"]["calculations"] == 1
@@ -0,0 +1,93 @@
+'''
+Tests of the exporter: Appending to the CSV sidecar, merging it into a workbook and reading numbers back.
+'''
+
+# Imports.
+import csv
+import os
+import pytest
+openpyxl = pytest.importorskip("openpyxl")
+from exporter import export_scenarios, format_cell, get_sidecar_path, merge_sidecar, parse_number, scenario_rows
+
+# Methods.
+def read_rows(path):
+    with open(path, "r", newline="") as read_csv:
+        return list(csv.reader(read_csv))
+
+def create_workbook(path):
+    '''
+    Writes a workbook with a styled header, a formula and a second sheet, like one a user edited in Excel.
+    '''
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["header", 2, "=B1*2"])
+    ws["A1"].font = openpyxl.styles.Font(bold=True)
+    ws.column_dimensions["A"].width = 30
+    wb.create_sheet("notes").append(["keep me"])
+    wb.save(path)
+
+# Tests.
+def test_export_to_workbook_appends_to_the_sidecar(tmp_path):
+    path = str(tmp_path / "scenarios.xlsx")
+    first = scenario_rows(40, 7, [[4, 1, 2]], 0.25, ["lands"])
+    second = scenario_rows(60, 7, [[4, 1, 2], [3, 0, 1]], 1e-05)
+    assert export_scenarios(path, [first]) == get_sidecar_path(path)
+    assert export_scenarios(path, [second]) == get_sidecar_path(path)
+    assert not os.path.exists(path)
+    rows = read_rows(get_sidecar_path(path))
+    assert len(rows) == len(first) + len(second)
+    assert rows[:len(first)] == [[str(format_cell(value)) for value in row] for row in first]
+    assert parse_number(rows[-1][1]) == 1e-05
+
+def test_merge_keeps_the_content_of_the_workbook(tmp_path):
+    path = str(tmp_path / "scenarios.xlsx")
+    create_workbook(path)
+    export_scenarios(path, [scenario_rows(40, 7, [[4, 1, 2]], 0.25, ["lands"])])
+    merge_sidecar(path)
+    assert not os.path.exists(get_sidecar_path(path))
+    wb = openpyxl.load_workbook(path)
+    ws = wb.worksheets[0]
+    assert [cell.value for cell in ws[1]] == ["header", 2, "=B1*2"]
+    assert ws["A1"].font.bold
+    assert ws.column_dimensions["A"].width == 30
+    assert wb["notes"]["A1"].value == "keep me"
+    values = [[cell.value for cell in row] for row in ws.iter_rows(min_row=2)]
+    assert ["deck size", 40, None] in values
+    assert ["probability", 0.25, None] in values
+    assert ["lands", None, None] in values
+
+def test_merge_without_workbook_writes_it(tmp_path):
+    path = str(tmp_path / "scenarios.xlsx")
+    export_scenarios(path, [scenario_rows(40, 7, [[4, 1, 2]], 0.5)])
+    merge_sidecar(path)
+    assert not os.path.exists(get_sidecar_path(path))
+    ws = openpyxl.load_workbook(path).worksheets[0]
+    assert ["probability", 0.5] in [[cell.value for cell in row] for row in ws.iter_rows()]
+    merge_sidecar(path)                 # Nothing to merge anymore.
+
+def test_new_workbook_removes_the_sidecar(tmp_path):
+    path = str(tmp_path / "scenarios.xlsx")
+    export_scenarios(path, [scenario_rows(40, 7, [[4, 1, 2]], 0.5)])
+    export_scenarios(path, [scenario_rows(60, 7, [[4, 1, 2]], 0.75)], create_new=True)
+    assert not os.path.exists(get_sidecar_path(path))
+    ws = openpyxl.load_workbook(path).worksheets[0]
+    assert ["probability", 0.75] in [[cell.value for cell in row] for row in ws.iter_rows()]
+
+def test_csv_export_appends_or_creates(tmp_path):
+    path = str(tmp_path / "scenarios.csv")
+    rows = scenario_rows(40, 7, [[4, 1, 2]], 0.5)
+    export_scenarios(path, [rows])
+    export_scenarios(path, [rows])
+    assert len(read_rows(path)) == 2 * len(rows)
+    export_scenarios(path, [rows], create_new=True)
+    assert len(read_rows(path)) == len(rows)
+
+@pytest.mark.parametrize("text, value", [("12", 12), ("-3", -3), ("0.5", 0.5), ("1.5e3", 1500.0), (".25", 0.25),
+                                         ("1e5", "1e5"), ("nan", "nan"), ("inf", "inf"), ("lands", "lands"), ("", "")])
+def test_parse_number(text, value):
+    assert parse_number(text) == value
+    assert type(parse_number(text)) is type(value)
+
+@pytest.mark.parametrize("value", [0.1, 1e-05, 1e20, 3.0, 2.5e-300])
+def test_float_cells_read_back(value):
+    assert parse_number(format_cell(value)) == value
@@ -0,0 +1,33 @@
+'''
+Tests of Model_Hypgeo.calculate_grid() against brute force enumeration of small decks.
+'''
+
+# Imports.
+import pytest
+from brute_force import Recording_Observer, random_configurations, window_probability
+from headless import build_model
+
+# Tests.
+def test_every_cell_matches_brute_force():
+    for deck_size, sample_size, groups in random_configurations(40, seed=3, max_deck_size=10):
+        group_cards = sum(group[0] for group in groups)
+        model = build_model(deck_size, sample_size, groups)
+        grid = model.calculate_grid(group_cards, deck_size + 2, 1, 6)
+        assert len(grid) == deck_size + 3 - group_cards
+        for row, grid_deck_size in zip(grid, range(group_cards, deck_size + 3)):
+            assert len(row) == 6
+            for cell, grid_sample_size in zip(row, range(1, 7)):
+                if grid_sample_size > grid_deck_size:
+                    assert cell is None
+                else:
+                    expected = window_probability(grid_deck_size, grid_sample_size, groups)
+                    assert cell == pytest.approx(float(expected), abs=1e-12), (grid_deck_size, grid_sample_size, groups)
+
+def test_invalid_grid_is_notified():
+    model = build_model(10, 3, [[4, 1, 2], [3, 0, 1]])
+    observer = Recording_Observer()
+    model.attach(observer)
+    assert model.calculate_grid(6, 12, 0, 5) is None        # Smaller than the 7 cards of the groups.
+    assert model.calculate_grid(10, 9, 0, 5) is None
+    assert model.calculate_grid(10, 12, 4, 3) is None
+    assert observer.get_event_codes() == ["invalid grid"] * 3
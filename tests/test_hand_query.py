@@ -0,0 +1,60 @@
+'''
+Tests of the hand query language against brute force enumeration of small decks.
+'''
+
+# Imports.
+from fractions import Fraction
+from random import Random
+import pytest
+from brute_force import Recording_Observer, probability, random_configurations
+from hand_query import Hand_Query
+from headless import build_model
+
+# Methods.
+def random_query(random, names, depth=0):
+    '''
+    Returns a random query text. Queries are valid Python expressions too, when the names are bound to the counts.
+    '''
+    choice = random.random()
+    if depth < 3 and choice < 0.3:
+        return "(" + random_query(random, names, depth + 1) + random.choice([" and ", " or "]) + random_query(random, names, depth + 1) + ")"
+    if depth < 3 and choice < 0.4:
+        return "not " + random_query(random, names, depth + 1)
+    term = " + ".join(random.sample(names, random.randint(1, len(names))))
+    return term + " " + random.choice([">=", "<=", "==", "!=", ">", "<"]) + " " + str(random.randint(0, 4))
+
+# Tests.
+def test_random_queries_match_brute_force():
+    random = Random(2)
+    configurations = [configuration for configuration in random_configurations(200, seed=2) if configuration[2]]
+    for deck_size, sample_size, groups in configurations[:100]:
+        names = ["g" + str(key) for key in range(len(groups))]
+        text = random_query(random, names)
+        model = build_model(deck_size, sample_size, groups)
+        expected = probability(deck_size, sample_size, [group[0] for group in groups], lambda counts: eval(text, {}, dict(zip(names, counts))))
+        assert model.calculate_query(text) == pytest.approx(float(expected), abs=1e-12), (deck_size, sample_size, groups, text)
+
+def test_query_uses_given_names():
+    model = build_model(10, 3, [[4, 0, 4], [3, 0, 3]])
+    query = Hand_Query("lands >= 1 and not spells == 0", {"lands": 0, "spells": 1})
+    dividend, divisor = query.evaluate({0: 4, 1: 3}, 10, 3)
+    expected = probability(10, 3, [4, 3], lambda counts: counts[0] >= 1 and counts[1] != 0)
+    assert Fraction(dividend, divisor) == expected
+    assert model.calculate_query(query) == pytest.approx(float(expected))
+
+@pytest.mark.parametrize("text", ["g0 >=", "g0 >= 1 and", "g9 >= 1", "g0 + g0 >= 1", "(g0 >= 1", "g0 >= 1 ?", "g0 >= g1"])
+def test_invalid_queries_raise_value_error(text):
+    with pytest.raises(ValueError):
+        Hand_Query(text, {"g0": 0, "g1": 1})
+
+def test_query_of_a_deleted_group_raises_value_error():
+    model = build_model(10, 3, [[4, 0, 4], [3, 0, 3]])
+    query = Hand_Query("lands >= 1 or spells == 0", {"lands": 0, "spells": 1})
+    model.del_defined_group(1)
+    with pytest.raises(ValueError, match="spells"):
+        query.evaluate({0: 4}, 10, 3)
+    observer = Recording_Observer()
+    model.attach(observer)
+    assert model.calculate_query(query) is None
+    assert observer.get_event_codes() == ["invalid query"]
+    assert Hand_Query("lands >= 1", {"lands": 0, "spells": 1}).evaluate({0: 4}, 10, 3)[0] > 0     # Unused names don't matter.
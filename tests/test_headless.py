@@ -0,0 +1,16 @@
+'''
+Tests of the cold start of the headless library: Importing it must not load modules most runs don't need.
+'''
+
+# Imports.
+import os
+import subprocess
+import sys
+
+# Tests.
+def test_import_loads_no_optional_modules():
+    code = "import sys, headless; print(' '.join(sorted(sys.modules)))"
+    modules = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.split()
+    for module in ("tkinter", "openpyxl", "sqlite3", "concurrent.futures", "multiprocessing", "logging"):
+        assert module not in modules
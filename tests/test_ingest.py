@@ -0,0 +1,58 @@
+'''
+Tests of the batch ingestion: Reading CSV and JSON lines files and calculating their rows.
+'''
+
+# Imports.
+import io
+import json
+import pytest
+from brute_force import window_probability
+from ingest import calculate_rows, ingest, read_csv, read_jsonl
+
+# Methods.
+def read_text(reader, text):
+    return [(line, row_id, configuration, error) for line, row_id, configuration, error in reader(io.StringIO(text))]
+
+# Tests.
+def test_csv_rows():
+    rows = read_text(read_csv, "deck,sample,cards,min,max\n"
+                               "12, 5, 4, 1, 2, 3, 0, 1\n"
+                               "# A comment.\n"
+                               "\n"
+                               "10,3,4,1,2,,\n"
+                               "10,3,4,x,2\n"
+                               "10,3,4,1\n")
+    assert rows == [(2, None, (12, 5, [[4, 1, 2], [3, 0, 1]]), None),
+                    (5, None, (10, 3, [[4, 1, 2]]), None),
+                    (6, None, None, "not an integer"),
+                    (7, None, None, "needs deck size, sample size and three values per group")]
+
+@pytest.mark.parametrize("text, column", [("10,3,,1,2,4", 3), ("10,3,4,1,2, ,0,1,1", 6), (",10,3,4,1,2", 1)])
+def test_csv_empty_cell_is_an_error(text, column):
+    assert read_text(read_csv, text) == [(1, None, None, "empty cell in column " + str(column))]
+
+def test_jsonl_rows():
+    rows = read_text(read_jsonl, '{"deck_size": 12, "sample_size": 5, "groups": [[4, 1, 2]], "id": "a"}\n'
+                                 '\n'
+                                 '{"deck_size": 12, "sample_size": 5, "groups": [[4, 1]], "id": "b"}\n'
+                                 '{"sample_size": 5}\n'
+                                 'not json\n')
+    assert rows[0] == (1, "a", (12, 5, [[4, 1, 2]]), None)
+    assert rows[1] == (3, "b", None, "needs three values per group")
+    assert [(line, error.startswith("invalid entry")) for line, _, _, error in rows[2:]] == [(4, True), (5, True)]
+
+def test_invalid_configuration_is_reported_per_row():
+    rows = [(1, None, (12, 5, [[4, 1, 2]]), None), (2, None, (3, 5, [[4, 1, 2]]), None), (3, None, None, "not an integer")]
+    outputs = list(calculate_rows(rows, arithmetic="exact"))
+    assert outputs[0]["probability"] == pytest.approx(float(window_probability(12, 5, [[4, 1, 2]])))
+    assert "error" in outputs[1] and "probability" not in outputs[1]
+    assert outputs[2] == {"line": 3, "id": None, "error": "not an integer"}
+
+def test_ingest_csv_to_jsonl(tmp_path):
+    input_path = tmp_path / "decks.csv"
+    input_path.write_text("12,5,4,1,2,3,0,1\n12,5,,1,2\n")
+    output_path = tmp_path / "results.jsonl"
+    assert ingest(str(input_path), str(output_path), arithmetic="exact") == {"rows": 2, "errors": 1}
+    outputs = [json.loads(text) for text in output_path.read_text().splitlines()]
+    assert outputs[0]["probability"] == pytest.approx(float(window_probability(12, 5, [[4, 1, 2], [3, 0, 1]])))
+    assert outputs[1] == {"line": 2, "id": None, "error": "empty cell in column 3"}
@@ -0,0 +1,80 @@
+'''
+Tests of multi_turn.calculate_turns() against brute force enumeration of small decks.
+'''
+
+# Imports.
+from fractions import Fraction
+from itertools import combinations
+from time import perf_counter
+import pytest
+from brute_force import random_configurations, window_probability
+from configuration import Configuration
+from multi_turn import calculate_turns
+
+# Methods.
+def count_groups(cards, labels, group_count):
+    counts = [0] * group_count
+    for card in cards:
+        if labels[card] is not None:
+            counts[labels[card]] += 1
+    return tuple(counts)
+
+def passes(cards, labels, groups):
+    return all(group[1] <= count <= group[2] for count, group in zip(count_groups(cards, labels, len(groups)), groups))
+
+def kept_and_success(deck_size, hand_size, drawn_later, groups, keep=None):
+    '''
+    Returns the exact probability that the opening hand is kept and the cards seen after drawn_later more cards pass all groups.
+    keep: Function of the counts of the groups in the hand like in calculate_turns(). Default: The hand passes all groups.
+    '''
+    labels = [index for index, group in enumerate(groups) for _ in range(group[0])]
+    labels += [None] * (deck_size - len(labels))
+    accepted = 0
+    total = 0
+    for hand in combinations(range(deck_size), hand_size):
+        rest = [card for card in range(deck_size) if card not in hand]
+        hand_passes = passes(hand, labels, groups) if keep is None else keep(count_groups(hand, labels, len(groups)))
+        for later in combinations(rest, drawn_later):
+            total += 1
+            accepted += hand_passes and passes(hand + later, labels, groups)
+    return Fraction(accepted, total)
+
+# Tests.
+def test_turns_without_mulligans_match_the_window_probability():
+    for deck_size, hand_size, groups in random_configurations(60, seed=1, max_deck_size=14):
+        configuration = Configuration.from_groups(deck_size, hand_size, groups)
+        turns = calculate_turns(configuration, turns=4, draws_per_turn=2)["turns"]
+        for turn, result in enumerate(turns):
+            expected = window_probability(deck_size, min(hand_size + 2 * turn, deck_size), groups)
+            assert result == pytest.approx(float(expected), abs=1e-12), (deck_size, hand_size, groups, turn)
+
+def test_one_mulligan_redraws_failed_hands_with_one_card_less():
+    deck_size, hand_size, groups = 10, 4, [[3, 1, 2], [4, 0, 2]]
+    configuration = Configuration.from_groups(deck_size, hand_size, groups)
+    result = calculate_turns(configuration, turns=3, draws_per_turn=1, mulligans=1)
+    keep_first = window_probability(deck_size, hand_size, groups)
+    assert result["keep"] == pytest.approx([float(keep_first), float(1 - keep_first)], abs=1e-12)
+    for turn, probability in enumerate(result["turns"]):
+        expected = kept_and_success(deck_size, hand_size, turn, groups) + (1 - keep_first) * window_probability(deck_size, hand_size - 1 + turn, groups)
+        assert probability == pytest.approx(float(expected), abs=1e-12), turn
+
+def test_custom_keep_rule_with_two_mulligans():
+    deck_size, hand_size, groups = 9, 4, [[3, 1, 2], [3, 0, 1]]
+    keep = lambda counts: counts[0] + counts[1] >= 2
+    configuration = Configuration.from_groups(deck_size, hand_size, groups)
+    result = calculate_turns(configuration, turns=2, draws_per_turn=1, mulligans=2, keep=keep)
+    keep_first = kept_and_success(deck_size, hand_size, 0, [[3, 0, 3], [3, 0, 3]], keep)
+    keep_second = kept_and_success(deck_size, hand_size - 1, 0, [[3, 0, 3], [3, 0, 3]], keep)
+    assert result["keep"] == pytest.approx([float(keep_first), float((1 - keep_first) * keep_second),
+                                            float((1 - keep_first) * (1 - keep_second))], abs=1e-12)
+    for turn, probability in enumerate(result["turns"]):
+        expected = (kept_and_success(deck_size, hand_size, turn, groups, keep)
+                    + (1 - keep_first) * kept_and_success(deck_size, hand_size - 1, turn, groups, keep)
+                    + (1 - keep_first) * (1 - keep_second) * window_probability(deck_size, hand_size - 2 + turn, groups))
+        assert probability == pytest.approx(float(expected), abs=1e-12), turn
+
+def test_typical_decks_take_well_under_a_second():
+    configuration = Configuration.from_groups(60, 7, [[4, 1, 3]] * 9)
+    start = perf_counter()
+    calculate_turns(configuration, turns=10, mulligans=2)
+    assert perf_counter() - start < 0.1
@@ -0,0 +1,100 @@
+'''
+Tests of the delivery rounds of Subject: Events notified while a round is delivered must not be lost or delivered late.
+'''
+
+# Imports.
+from brute_force import Recording_Observer
+from observer_subject import MAX_ROUNDS, Subject
+
+# Tests.
+def test_notify_delivers_at_once():
+    subject = Subject()
+    observer = Recording_Observer()
+    subject.attach(observer)
+    subject.notify("start calculate")
+    assert observer.events == [("start calculate", {})]
+
+def test_events_notified_during_delivery_come_after_the_round():
+    subject = Subject()
+    observer = Recording_Observer({"invalid group size": lambda kwargs: subject.notify("invalid group max", group_key=kwargs["group_key"], value=3)})
+    subject.attach(observer)
+    subject.notify("invalid group size", group_key=1, value=9)
+    assert observer.events == [("invalid group size", {"group_key": 1, "value": 9}), ("invalid group max", {"group_key": 1, "value": 3})]
+
+def test_long_cascades_are_not_dropped():
+    subject = Subject()
+    observer = Recording_Observer({"step": lambda kwargs: kwargs["left"] and subject.notify("step", left=kwargs["left"] - 1)})
+    subject.attach(observer)
+    subject.notify("step", left=5)
+    assert [kwargs["left"] for _, kwargs in observer.events] == [5, 4, 3, 2, 1, 0]
+    assert subject.get_event_stats()["deferred"] == 0
+
+def test_endless_cascades_are_dropped_without_a_scheduler():
+    subject = Subject()
+    observer = Recording_Observer({"ping": lambda kwargs: subject.notify("ping")})
+    subject.attach(observer)
+    subject.notify("ping")                  # Returns although the observer always notifies again.
+    assert len(observer.events) == MAX_ROUNDS
+    assert subject.get_event_stats()["dropped"] == 1
+    observer.reactions.clear()
+    subject.notify("other")                 # The dropped "ping" doesn't come with an unrelated event.
+    assert observer.get_event_codes()[MAX_ROUNDS:] == ["other"]
+
+def test_endless_cascades_continue_on_the_scheduler():
+    subject = Subject()
+    scheduled = []
+    subject.set_scheduler(scheduled.append)
+    observer = Recording_Observer({"ping": lambda kwargs: subject.notify("ping")})
+    subject.attach(observer)
+    subject.notify("ping")
+    assert len(observer.events) == MAX_ROUNDS
+    assert subject.get_event_stats()["deferred"] == 1
+    observer.reactions.clear()
+    scheduled.pop(0)()                      # What the event loop does when it is idle.
+    assert len(observer.events) == MAX_ROUNDS + 1
+    assert subject.get_event_stats()["dropped"] == 0
+
+def test_end_delivery_is_called_once_per_delivery():
+    subject = Subject()
+    ends = []
+    observer = Recording_Observer({"step": lambda kwargs: kwargs["left"] and subject.notify("step", left=kwargs["left"] - 1)})
+    observer.end_delivery = lambda: ends.append(len(observer.events))
+    subject.attach(observer)
+    subject.notify("step", left=3)
+    assert ends == [4]
+    assert subject.get_event_stats()["rounds"] == 4
+
+def test_scheduler_delivers_inside_a_blocking_observer():
+    '''
+    Replays the GUI: The observer of "end calculte" runs a nested event loop (a popup), in which the
+    user starts the next calculation. The scheduler must deliver its events inside of the nested loop.
+    '''
+    subject = Subject()
+    scheduled = []
+    subject.set_scheduler(scheduled.append)
+    delivered_in_nested_loop = []
+
+    def nested_event_loop(kwargs):
+        subject.notify("start calculate")
+        subject.notify("end calculate curve")
+        while scheduled:                    # What after_idle does inside of a nested mainloop.
+            scheduled.pop(0)()
+        delivered_in_nested_loop.extend(event_code for event_code, _ in observer.events)
+
+    observer = Recording_Observer({"end calculte": nested_event_loop})
+    subject.attach(observer)
+    subject.notify("end calculte")
+    assert delivered_in_nested_loop == ["end calculte", "start calculate", "end calculate curve"]
+    assert subject.get_event_stats() == {"delivered": 3, "coalesced": 0, "rounds": 2, "deferred": 0, "dropped": 0}
+
+def test_batch_coalesces_events_of_one_group():
+    subject = Subject()
+    observer = Recording_Observer()
+    subject.attach(observer)
+    with subject.batch():
+        subject.notify("invalid group size", group_key=1, value=5)
+        subject.notify("invalid group size", group_key=2, value=6)
+        subject.notify("invalid group size", group_key=1, value=7)
+        assert observer.events == []
+    assert observer.events == [("invalid group size", {"group_key": 2, "value": 6}), ("invalid group size", {"group_key": 1, "value": 7})]
+    assert subject.get_event_stats()["coalesced"] == 1
@@ -0,0 +1,72 @@
+'''
+Tests of optimizer.optimize() against brute force enumeration of all card counts of small decks.
+'''
+
+# Imports.
+from itertools import product
+from random import Random
+import pytest
+from brute_force import window_probability
+from optimizer import Composition_Search, optimize
+
+# Methods.
+def random_searches(count, seed=0):
+    '''
+    Returns count small searches (deck_size, sample_size, groups, budget), groups as [lowest, highest, min_in_sample, max_in_sample].
+    '''
+    random = Random(seed)
+    searches = []
+    for _ in range(count):
+        deck_size = random.randint(4, 11)
+        sample_size = random.randint(0, deck_size)
+        groups = []
+        for _ in range(random.randint(1, 3)):
+            lowest = random.randint(0, 2)
+            highest = random.randint(lowest, lowest + 3)
+            min_in_sample = random.randint(0, min(highest, 2))
+            groups.append([lowest, highest, min_in_sample, random.randint(min_in_sample, 4)])
+        budget = random.choice([None, random.randint(sum(group[0] for group in groups), deck_size)])
+        if sum(group[0] for group in groups) <= deck_size:
+            searches.append((deck_size, sample_size, groups, budget))
+    return searches
+
+def all_candidates(deck_size, sample_size, groups, budget):
+    '''
+    Returns the exact probability of every card counts within the ranges and the budget, as {card counts: probability}.
+    '''
+    budget = deck_size if budget is None else min(budget, deck_size)
+    candidates = {}
+    for card_counts in product(*(range(group[0], group[1] + 1) for group in groups)):
+        if sum(card_counts) <= budget:
+            windows = [[card_count] + group[2:] for card_count, group in zip(card_counts, groups)]
+            candidates[card_counts] = window_probability(deck_size, sample_size, windows)
+    return candidates
+
+# Tests.
+@pytest.mark.parametrize("processes", [1, 2])
+def test_top_candidates_match_brute_force(processes):
+    for deck_size, sample_size, groups, budget in random_searches(30)[:8 if processes > 1 else 30]:
+        candidates = all_candidates(deck_size, sample_size, groups, budget)
+        result = optimize(deck_size, sample_size, groups, budget=budget, top=3, processes=processes)
+        expected = sorted(candidates.values(), reverse=True)[:3]
+        assert [candidate["probability"] for candidate in result["top"]] == pytest.approx([float(value) for value in expected], abs=1e-12), \
+            (deck_size, sample_size, groups, budget)
+        for candidate in result["top"]:
+            assert candidate["probability"] == pytest.approx(float(candidates[tuple(candidate["card counts"])]), abs=1e-12)
+        assert result["best"] == result["top"][0]
+
+def test_pruning_skips_subtrees():
+    result = optimize(40, 7, [[10, 20, 1, 7], [2, 8, 1, 4], [0, 6, 0, 2]], budget=30, top=1)
+    assert result["stats"]["pruned"] > 0
+    assert result["stats"]["candidates"] < 11 * 7 * 7
+
+def test_search_doesnt_change_its_model():
+    search = Composition_Search(40, 7, [[10, 20, 1, 7], [2, 8, 1, 4]], budget=30, top=2)
+    search.search()
+    assert search.model.get_configuration() == (40, 7, ())
+    assert search.model.get_unassigned_cards() == 40
+
+@pytest.mark.parametrize("groups", [[[3, 2, 0, 1]], [[0, 2, 2, 1]], [[0, 1, 2, 3]], [[-1, 2, 0, 1]]])
+def test_invalid_group_ranges_raise_value_error(groups):
+    with pytest.raises(ValueError):
+        optimize(10, 3, groups)
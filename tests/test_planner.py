@@ -0,0 +1,50 @@
+'''
+Tests of the cost planner of Model_Hypgeo: The "auto" engine and the cost budget.
+'''
+
+# Imports.
+import pytest
+from brute_force import Recording_Observer, random_configurations, window_probability
+from headless import build_model
+from model_hypgeo import PLANNED_ENGINES
+
+# Tests.
+def test_auto_chooses_the_cheapest_planned_engine():
+    for deck_size, sample_size, groups in random_configurations(60, seed=4):
+        model = build_model(deck_size, sample_size, groups, engine="auto", arithmetic="exact")
+        model.calculate()
+        plan = model.get_plan()
+        cheapest = min(plan["estimates"][engine] for engine in PLANNED_ENGINES)
+        assert plan["engine"] in PLANNED_ENGINES
+        assert plan["estimated cost"] == plan["estimates"][plan["engine"]] == cheapest
+        assert plan["actual cost"] is not None
+        assert model.get_exact_result() == window_probability(deck_size, sample_size, groups)
+
+def test_refused_calculation_returns_none():
+    model = build_model(20, 7, [[6, 1, 3], [5, 1, 3], [4, 0, 2]], engine="enumeration")
+    observer = Recording_Observer()
+    model.attach(observer)
+    model.set_cost_budget(1)
+    assert model.calculate() is None
+    assert observer.get_event_codes() == ["start calculate", "over budget"]
+    assert observer.events[-1][1]["plan"]["over budget"]
+    assert model.get_plan()["actual cost"] is None
+
+def test_warned_calculation_is_still_exact():
+    groups = [[6, 1, 3], [5, 1, 3], [4, 0, 2]]
+    model = build_model(16, 6, groups, engine="enumeration", arithmetic="exact")
+    observer = Recording_Observer()
+    model.attach(observer)
+    model.set_cost_budget(1, policy="warn")
+    model.calculate()
+    assert observer.get_event_codes() == ["start calculate", "budget warning", "end calculte"]
+    assert model.get_exact_result() == window_probability(16, 6, groups)
+
+@pytest.mark.parametrize("cost_budget, policy", [(-1, "refuse"), (1.5, "refuse"), (10, "ignore")])
+def test_invalid_budget_is_notified(cost_budget, policy):
+    model = build_model(10, 3, [[4, 1, 2]])
+    observer = Recording_Observer()
+    model.attach(observer)
+    model.set_cost_budget(cost_budget, policy)
+    assert observer.get_event_codes() == ["invalid budget"]
+    assert model.get_cost_budget() is None
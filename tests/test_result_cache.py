@@ -0,0 +1,75 @@
+'''
+Tests of the Result_Cache and its canonical keys.
+'''
+
+# Imports.
+from configuration import Configuration
+from result_cache import Result_Cache, canonical_key, configuration_key
+
+# Methods.
+def open_cache(tmp_path, max_entries=10000):
+    return Result_Cache(str(tmp_path / "results.sqlite"), max_entries)
+
+# Tests.
+def test_canonical_key_ignores_what_doesnt_change_the_probability():
+    key = canonical_key(20, 5, [[4, 1, 2], [3, 0, 1]])
+    assert canonical_key(20, 5, [[3, 0, 1], [4, 1, 2]]) == key              # Permuted groups.
+    assert canonical_key(20, 5, [[4, 1, 9], [3, 0, 1]]) != key
+    assert canonical_key(20, 5, [[4, 1, 2], [3, 0, 3]]) == canonical_key(20, 5, [[4, 1, 2], [3, 0, 7]])    # Capped at the card count.
+    assert canonical_key(20, 2, [[4, 1, 4]]) == canonical_key(20, 2, [[4, 1, 2]])                          # Capped at the sample size.
+    assert canonical_key(20, 5, [[4, 1, 2], [0, 0, 0], [3, 0, 1]]) == key   # Groups without cards are dropped.
+    assert canonical_key(20, 5, [[4, 1, 2], [0, 1, 1], [3, 0, 1]]) != key   # Unless they need cards.
+    assert canonical_key(20, 5, [[4, 1, 2], [3, 0, 1]], "log") != key
+    assert canonical_key(21, 5, [[4, 1, 2], [3, 0, 1]]) != key
+
+def test_configuration_key_matches_canonical_key():
+    configuration = Configuration.from_groups(20, 5, [[3, 0, 1], [4, 1, 2], [0, 0, 0]])
+    assert configuration_key(configuration) == canonical_key(20, 5, [[4, 1, 2], [3, 0, 1]])
+    assert configuration_key(configuration, "log") == canonical_key(20, 5, [[4, 1, 2], [3, 0, 1]], "log")
+
+def test_results_survive_the_session(tmp_path):
+    cache = open_cache(tmp_path)
+    dividend = 10**40 + 1           # Bigger than a SQLite integer.
+    cache.store("exact", 0.25, dividend, 4 * dividend)
+    cache.store("log", 0.5, error_bound=1e-12)
+    assert cache.lookup("exact") == (0.25, dividend, 4 * dividend, 0.0)
+    assert cache.lookup("missing") is None
+    cache.close()
+
+    cache = open_cache(tmp_path)
+    assert cache.memory == {}
+    assert cache.lookup("exact") == (0.25, dividend, 4 * dividend, 0.0)
+    assert cache.lookup("log") == (0.5, None, None, 1e-12)
+    assert "log" in cache.memory
+    assert cache.get_stats() == {"hits": 2, "misses": 0, "entries": 2, "max entries": 10000}
+    cache.close()
+
+def test_memory_forgets_the_least_recently_used(tmp_path):
+    cache = open_cache(tmp_path, max_entries=2)
+    cache.store("a", 0.1)
+    cache.store("b", 0.2)
+    cache.lookup("a")               # "b" is the least recently used now.
+    cache.store("c", 0.3)
+    assert list(cache.memory) == ["a", "c"]
+    cache.close()
+
+def test_file_evicts_the_least_recently_used(tmp_path):
+    cache = open_cache(tmp_path, max_entries=2)
+    cache.store("a", 0.1)
+    cache.store("b", 0.2)
+    cache.memory.clear()            # Only the file is asked.
+    cache.lookup("a")
+    cache.store("c", 0.3)
+    cache.memory.clear()
+    assert cache.lookup("b") is None
+    assert cache.lookup("a") is not None and cache.lookup("c") is not None
+    assert cache.get_stats()["entries"] == 2
+    cache.close()
+
+def test_clear_removes_everything(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.store("a", 0.1)
+    cache.clear()
+    assert cache.lookup("a") is None
+    assert cache.get_stats()["entries"] == 0
+    cache.close()
@@ -0,0 +1,46 @@
+'''
+Tests of the local JSON service: Results, errors and the cost budget.
+'''
+
+# Imports.
+import asyncio
+import pytest
+from brute_force import window_probability
+from service import Probability_Service, request
+
+# Methods.
+def ask(service, payloads):
+    '''
+    Starts service, sends the payloads to /probability on one connection and returns the answers as a list of (status, payload).
+    '''
+    async def run():
+        port = await service.start(port=0)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            answers = [await request(reader, writer, "POST", "/probability", payload) for payload in payloads]
+            answers.append(await request(reader, writer, "GET", "/stats"))
+            writer.close()
+            return answers
+        finally:
+            await service.close()
+    return asyncio.run(run())
+
+# Tests.
+def test_probability_and_errors():
+    groups = [[4, 1, 2], [3, 0, 1]]
+    answers = ask(Probability_Service(workers=1), [{"deck_size": 12, "sample_size": 5, "groups": groups, "arithmetic": "exact"},
+                                                   {"deck_size": 3, "sample_size": 5, "groups": groups}])
+    assert answers[0][0] == 200
+    assert answers[0][1]["probability"] == pytest.approx(float(window_probability(12, 5, groups)))
+    assert answers[1][0] == 400
+
+def test_work_over_budget_is_refused_before_the_pool():
+    groups = [[10, 2, 5]] * 5
+    answers = ask(Probability_Service(workers=1, cost_budget=500), [{"deck_size": 100, "sample_size": 30, "groups": groups},
+                                                                    {"deck_size": 100, "sample_size": 3, "groups": groups[:1]}])
+    status, payload = answers[0]
+    assert status == 422
+    assert payload["error"] == "over budget" and payload["estimated cost"] > payload["budget"] == 500
+    assert answers[1][0] == 200
+    stats = answers[2][1]
+    assert stats["over budget"] == 1 and stats["calculations"] == 1
@@ -0,0 +1,45 @@
+'''
+Tests of the Monte Carlo simulation: The exact probability must be within its confidence interval.
+'''
+
+# Imports.
+import pytest
+pytest.importorskip("numpy")
+from brute_force import window_probability
+from headless import build_model
+from simulation_hypgeo import simulate, simulate_model, wilson_interval
+
+# Tests.
+@pytest.mark.parametrize("deck_size, sample_size, groups", [(12, 5, [[4, 1, 2], [3, 0, 1]]),
+                                                            (10, 4, [[3, 1, 3], [3, 1, 3]]),
+                                                            (8, 3, [[2, 0, 0]])])
+def test_exact_probability_is_within_the_interval(deck_size, sample_size, groups):
+    simulation = simulate(deck_size, sample_size, groups, trials=200000, seed=7, confidence=0.999)
+    assert simulation["trials"] == 200000
+    assert simulation["low"] <= float(window_probability(deck_size, sample_size, groups)) <= simulation["high"]
+    assert simulation["low"] <= simulation["estimate"] <= simulation["high"]
+
+def test_same_seed_gives_the_same_simulation():
+    first = simulate(40, 7, [[4, 1, 2]], trials=10000, seed=3, batch_size=3000)
+    second = simulate(40, 7, [[4, 1, 2]], trials=10000, seed=3, batch_size=3000)
+    assert first["successes"] == second["successes"]
+
+def test_simulate_model():
+    model = build_model(60, 7, [[24, 2, 4]], arithmetic="exact")
+    simulation = simulate_model(model, trials=100000, seed=11, confidence=0.999)
+    assert simulation["low"] <= model.calculate() <= simulation["high"]
+
+def test_invalid_configuration_raises():
+    with pytest.raises(ValueError):
+        simulate(3, 5, [[4, 1, 2]], trials=10)
+    with pytest.raises(ValueError):
+        simulate(10, 3, [[4, 1, 2]], trials=None)
+
+def test_wilson_interval():
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    low, high = wilson_interval(0, 100)
+    assert low == 0.0 and 0.0 < high < 0.05
+    low, high = wilson_interval(50, 100)
+    assert low == pytest.approx(1 - high) and low < 0.5 < high
+    wide, narrow = wilson_interval(500, 1000, 0.99), wilson_interval(500, 1000, 0.9)
+    assert wide[0] < narrow[0] < narrow[1] < wide[1]
@@ -5,10 +5,12 @@ This module contains the View class which contains all the visual aspects of the
 # Imports
 import tkinter as tk
 import json
+import queue
+import threading
+from exporter import export_scenarios, merge_sidecar
 from widgets_for_gui import *
 from observer_subject import Observer
 from model_hypgeo import *
-from openpyxl import load_workbook, Workbook
 
 # Classes
 class View(tk.Tk, Observer):
@@ -23,11 +25,15 @@ class View(tk.Tk, Observer):
         self.controller = controller    # Controller contains all event handlers.
 
         # Count/Storing variables.
-        self.groups = {}
-        self.key = 0
+        self.group_keys = []                    # Keys of the groups of the model in the order of the rows.
+        self.export_lock = threading.Lock()     # Only one export writes at a time.
+        self.export_results = queue.Queue()     # None or the error of every finished export. Only read on the thread of the GUI, see self.poll_export().
+        self.running_exports = 0                # Exports whose result wasn't read yet.
+        self.groups_stale = False               # True if the rows must be filled again when the delivery of the model's events ends.
 
         # Setup a window.
         tk.Tk.__init__(self)
+        self.model.set_scheduler(self.after_idle)       # Events notified while a popup is handled are still delivered.
         self.geometry("540x520")
         self.resizable(False, True)
         self.title("Drawing Probability Master v2")      
@@ -44,13 +50,17 @@ class View(tk.Tk, Observer):
         self.label_width = 10
         self.text_size = 10
         self.entry_width = 5
+        self.row_height = 36            # Pixels of one row in the group list.
+        self.poll_interval = 50         # Milliseconds between two checks whether the calculation or an export on a worker thread has finished.
 
         # Main frames: Create, configure and arragne with grid.
         self.main_frm_top = tk.Frame(master=self, relief=tk.RIDGE, borderwidth=5, width=520, height=50)
         self.main_frm_top.grid_propagate(0)
-        self.main_frm_bottom = Scrollable_Frame(master=self, relief=tk.RIDGE, borderwidth=5)
+        self.main_frm_bottom = tk.Frame(master=self, relief=tk.RIDGE, borderwidth=5)
 
         tk.Grid.rowconfigure(self=self, index=1, weight=1)
+        tk.Grid.rowconfigure(self=self.main_frm_bottom, index=1, weight=1)
+        tk.Grid.columnconfigure(self=self.main_frm_bottom, index=0, weight=1)
 
         self.main_frm_top.grid(row=0, column=0, padx=10, pady=5, sticky="nesw")
         self.main_frm_bottom.grid(row=1, column=0, padx=10, pady=5, sticky="nesw")
@@ -59,7 +69,8 @@ class View(tk.Tk, Observer):
         self.lbl_deck_size = tk.Label(master=self.main_frm_top, text="Deck Size:", font=("Helvetica", self.text_size, "bold"), anchor="e")
         self.lbl_sample_size = tk.Label(master=self.main_frm_top, text="Sample Size:", font=("Helvetica", self.text_size, "bold"), anchor="e")
 
-        self.btn_calculate = tk.Button(master=self.main_frm_top, text="CALCULATE", font=("Helvetica", self.text_size), anchor="center", command=self.controller.on_calculate)
+        self.btn_calculate = tk.Button(master=self.main_frm_top, text="CALCULATE", font=("Helvetica", self.text_size), anchor="center", width=14, command=self.controller.on_calculate)
+        self.btn_cancel = tk.Button(master=self.main_frm_top, text="CANCEL", font=("Helvetica", self.text_size), anchor="center", state="disabled", command=self.controller.on_cancel_calculation)
 
         self.ent_deck_size = tk.Entry(master=self.main_frm_top, font=("Helvetica", self.text_size), width=self.entry_width, validate="key")
         self.ent_deck_size.configure(validatecommand=(self.ent_deck_size.register(self.validate),'%d', '%P'))
@@ -71,19 +82,25 @@ class View(tk.Tk, Observer):
         self.lbl_deck_size.grid(row=0, column=0, padx=5, pady=5, sticky="nesw")
         self.lbl_sample_size.grid(row=0, column=2, padx=5, pady=5, sticky="nesw")
 
-        self.btn_calculate.grid(row=0, column=4, padx=40, pady=5, sticky="nesw")
+        self.btn_calculate.grid(row=0, column=4, padx=10, pady=5, sticky="nesw")
+        self.btn_cancel.grid(row=0, column=5, padx=5, pady=5, sticky="nesw")
 
         self.ent_deck_size.grid(row=0, column=1, padx=5, pady=5, sticky="nesw")
         self.ent_sample_size.grid(row=0, column=3, padx=5, pady=5, sticky="nesw")
 
         # Bottom widgets: Create, configure and arrange with grid
-        self.lbl_group_name = tk.Label(master=self.main_frm_bottom.get_frm_container(), text="Group Name\n(optional)", font=("Helvetica", self.text_size, "bold"), anchor="center", width=self.label_width)
-        self.lbl_group_success_deck = tk.Label(master=self.main_frm_bottom.get_frm_container(), text="Success in\nDeck", font=("Helvetica", self.text_size, "bold"), anchor="center", width=self.label_width)
-        self.lbl_group_min_success_sample = tk.Label(master=self.main_frm_bottom.get_frm_container(), text="Min. Success\nin Sample", font=("Helvetica", self.text_size, "bold"), anchor="center", width=self.label_width)
-        self.lbl_group_max_success_sample = tk.Label(master=self.main_frm_bottom.get_frm_container(), text="Max. Success\nin Sample", font=("Helvetica", self.text_size, "bold"), anchor="center", width=self.label_width)
-        self.lbl_group_delete = tk.Label(master=self.main_frm_bottom.get_frm_container(), text="Delete\nGroup", font=("Helvetica", self.text_size, "bold"), anchor="center", width=self.label_width)
-
-        self.btn_add_group = tk.Button(master=self.main_frm_bottom.get_frm_container(), text="ADD GROUP", font=("Helvetica", self.text_size), anchor="center", command=lambda: [self.add_group_view(), self.controller.on_add_group()])
+        self.frm_group_header = tk.Frame(master=self.main_frm_bottom)
+        self.lbl_group_name = tk.Label(master=self.frm_group_header, text="Group Name\n(optional)", font=("Helvetica", self.text_size, "bold"), anchor="center", width=self.label_width)
+        self.lbl_group_success_deck = tk.Label(master=self.frm_group_header, text="Success in\nDeck", font=("Helvetica", self.text_size, "bold"), anchor="center", width=self.label_width)
+        self.lbl_group_min_success_sample = tk.Label(master=self.frm_group_header, text="Min. Success\nin Sample", font=("Helvetica", self.text_size, "bold"), anchor="center", width=self.label_width)
+        self.lbl_group_max_success_sample = tk.Label(master=self.frm_group_header, text="Max. Success\nin Sample", font=("Helvetica", self.text_size, "bold"), anchor="center", width=self.label_width)
+        self.lbl_group_delete = tk.Label(master=self.frm_group_header, text="Delete\nGroup", font=("Helvetica", self.text_size, "bold"), anchor="center", width=self.label_width)
+
+        # Only the visible groups have widgets, they are filled with other groups when the list scrolls. The model holds the data.
+        self.lst_groups = Virtual_List(master=self.main_frm_bottom, row_height=self.row_height, get_count=lambda: len(self.group_keys),
+                                       create_row=self.create_group_row, fill_row=self.fill_group_row)
+
+        self.btn_add_group = tk.Button(master=self.main_frm_bottom, text="ADD GROUP", font=("Helvetica", self.text_size), anchor="center", command=self.add_group)
         
         self.lbl_group_name.grid(row=0, column=0, padx=5, pady=5, sticky="w")
         self.lbl_group_success_deck.grid(row=0, column=1, padx=5, pady=5, sticky="w")
@@ -91,45 +108,96 @@ class View(tk.Tk, Observer):
         self.lbl_group_max_success_sample.grid(row=0, column=3, padx=5, pady=5, sticky="w")
         self.lbl_group_delete.grid(row=0, column=4, padx=5, pady=5, sticky="w")
 
-        self.btn_add_group.grid(row=1, column=0, columnspan=5, padx=5, pady=5, sticky="nesw")
+        self.frm_group_header.grid(row=0, column=0, sticky="nesw")
+        self.lst_groups.grid(row=1, column=0, sticky="nesw")
+        self.btn_add_group.grid(row=2, column=0, padx=5, pady=5, sticky="nesw")
+        self.refresh_groups()
 
-    def add_group_view(self):
+    def create_group_row(self, master):
         '''
-        Add a new group to the display.
+        Creates the widgets of one row of the group list and returns them as a dict. "key" is the group they show.
         '''
-        key = self.key
-        self.groups[key] = []
-        group = self.groups[key]
-
-        group.append(tk.Frame(master=self.main_frm_bottom.get_frm_container()))   # Frame for one grouo
-        group.append(tk.Entry(master=group[0], font=("Helvetica", self.text_size), width=(2 * self.entry_width)))
-        group.append(tk.Entry(master=group[0], font=("Helvetica", self.text_size), width=(self.entry_width), validate="key"))
-        group.append(tk.Entry(master=group[0], font=("Helvetica", self.text_size), width=(self.entry_width), validate="key"))
-        group.append(tk.Entry(master=group[0], font=("Helvetica", self.text_size), width=(self.entry_width), validate="key"))
-        group.append(tk.Button(master=group[0], text=" x ", font=("Helvetica", self.text_size, "bold"), anchor="center", command=lambda key=key: [self.del_group_view(key), self.controller.on_del_group(key)]))
-
-        for index, command in zip([2,3,4], [self.controller.on_group_size, self.controller.on_group_min, self.controller.on_group_max]):
-            entry = group[index]
-            entry.configure(validatecommand=(entry.register(self.validate),'%d', '%P'))                                 # Only allow integers as inputs for all entries.
-            entry.bind('<FocusOut>', lambda event, key=key, command=command, entry=entry: command(key, entry.get()))    # Bind controller method to every entry.
-
-        group[0].grid(row=(key + 1), column=0, columnspan=5)             # Arrange the group frame.
-        group[1].grid(row=0, column=0, padx=5, pady=5, sticky="ns")
-        for column in range(2, 6, 1):
-            group[column].grid(row=0, column=column, padx=30, pady=5, sticky="ns")  # Arrange the group widgets.
+        row = {"key": None}
+        row["name"] = tk.Entry(master=master, font=("Helvetica", self.text_size), width=(2 * self.entry_width))
+        row["size"] = tk.Entry(master=master, font=("Helvetica", self.text_size), width=(self.entry_width), validate="key")
+        row["min"] = tk.Entry(master=master, font=("Helvetica", self.text_size), width=(self.entry_width), validate="key")
+        row["max"] = tk.Entry(master=master, font=("Helvetica", self.text_size), width=(self.entry_width), validate="key")
+        row["delete"] = tk.Button(master=master, text=" x ", font=("Helvetica", self.text_size, "bold"), anchor="center", command=lambda: self.del_group(row["key"]))
+
+        row["name"].bind('<FocusOut>', lambda event: self.on_group_entry(row, "name"))
+        for field in ["size", "min", "max"]:
+            entry = row[field]
+            entry.configure(validatecommand=(entry.register(self.validate),'%d', '%P'))                   # Only allow integers as inputs for all entries.
+            entry.bind('<FocusOut>', lambda event, field=field: self.on_group_entry(row, field))        # The key is looked up when the entry is left, rows are reused.
+
+        row["name"].grid(row=0, column=0, padx=5, pady=5, sticky="ns")
+        for column, field in zip(range(2, 6, 1), ["size", "min", "max", "delete"]):
+            row[field].grid(row=0, column=column, padx=30, pady=5, sticky="ns")  # Arrange the group widgets.
+        return row
+
+    def fill_group_row(self, row, index):
+        '''
+        Shows the group at index in the widgets of a row. A focused entry whose text isn't stored yet is stored in the
+        model first, else the text the user is typing would be overwritten (its <FocusOut> only comes after the row was filled).
+        Only then the focus moves away, so refills that storing the entry causes don't store it again. A focused entry
+        which already shows the model keeps the focus, e.g. when the user moved into it while another row was corrected.
+        '''
+        focused = self.focus_get()
+        for field in ["name", "size", "min", "max"]:
+            if focused is row[field] and (row["key"] != self.group_keys[index] or row[field].get() != self.get_entry_text(row["key"], field)):
+                self.focus_set()
+                self.on_group_entry(row, field)
+        key = self.group_keys[index]
+        row["key"] = key
+        for field in ["name", "size", "min", "max"]:
+            text = self.get_entry_text(key, field)
+            if row[field].get() != text:        # Unchanged entries keep their cursor.
+                row[field].delete(0, "end")
+                row[field].insert(0, text)
+
+    def get_entry_text(self, key, field):
+        '''
+        Returns the text of the model which the entry field of a row shows for the group with this key.
+        '''
+        if key not in self.model.get_defined_groups():
+            return None
+        getter = {"name": self.model.get_group_name, "size": self.model.get_group_size,
+                  "min": self.model.get_group_min, "max": self.model.get_group_max}[field]
+        return str(getter(key))
 
-        self.btn_add_group.grid_forget()                                            # Arrange the button at the bottom of all groups
-        self.btn_add_group.grid(row=(key + 2), column=0, columnspan=5, padx=5, pady=5, sticky="nesw")
+    def on_group_entry(self, row, field):
+        '''
+        Hands the value of an entry of a row to the controller, if it differs from the model.
+        '''
+        key = row["key"]
+        value = row[field].get()
+        if key not in self.model.get_defined_groups() or value == self.get_entry_text(key, field):
+            return
+        command = {"name": self.controller.on_group_name, "size": self.controller.on_group_size,
+                   "min": self.controller.on_group_min, "max": self.controller.on_group_max}[field]
+        command(key, value)
+
+    def refresh_groups(self):
+        '''
+        Reads the keys of the groups from the model and fills the rows again.
+        '''
+        self.group_keys = list(self.model.get_defined_groups())
+        self.lst_groups.refresh()
 
-        self.key += 1
+    def add_group(self):
+        '''
+        Adds a new group and scrolls to it.
+        '''
+        self.controller.on_add_group()
+        self.refresh_groups()
+        self.lst_groups.see(len(self.group_keys) - 1)
 
-    def del_group_view(self, key):
+    def del_group(self, key):
         '''
-        Remove a group from the display.
+        Deletes the group shown in a row.
         '''
-        for widget in self.groups[key]:
-            widget.destroy()
-        self.groups.pop(key)
+        self.controller.on_del_group(key)
+        self.refresh_groups()
 
     def validate(self, type_of_action, entry_value):
         '''
@@ -155,10 +223,29 @@ class View(tk.Tk, Observer):
         Update the GUI.
         '''
         if update_event == "start calculate":
-            pass
+            self.btn_calculate.configure(state="disabled", text="CALCULATING")
+            self.btn_cancel.configure(state="normal")
+            self.after(self.poll_interval, self.poll_calculation)
+
+        elif update_event == "progress calculate":
+            self.btn_calculate.configure(text="CALCULATING " + str(int(kwargs["progress"] * 100)) + "%")
 
         elif update_event == "end calculte":
+            self.reset_calculate_buttons()
             self.popup_result()
+
+        elif update_event == "cancel calculate":
+            self.reset_calculate_buttons()
+
+        elif update_event == "over budget":
+            self.reset_calculate_buttons()
+            self.popup_over_budget(kwargs["plan"])
+
+        elif update_event == "start calculate curve":
+            pass
+
+        elif update_event == "end calculate curve":
+            self.popup_curve()
         
         elif update_event == "invalid deck size":
             invalid_deck_size = int(self.ent_deck_size.get())
@@ -167,8 +254,9 @@ class View(tk.Tk, Observer):
             if invalid_deck_size <= sample_size:
                 self.ent_sample_size.delete(0, "end")
                 self.ent_sample_size.insert(0, invalid_deck_size)
-                self.controller.on_sample_size(invalid_deck_size)
-                self.controller.on_deck_size(invalid_deck_size)
+                with self.model.batch():            # The corrections are validated in one round.
+                    self.controller.on_sample_size(invalid_deck_size)
+                    self.controller.on_deck_size(invalid_deck_size)
 
             else:
                 self.ent_deck_size.delete(0, "end")
@@ -192,103 +280,152 @@ class View(tk.Tk, Observer):
 
         elif update_event == "invalid group size":
             key = kwargs["group_key"]
-            invalid_size = int(self.groups[key][2].get())
+            invalid_size = kwargs["value"]
             group_min = self.model.get_group_min(key)
             group_max = self.model.get_group_max(key)
             unassigned_cards = self.model.get_unassigned_cards()
-            if invalid_size >= (unassigned_cards + self.model.get_group_size(key)):
-                self.groups[key][2].delete(0, "end")
-                self.groups[key][2].insert(0, unassigned_cards + self.model.get_group_size(key))
-                self.controller.on_group_size(key, unassigned_cards + self.model.get_group_size(key))
-
-            elif invalid_size <= group_max and invalid_size >= group_min:
-                self.groups[key][4].delete(0, "end")
-                self.groups[key][4].insert(0, invalid_size)
-                self.controller.on_group_max(key, invalid_size)
-                self.controller.on_group_size(key, invalid_size)
-
-            elif invalid_size <= group_min:
-                self.groups[key][3].delete(0, "end")
-                self.groups[key][3].insert(0, invalid_size)
-                self.groups[key][4].delete(0, "end")
-                self.groups[key][4].insert(0, invalid_size)
-                self.controller.on_group_min(key, invalid_size)
-                self.controller.on_group_max(key, invalid_size)
-                self.controller.on_group_size(key, invalid_size)
+            with self.model.batch():            # The corrections are validated in one round.
+                if invalid_size >= (unassigned_cards + self.model.get_group_size(key)):
+                    self.controller.on_group_size(key, unassigned_cards + self.model.get_group_size(key))
 
-            else:
-                self.groups[key][2].delete(0, "end")
-                self.groups[key][2].insert(0, self.model.get_group_min(key))
+                elif invalid_size <= group_max and invalid_size >= group_min:
+                    self.controller.on_group_max(key, invalid_size)
+                    self.controller.on_group_size(key, invalid_size)
+
+                elif invalid_size <= group_min:
+                    self.controller.on_group_min(key, invalid_size)
+                    self.controller.on_group_max(key, invalid_size)
+                    self.controller.on_group_size(key, invalid_size)
+
+            self.groups_stale = True        # The rows show the values of the model again, see self.end_delivery().
 
         elif update_event == "invalid group min":
             key = kwargs["group_key"]
-            invalid_min = int(self.groups[key][3].get())
+            invalid_min = kwargs["value"]
             group_size = self.model.get_group_size(key)
             group_max = self.model.get_group_max(key)
 
-            if invalid_min >= group_max and invalid_min <= group_size:
-                self.groups[key][4].delete(0, "end")
-                self.groups[key][4].insert(0, invalid_min)
-                self.controller.on_group_max(key, invalid_min)
-                self.controller.on_group_min(key, invalid_min)
-
-            elif invalid_min >= group_max and invalid_min >= group_size:
-                self.groups[key][4].delete(0, "end")
-                self.groups[key][4].insert(0, group_size)
-                self.groups[key][3].delete(0, "end")
-                self.groups[key][3].insert(0, group_size)
-                self.controller.on_group_max(key, group_size)
-                self.controller.on_group_min(key, group_size)
-            
-            else:
-                self.groups[key][3].delete(0, "end")
-                self.groups[key][3].insert(0, self.model.get_group_min(key))
+            with self.model.batch():
+                if invalid_min >= group_max and invalid_min <= group_size:
+                    self.controller.on_group_max(key, invalid_min)
+                    self.controller.on_group_min(key, invalid_min)
+
+                elif invalid_min >= group_max and invalid_min >= group_size:
+                    self.controller.on_group_max(key, group_size)
+                    self.controller.on_group_min(key, group_size)
+
+            self.groups_stale = True
 
         elif update_event == "invalid group max":
             key = kwargs["group_key"]
-            invalid_max = int(self.groups[key][4].get())
+            invalid_max = kwargs["value"]
             group_size = self.model.get_group_size(key)
             group_min = self.model.get_group_min(key)
 
-            if invalid_max <= group_min:
-                self.groups[key][4].delete(0, "end")
-                self.groups[key][4].insert(0, group_min)
-                self.controller.on_group_max(key, group_min)
+            with self.model.batch():
+                if invalid_max <= group_min:
+                    self.controller.on_group_max(key, group_min)
 
-            elif invalid_max >= group_size:
-                self.groups[key][4].delete(0, "end")
-                self.groups[key][4].insert(0, group_size)
-                self.controller.on_group_max(key, group_size)
+                elif invalid_max >= group_size:
+                    self.controller.on_group_max(key, group_size)
 
-            else:
-                self.groups[key][4].delete(0, "end")
-                self.groups[key][4].insert(0, self.model.get_group_max(key))   
+            self.groups_stale = True
 
         elif update_event == "key error":
             pass    
 
+    def end_delivery(self):
+        '''
+        Fills the rows again once, after all events of an edit and their corrections were handled.
+        '''
+        if self.groups_stale:
+            self.groups_stale = False
+            self.lst_groups.refresh()
+
+    def poll_calculation(self):
+        '''
+        Asks the controller for the result of the calculation on the worker thread until it has finished.
+        '''
+        if self.controller.on_poll_calculation():
+            self.after(self.poll_interval, self.poll_calculation)
+
+    def reset_calculate_buttons(self):
+        '''
+        Enables the calculate button and disables the cancel button again.
+        '''
+        self.btn_calculate.configure(state="normal", text="CALCULATE")
+        self.btn_cancel.configure(state="disabled")
+
     def popup_result(self):
         '''
         Generates a popup in the middle of the application with "text".
         '''
-        self.popup_result = tk.Toplevel()                    # Create a popup window.
-        self.popup_result.geometry("390x70")                 # Set size.
-        self.popup_result.resizable(False, False)            # Lock size.
+        self.tpl_result = tk.Toplevel()                      # Create a popup window.
+        self.tpl_result.geometry("390x70")                   # Set size.
+        self.tpl_result.resizable(False, False)              # Lock size.
         x = self.winfo_x()
         y = self.winfo_y()
-        self.popup_result.geometry("+%d+%d" %(x+75,y+225))   # Center the popup in front of the main window.
-        self.popup_result.grab_set()                         # "Freezes" the main window until the popup is closed.
+        self.tpl_result.geometry("+%d+%d" %(x+75,y+225))     # Center the popup in front of the main window.
+        self.tpl_result.grab_set()                           # "Freezes" the main window until the popup is closed.
 
         # Label
         text = ("The probability of this configuration is: " + str(format_float(self.model.get_result(), factor=100)) + "%")
-        lbl_popup = tk.Label(master=self.popup_result, text=text, height=1, font=("Helvetica", "11"), anchor="center")
+        if self.model.get_result_from_cache():
+            text += " (cached)"
+        lbl_popup = tk.Label(master=self.tpl_result, text=text, height=1, font=("Helvetica", "11"), anchor="center")
         lbl_popup.pack(padx=5, pady=5)
 
         # Button
-        btn_export = tk.Button(master=self.popup_result, text="EXPORT TO EXCEL", font=("Helvetica", self.text_size), anchor="center", command=self.popup_export)
-        btn_export.pack(padx=5, pady=5)
+        btn_export = tk.Button(master=self.tpl_result, text="EXPORT TO EXCEL", font=("Helvetica", self.text_size), anchor="center", command=self.popup_export)
+        btn_export.pack(side="left", padx=30, pady=5)
+        btn_curve = tk.Button(master=self.tpl_result, text="SHOW CURVE", font=("Helvetica", self.text_size), anchor="center", command=self.controller.on_calculate_curve)
+        btn_curve.pack(side="right", padx=30, pady=5)
+
+    def popup_over_budget(self, plan):
+        '''
+        Popup which explains that the calculation was refused, because its estimated cost is above the budget.
+        '''
+        popup = tk.Toplevel()
+        popup.resizable(False, False)
+        popup.geometry("+%d+%d" %(self.winfo_x() + 75, self.winfo_y() + 225))
+        popup.grab_set()
+
+        text = ("This configuration is too large to calculate here:\n"
+                + "estimated cost " + format(plan["estimated cost"], ",") + " (" + plan["engine"] + "), budget " + format(plan["budget"], ",") + ".\n"
+                + "Narrow the min./max. in sample of the groups or use headless.py.")
+        lbl_popup = tk.Label(master=popup, text=text, font=("Helvetica", "11"), justify="left")
+        lbl_popup.pack(padx=5, pady=5)
+        btn_close = tk.Button(master=popup, text="OK", font=("Helvetica", self.text_size), command=popup.destroy)
+        btn_close.pack(pady=5)
+
+    def popup_curve(self):
+        '''
+        Popup which lists the probability of the configuration for every sample size up to the current one.
+        '''
+        self.tpl_result.destroy()
+        self.window_curve = tk.Toplevel()                    # Create a popup window.
+        self.window_curve.geometry("390x260")                # Set size.
+        self.window_curve.resizable(False, False)            # Lock size.
+        x = self.winfo_x()
+        y = self.winfo_y()
+        self.window_curve.geometry("+%d+%d" %(x+75,y+130))   # Center the popup in front of the main window.
+        self.window_curve.grab_set()                         # "Freezes" the main window until the popup is closed.
+
+        # Label
+        lbl_curve = tk.Label(master=self.window_curve, text="Probability by sample size:", font=("Helvetica", "11"), anchor="center")
+        lbl_curve.pack(padx=5, pady=5)
+
+        # Listbox with scrollbar
+        frm_curve = tk.Frame(master=self.window_curve)
+        frm_curve.pack(fill="both", expand=1, padx=5, pady=5)
+        lbx_curve = tk.Listbox(master=frm_curve, font=("Helvetica", self.text_size))
+        scb_curve = tk.Scrollbar(master=frm_curve, orient="vertical", command=lbx_curve.yview)
+        lbx_curve.configure(yscrollcommand=scb_curve.set)
+        lbx_curve.pack(side="left", fill="both", expand=1)
+        scb_curve.pack(side="right", fill="y")
 
-        self.popup_result.mainloop()
+        for sample_size, probability in enumerate(self.model.get_curve()):
+            lbx_curve.insert("end", "Sample size " + str(sample_size) + ": " + str(format_float(probability, factor=100)) + "%")
 
     def popup_export(self):
         '''
@@ -297,31 +434,33 @@ class View(tk.Tk, Observer):
         with open("refrences.json", "r") as read_storage:
             path = json.load(read_storage)["excel path"]
 
-        self.popup_result.destroy()
-        self.popup_export = tk.Toplevel()                    # Create a popup window
-        self.popup_export.geometry("390x120")                # Set size.
-        self.popup_export.resizable(False, False)            # Lock size.
+        self.tpl_result.destroy()
+        self.tpl_export = tk.Toplevel()                      # Create a popup window
+        self.tpl_export.geometry("390x120")                  # Set size.
+        self.tpl_export.resizable(False, False)              # Lock size.
         x = self.winfo_x()
         y = self.winfo_y()
-        self.popup_export.geometry("+%d+%d" %(x+75,y+200))   # Center the popup in front of the main window.
-        self.popup_export.grab_set()                         # "Freezes" the main window until the popup is closed.
+        self.tpl_export.geometry("+%d+%d" %(x+75,y+200))     # Center the popup in front of the main window.
+        self.tpl_export.grab_set()                           # "Freezes" the main window until the popup is closed.
 
         # Labels
-        lbl_path = tk.Label(master=self.popup_export, text="Path:", font=("Helvetica", self.text_size, "bold"), anchor="e")
+        lbl_path = tk.Label(master=self.tpl_export, text="Path:", font=("Helvetica", self.text_size, "bold"), anchor="e")
         lbl_path.grid(row=0, column=0, padx=5, pady=5)
 
         # Entries
-        ent_path = tk.Entry(master=self.popup_export, font=("Helvetica", self.text_size), width=9*self.entry_width)
+        ent_path = tk.Entry(master=self.tpl_export, font=("Helvetica", self.text_size), width=9*self.entry_width)
         ent_path.insert("end", path)
         ent_path.grid(row=0, column=1, padx=5, pady=5)
 
         # Buttons
-        frm_btn = tk.Frame(master=self.popup_export, borderwidth=0, width=390)
+        frm_btn = tk.Frame(master=self.tpl_export, borderwidth=0, width=390)
         frm_btn.grid(row=1, column=0, columnspan=2)
-        btn_export_to_path = tk.Button(master=frm_btn, text="EXPORT", font=("Helvetica", self.text_size), anchor="center", width=12, command=lambda: self.on_export(ent_path.get(), self.get_data()))
-        btn_create_at_path = tk.Button(master=frm_btn, text="CREATE NEW", font=("Helvetica", self.text_size), anchor="center", width=12, command=lambda: self.on_create_export(ent_path.get(), self.get_data()))
-        btn_export_to_path.grid(row=0, column=0, padx=30)
-        btn_create_at_path.grid(row=0, column=1, padx=30)
+        btn_export_to_path = tk.Button(master=frm_btn, text="EXPORT", font=("Helvetica", self.text_size), anchor="center", width=10, command=lambda: self.on_export(ent_path.get(), self.get_data()))
+        btn_create_at_path = tk.Button(master=frm_btn, text="CREATE NEW", font=("Helvetica", self.text_size), anchor="center", width=10, command=lambda: self.on_create_export(ent_path.get(), self.get_data()))
+        btn_merge_at_path = tk.Button(master=frm_btn, text="MERGE", font=("Helvetica", self.text_size), anchor="center", width=10, command=lambda: self.on_merge_export(ent_path.get()))
+        btn_export_to_path.grid(row=0, column=0, padx=10)
+        btn_create_at_path.grid(row=0, column=1, padx=10)
+        btn_merge_at_path.grid(row=0, column=2, padx=10)
 
     def get_data(self):
         '''
@@ -336,10 +475,10 @@ class View(tk.Tk, Observer):
         model_defined_groups = self.model.get_defined_groups()
         for key in model_defined_groups:
             model_group = model_defined_groups[key]
-            group_data = [[self.groups[key][1].get()],
-                          ["cards in deck", model_group[0]],
-                          ["min. in sample", model_group[1]],
-                          ["max. in sample", model_group[2]],
+            group_data = [[self.model.get_group_name(key)],
+                          ["cards in deck", model_group.card_count],
+                          ["min. in sample", model_group.min_in_sample],
+                          ["max. in sample", model_group.max_in_sample],
                           []
                           ]
             data.extend(group_data)
@@ -350,33 +489,73 @@ class View(tk.Tk, Observer):
 
     def on_export(self, path, data):
         '''
-        Load existing Excel file, add data.
+        Append data to an existing file. For Excel files, the rows are collected in a CSV sidecar until they are merged.
         '''
         self.store_path(path)
-        wb = load_workbook(path)
-        self.export(path, data, wb)
-        
+        self.export(export_scenarios, path, [data], False)
 
     def on_create_export(self, path, data):
         '''
         Create new excel file, add data to it.
         '''
         self.store_path(path)
-        wb = Workbook()
-        self.export(path, data, wb)
+        self.export(export_scenarios, path, [data], True)
 
-    def export(self, path, data, wb):
+    def on_merge_export(self, path):
         '''
-        Adds data to excel.
+        Move the rows of the CSV sidecar into the excel file.
         '''
-        ws = wb[wb.sheetnames[0]]
+        self.store_path(path)
+        self.export(merge_sidecar, path)
 
-        for row in data:
-            ws.append(row)
-        
-        wb.save(path)
-        wb.close()
-        self.popup_export.destroy()
+    def export(self, function, *args):
+        '''
+        Runs an export function on a thread, so the GUI doesn't freeze while the file is written.
+        Exports run one after another, so they never write the same file at the same time.
+        The thread never touches tkinter, its result is handed back with self.export_results.
+        '''
+        def run():
+            with self.export_lock:
+                try:
+                    function(*args)
+                    self.export_results.put(None)
+                except Exception as error:      # E.g. the file is opened in Excel or read-only.
+                    self.export_results.put(error)
+
+        threading.Thread(target=run).start()
+        self.running_exports += 1
+        if self.running_exports == 1:
+            self.after(self.poll_interval, self.poll_export)
+        self.tpl_export.destroy()
+
+    def poll_export(self):
+        '''
+        Reports the errors of finished exports, until no export is running anymore.
+        '''
+        while True:
+            try:
+                error = self.export_results.get_nowait()
+            except queue.Empty:
+                break
+            self.running_exports -= 1
+            if error is not None:
+                self.popup_message("The export failed:\n" + type(error).__name__ + ": " + str(error))
+        if self.running_exports:
+            self.after(self.poll_interval, self.poll_export)
+
+    def popup_message(self, text):
+        '''
+        Popup in front of the main window which shows text until it is closed.
+        '''
+        popup = tk.Toplevel()
+        popup.resizable(False, False)
+        popup.geometry("+%d+%d" %(self.winfo_x() + 75, self.winfo_y() + 225))
+        popup.grab_set()
+
+        lbl_popup = tk.Label(master=popup, text=text, font=("Helvetica", "11"), justify="left", wraplength=380)
+        lbl_popup.pack(padx=5, pady=5)
+        btn_close = tk.Button(master=popup, text="OK", font=("Helvetica", self.text_size), command=popup.destroy)
+        btn_close.pack(pady=5)
 
     def store_path(self, path):
         '''
@@ -1,67 +1,120 @@
 '''
-Tkinter widget: Frame with a scrollbar.
+Tkinter widget: List with a scrollbar which only has widgets for its visible rows.
 '''
 
 # Imports
 import tkinter as tk
 
 # Classes
-class Scrollable_Frame(tk.Frame):
+class Virtual_List(tk.Frame):
     '''
-    Frame with a scrollbar for the y-axis.
-    Access the container frame with self.get_frm_container().
+    List of rows of equal height with a scrollbar for the y-axis, for lists with hundreds or thousands of rows.
+    Only the visible rows have widgets: When the list scrolls, the same widgets are filled with other rows.
+    The data stays outside of the list, it is accessed with three functions:
+    - get_count(): Returns the number of rows.
+    - create_row(master): Creates the widgets of one row in the frame master and returns them (any object).
+    - fill_row(row, index): Shows the row with this index in the widgets created by create_row().
+    Call self.refresh() when the data changed.
     '''
-    def __init__(self, master, **kwargs):
-        # The wrapper frame inherited tk.Frame. It contains the scrollbar an the container frame.
+    def __init__(self, master, row_height, get_count, create_row, fill_row, **kwargs):
+        # The wrapper frame inherited tk.Frame. It contains the scrollbar and the frame of the rows.
         super().__init__(master, **kwargs)
+        self.row_height = row_height    # Height of every row in pixels.
+        self.get_count = get_count
+        self.create_row = create_row
+        self.fill_row = fill_row
+        self.first = 0                  # Index of the row at the top.
+        self.slots = []                 # [frame, row] of all created rows, the first one is shown at the top.
+        self.visible = 0                # Number of rows that fit into the frame.
 
-        # Create a canvas which will be scrollable.
-        self.cnv_scrollbar = tk.Canvas(master=self, highlightthickness=0)
-        self.cnv_scrollbar.pack(side="left", fill="both",expand=1)
+        # Frame of the rows and the scrollbar.
+        self.frm_rows = tk.Frame(master=self)
+        self.frm_rows.pack(side="left", fill="both", expand=1)
+        self.scb_yaxis = tk.Scrollbar(master=self, orient="vertical", command=self.yview)
+        self.scb_yaxis.pack(side="right", fill="y")
 
-        # Add a scrollbar to the canvas.
-        self.scb_yaxis = tk.Scrollbar(master=self, orient="vertical", command=self.cnv_scrollbar.yview)
-        self.scb_yaxis.pack(side="right",fill="y")
+        # Create rows when the frame gets bigger. Bind the scrollwheel to the list.
+        self.frm_rows.bind("<Configure>", self.adjust_rows)
+        self.frm_rows.bind("<Enter>", self.bind_mousewheel)
+        self.frm_rows.bind("<Leave>", self.unbind_mousewheel)
 
-        # Configure the canvas.
-        self.cnv_scrollbar.configure(yscrollcommand=self.scb_yaxis.set)
-        self.cnv_scrollbar.bind("<Configure>", lambda e: self.cnv_scrollbar.config(scrollregion= self.cnv_scrollbar.bbox(tk.ALL))) 
+    def adjust_rows(self, event):
+        '''
+        Creates as many rows as fit into the frame (the last one may be cut off). Rows are never destroyed.
+        '''
+        self.visible = max(event.height // self.row_height, 1)
+        while len(self.slots) < self.visible + 1:
+            frame = tk.Frame(master=self.frm_rows)
+            self.slots.append([frame, self.create_row(frame)])
+        self.refresh()
 
-        # Create another frame inside the canvas which will contain all widgets and add it to the canvas.
-        self.frm_container = tk.Frame(master=self.cnv_scrollbar)
-        self.cnv_scrollbar.create_window((0,0), window=self.frm_container, anchor="nw")  
+    def refresh(self):
+        '''
+        Fills the rows again, e.g. after rows were added, deleted or changed.
+        '''
+        count = self.get_count()
+        self.first = max(min(self.first, count - self.visible), 0)
+        for position, (frame, row) in enumerate(self.slots):
+            index = self.first + position
+            if index < count and position <= self.visible:
+                self.fill_row(row, index)
+                frame.place(x=0, y=position * self.row_height, relwidth=1, height=self.row_height)
+            else:
+                frame.place_forget()
+        if count > self.visible:
+            self.scb_yaxis.set(self.first / count, (self.first + self.visible) / count)
+        else:
+            self.scb_yaxis.set(0, 1)
 
-        # Bind the scrollwheel to the scrollbar.
-        self.frm_container.bind("<Enter>", self.bind_mousewheel)
-        self.frm_container.bind("<Leave>", self.unbind_mousewheel)
-        self.frm_container.bind("<Configure>", self.adjust_scrollregion)
+    def scroll_to(self, first):
+        '''
+        Shows the rows from index first on. Does nothing if they are shown already.
+        '''
+        first = max(min(first, self.get_count() - self.visible), 0)
+        if first != self.first:
+            self.first = first
+            self.refresh()
 
-    def get_frm_container(self):
+    def see(self, index):
         '''
-        Access/add all widgets in this frame.
+        Scrolls as little as possible, so the row with this index is visible.
         '''
-        return self.frm_container
-        
-    def bind_mousewheel(self, event):
+        if index < self.first:
+            self.scroll_to(index)
+        elif index >= self.first + self.visible:
+            self.scroll_to(index - self.visible + 1)
+
+    def yview(self, *args):
         '''
-        Binds mousewheel when inside of the frame.
+        Command of the scrollbar: ("moveto", fraction) or ("scroll", number, "units"/"pages").
         '''
-        self.cnv_scrollbar.bind_all("<MouseWheel>", self.handle_mousewheel)
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * self.get_count()))
+        elif args[0] == "scroll":
+            step = self.visible if args[2] == "pages" else 1
+            self.scroll_to(self.first + int(args[1]) * step)
 
-    def unbind_mousewheel(self, event):
+    def bind_mousewheel(self, event):
         '''
-        Unbinds mousewheel when outside of the frame.
+        Binds mousewheel when inside of the list.
         '''
-        self.cnv_scrollbar.unbind_all("<MouseWheel>")
+        self.frm_rows.bind_all("<MouseWheel>", self.handle_mousewheel)
+        self.frm_rows.bind_all("<Button-4>", lambda event: self.scroll_to(self.first - 1))    # X11 sends the mousewheel as buttons 4 and 5.
+        self.frm_rows.bind_all("<Button-5>", lambda event: self.scroll_to(self.first + 1))
 
-    def handle_mousewheel(self, event):
+    def unbind_mousewheel(self, event):
         '''
-        Configures the mousewheel with the scorllbar.
+        Unbinds mousewheel when outside of the list.
         '''
-        self.cnv_scrollbar.yview_scroll(int(-1*(event.delta/120)), "units")
+        widget = self.winfo_containing(event.x_root, event.y_root)
+        if widget is not None and str(widget).startswith(str(self.frm_rows)):  # The pointer only moved onto a row.
+            return
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.frm_rows.unbind_all(sequence)
 
-    def adjust_scrollregion(self, event):
+    def handle_mousewheel(self, event):
         '''
-        Adjusts the scrollbarregion when the frame gets bigger.
+        Scrolls one row per notch of the mousewheel (Windows: delta 120 per notch, macOS: smaller deltas).
         '''
-        self.cnv_scrollbar.configure(scrollregion=self.cnv_scrollbar.bbox("all"))
+        if event.delta:
+            self.scroll_to(self.first + (int(-1*(event.delta/120)) or (-1 if event.delta > 0 else 1)))